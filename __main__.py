@@ -0,0 +1,13 @@
+"""
+__main__.py
+
+Entry point of `python -m <package>`, see main.py.
+"""
+
+import sys
+try:
+    from .main import main
+except ImportError:
+    from main import main
+
+sys.exit(main())
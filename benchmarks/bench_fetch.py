@@ -0,0 +1,73 @@
+"""
+bench_fetch.py
+
+Fetch many URLs from a local HTTP/1.1 server that answers each request after a short
+delay (a stand-in for network latency): one at a time through the pooled
+UserAgentClient, then concurrently through fetch.fetch_many.
+
+Usage: python benchmarks/bench_fetch.py [urls]
+"""
+
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fetch import fetch_all
+from spoof_useragent import UserAgentClient
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64; rv:126.0) Gecko/20100101 Firefox/126.0"
+LATENCY = 0.01
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are two writes: with Nagle, delayed ACKs stall each keep-alive response.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(LATENCY)
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.request_queue_size = 128
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main(count=500):
+    server, url = start_server()
+    urls = [f"{url}/page/{i}" for i in range(count)]
+    try:
+        start = time.perf_counter()
+        with UserAgentClient() as client:
+            for page in urls:
+                client.get(page, USER_AGENT)
+        sequential = time.perf_counter() - start
+        print(f"{count} URLs with {LATENCY * 1e3:.0f} ms latency: sequential client {count / sequential:7.0f} req/s")
+        for concurrency, per_host in [(10, 10), (50, 50)]:
+            start = time.perf_counter()
+            results = fetch_all(urls, concurrency=concurrency, per_host=per_host, ua_policy=USER_AGENT)
+            seconds = time.perf_counter() - start
+            assert all(result.status == 200 for result in results)
+            print(f"  fetch_many concurrency={concurrency:<3} {count / seconds:7.0f} req/s "
+                  f"({sequential / seconds:.1f}x)")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,69 @@
+"""
+bench_http.py
+
+Requests per second against a local HTTP/1.1 keep-alive server: a fresh
+`requests.get` per call (the old make_request_with_useragent) against the pooled
+UserAgentClient session.
+
+Usage: python benchmarks/bench_http.py [requests]
+"""
+
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import requests
+
+from spoof_useragent import UserAgentClient
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64; rv:126.0) Gecko/20100101 Firefox/126.0"
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are two writes: with Nagle, delayed ACKs stall each keep-alive response.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def rate(func, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return count / (time.perf_counter() - start)
+
+
+def main(count=2_000):
+    server, url = start_server()
+    try:
+        old = rate(lambda: requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=10), count)
+        with UserAgentClient() as client:
+            new = rate(lambda: client.get(url, USER_AGENT), count)
+        print(f"{count} GET to a local keep-alive server: requests.get {old:8.0f} req/s, "
+              f"pooled session {new:8.0f} req/s ({new / old:.1f}x)")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000)
@@ -0,0 +1,37 @@
+"""
+bench_mac_generation.py
+
+Compare the per-address cost of `generate_random_mac` called in a loop with the
+bulk `generate_random_macs`.
+
+Usage: python benchmarks/bench_mac_generation.py [count]
+"""
+
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from spoof_mac import generate_random_mac, generate_random_macs
+
+
+def per_address(statement, count, repeat=5):
+    """Best time over `repeat` runs of statement, divided by count, in nanoseconds."""
+    return min(timeit.repeat(statement, number=1, repeat=repeat)) / count * 1e9
+
+
+def main(count=100_000):
+    loop = per_address(lambda: [generate_random_mac("unix") for _ in range(count)], count)
+    bulk = per_address(lambda: generate_random_macs(count), count)
+    bulk_oui = per_address(lambda: generate_random_macs(count, oui="00:1a:2b"), count)
+    bulk_any = per_address(lambda: generate_random_macs(count, unique=False), count)
+    print(f"{count} addresses")
+    print(f"generate_random_mac loop          {loop:10.1f} ns/address")
+    print(f"generate_random_macs              {bulk:10.1f} ns/address  x{loop / bulk:.1f}")
+    print(f"generate_random_macs oui          {bulk_oui:10.1f} ns/address  x{loop / bulk_oui:.1f}")
+    print(f"generate_random_macs unique=False {bulk_any:10.1f} ns/address  x{loop / bulk_any:.1f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,95 @@
+"""
+bench_parsing.py
+
+Measure the single-pass parsers of ifparse over large synthetic `ifconfig -a`,
+`ip -o link` and `ipconfig /all` outputs, and compare a parse-once lookup table
+with the old per-lookup scan of `get_current_mac` on Windows.
+
+Usage: python benchmarks/bench_parsing.py [interfaces]
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ifparse import parse_ifconfig, parse_ip_link, parse_ipconfig
+from interfaces import InterfaceTable
+
+
+def mac(i):
+    return f"02:00:{i >> 24 & 0xff:02x}:{i >> 16 & 0xff:02x}:{i >> 8 & 0xff:02x}:{i & 0xff:02x}"
+
+
+def synthetic_ifconfig(count):
+    return "".join(
+        f"veth{i}: flags=4163<UP,BROADCAST,RUNNING,MULTICAST>  mtu 1500\n"
+        f"        inet 10.{i >> 16 & 0xff}.{i >> 8 & 0xff}.{i & 0xff}  netmask 255.255.255.0\n"
+        f"        ether {mac(i)}  txqueuelen 1000  (Ethernet)\n"
+        f"        RX packets 0  bytes 0 (0.0 B)\n\n"
+        for i in range(count))
+
+
+def synthetic_ip_link(count):
+    return "".join(
+        f"{i + 1}: veth{i}@if{i + 2}: <BROADCAST,MULTICAST,UP,LOWER_UP> mtu 1500 qdisc noqueue state UP "
+        f"mode DEFAULT group default qlen 1000\\    link/ether {mac(i)} brd ff:ff:ff:ff:ff:ff link-netnsid 0\n"
+        for i in range(count))
+
+
+def synthetic_ipconfig(count):
+    return "Windows IP Configuration\r\n\r\n" + "".join(
+        f"Ethernet adapter Ethernet {i}:\r\n\r\n"
+        f"   Connection-specific DNS Suffix  . : localdomain\r\n"
+        f"   Description . . . . . . . . . . . : Virtual Adapter #{i}\r\n"
+        f"   Physical Address. . . . . . . . . : {mac(i).replace(':', '-').upper()}\r\n"
+        f"   DHCP Enabled. . . . . . . . . . . : Yes\r\n\r\n"
+        for i in range(count))
+
+
+def old_windows_lookup(output, interface):
+    """The per-call scan get_current_mac did on Windows before the parser existed."""
+    for block in output.split("\r\n\r\n"):
+        if interface in block:
+            match = re.search(r'Physical Address[.\s]*: ([0-9A-Fa-f\-]{17})', block)
+            if match:
+                return match.group(1)
+
+
+def best(func, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(count=10_000):
+    for name, output, parse in [
+        ("ifconfig -a", synthetic_ifconfig(count), parse_ifconfig),
+        ("ip -o link", synthetic_ip_link(count), parse_ip_link),
+        ("ipconfig /all", synthetic_ipconfig(count), parse_ipconfig),
+    ]:
+        assert len(parse(output)) == count
+        seconds = best(lambda: parse(output))
+        lines = output.count("\n")
+        print(f"{name:14} {count} interfaces  {len(output) / 1e6:6.1f} MB  {seconds * 1e3:8.1f} ms  "
+              f"{lines / seconds / 1e6:5.2f} M lines/s  {len(output) / seconds / 1e6:6.1f} MB/s")
+
+    output = synthetic_ipconfig(count)
+    names = [f"Ethernet {i}" for i in range(0, count, max(1, count // 100))]
+
+    def table_lookups():
+        table = InterfaceTable.from_ipconfig(output)
+        return [table.mac(name) for name in names]
+
+    old = best(lambda: [old_windows_lookup(output, name + ":") for name in names], repeat=1)
+    new = best(table_lookups)
+    print(f"{len(names)} Windows lookups: old per-call scan {old * 1e3:.1f} ms, "
+          f"one parse + table lookups {new * 1e3:.1f} ms")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
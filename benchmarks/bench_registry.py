@@ -0,0 +1,84 @@
+"""
+bench_registry.py
+
+Compare the Windows adapter lookup of change_mac before and after the registry index,
+on an in-memory registry with thousands of adapter subkeys (runs on any platform).
+
+Usage: python benchmarks/bench_registry.py [adapters]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from winregistry import ADAPTER_CLASS_KEY, AdapterIndex, MemoryRegistry
+
+
+def synthetic_registry(count):
+    registry = MemoryRegistry()
+    for i in range(count):
+        registry.add_key(rf"{ADAPTER_CLASS_KEY}\{i:04}", DriverDesc=f"Virtual Adapter #{i}",
+                         NetCfgInstanceId=f"{{{i:08x}-0000-0000-0000-000000000000}}")
+    return registry
+
+
+def old_set_registry_mac(winreg, interface, new_mac):
+    """The per-call scan change_mac did before the index, every subkey opened with KEY_ALL_ACCESS."""
+    with winreg.ConnectRegistry(None, winreg.HKEY_LOCAL_MACHINE) as hklm:
+        with winreg.OpenKey(hklm, ADAPTER_CLASS_KEY) as base_key:
+            for i in range(10_000):
+                try:
+                    with winreg.OpenKey(base_key, f"{i:04}", 0, winreg.KEY_ALL_ACCESS) as subkey:
+                        try:
+                            winreg.QueryValueEx(subkey, "NetCfgInstanceId")
+                            reg_desc = winreg.QueryValueEx(subkey, "DriverDesc")[0]
+                            if interface.lower() in reg_desc.lower():
+                                winreg.SetValueEx(subkey, "NetworkAddress", 0, winreg.REG_SZ,
+                                                  new_mac.replace(":", "").replace("-", ""))
+                                return True
+                        except FileNotFoundError:
+                            continue
+                except OSError:
+                    break
+    return False
+
+
+def best(func, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(count=5_000):
+    registry = synthetic_registry(count)
+    names = [f"Virtual Adapter #{i}" for i in range(count - 1, 0, -max(1, count // 100))]
+
+    def old():
+        for name in names:
+            assert old_set_registry_mac(registry, name, "02-BC-DE-F1-23-45")
+
+    index = AdapterIndex(registry)
+
+    def new():
+        for name in names:
+            assert index.set_network_address(name, "02-BC-DE-F1-23-45")
+
+    registry.opened.clear()
+    old_seconds = best(old, repeat=1)
+    old_opens = len(registry.opened)
+    build = best(lambda: AdapterIndex(registry).adapters(), repeat=3)
+    registry.opened.clear()
+    new_seconds = best(new, repeat=1)
+    new_opens = len(registry.opened)
+    print(f"{len(names)} adapter writes among {count} subkeys:")
+    print(f"  old per-call scan  {old_seconds * 1e3:8.1f} ms  {old_opens} keys opened, all with KEY_ALL_ACCESS")
+    print(f"  index (built once in {build * 1e3:.1f} ms)  {new_seconds * 1e3:8.1f} ms  "
+          f"{new_opens} keys opened, {len(names)} with KEY_SET_VALUE")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5_000)
@@ -0,0 +1,74 @@
+"""
+bench_useragent.py
+
+Compare get_random_useragent before and after the shared User-Agent pool: the old
+version rebuilt its source (a fake_useragent UserAgent, or the static fallback list)
+on every call. Also measures weighted sampling through the alias table on a large pool,
+and classified picks ("a mobile Safari") through the index against a scan of the pool.
+
+Usage: python benchmarks/bench_useragent.py [calls]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import spoof_useragent
+from uaparse import parse_useragent
+from uapool import UserAgentPool
+
+
+def old_get_random_useragent():
+    """The per-call construction get_random_useragent did before the pool."""
+    try:
+        from fake_useragent import UserAgent
+        ua = UserAgent()
+        return ua.random
+    except Exception:
+        static_user_agents = list(spoof_useragent.STATIC_USER_AGENTS)
+        return random.choice(static_user_agents)
+
+
+def best(func, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(calls=100_000):
+    spoof_useragent.get_useragent_pool()
+    old_calls = max(1, calls // 100)
+    old = best(lambda: [old_get_random_useragent() for _ in range(old_calls)], repeat=3) / old_calls
+    new = best(lambda: [spoof_useragent.get_random_useragent() for _ in range(calls)]) / calls
+    print(f"get_random_useragent: old per-call construction {old * 1e6:8.2f} us/call, "
+          f"shared pool {new * 1e6:6.2f} us/call ({old / new:.0f}x)")
+
+    size = 100_000
+    weights = [random.paretovariate(1.2) for _ in range(size)]
+    pool = UserAgentPool([f"Mozilla/5.0 (Agent {i})" for i in range(size)], weights)
+    alias = best(lambda: [pool.random() for _ in range(calls)]) / calls
+    agents = list(pool)
+    choices = best(lambda: random.choices(agents, weights, k=100), repeat=3) / 100
+    print(f"weighted pick among {size} agents: alias table {alias * 1e6:.2f} us, "
+          f"random.choices {choices * 1e6:.2f} us")
+
+    agents = [spoof_useragent.STATIC_USER_AGENTS[i % len(spoof_useragent.STATIC_USER_AGENTS)] + f" Build/{i}"
+              for i in range(size)]
+    pool = UserAgentPool(agents, weights)
+    start = time.perf_counter()
+    pool.classify()
+    classify = time.perf_counter() - start
+    pick = best(lambda: [pool.pick(device="mobile", browser="safari") for _ in range(calls)]) / calls
+    scan = best(lambda: random.choices([agent for agent in agents if parse_useragent(agent)[::3]
+                                        == ("safari", "mobile")]), repeat=3)
+    print(f"mobile Safari among {size} agents: index pick {pick * 1e6:.2f} us, "
+          f"scan {scan * 1e6:.0f} us (classified once in {classify * 1e3:.0f} ms)")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,227 @@
+"""
+suite.py
+
+Run the benchmark groups below, write their results as JSON and compare them with a
+stored baseline, flagging every metric that got worse by more than a threshold:
+- mac: per-address cost of generate_random_mac and generate_random_macs
+- parsing: get_all_macs over large synthetic `ifconfig -a` / `ipconfig /all` outputs, and
+  get_current_mac over one `ifconfig <interface>` block and a large `ipconfig` output
+- useragent: get_random_useragent with the static pool and with fake_useragent (when
+  installed), and get_useragent classified picks
+- http: make_request_with_useragent and UserAgentClient requests per second against a
+  local HTTP server
+
+Everything runs offline: system commands are mocked and the HTTP server is local.
+
+Usage: python benchmarks/suite.py [--quick] [--output results.json] [--baseline baseline.json]
+                                  [--threshold 0.25] [--save-baseline] [group ...]
+Exits with status 1 when a regression is found.
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import spoof_mac
+import spoof_useragent
+from bench_http import start_server
+from bench_parsing import mac, synthetic_ifconfig, synthetic_ipconfig
+from spoof_mac import generate_random_mac, generate_random_macs, get_all_macs, get_current_mac
+from uapool import UserAgentPool
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_THRESHOLD = 0.25
+
+
+def best(func, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def metric(value, unit, better="lower"):
+    return {"value": value, "unit": unit, "better": better}
+
+
+def bench_mac(scale):
+    count = 100_000 // scale
+    loop = best(lambda: [generate_random_mac("unix") for _ in range(count)]) / count
+    bulk = best(lambda: generate_random_macs(count)) / count
+    return {
+        "generate_random_mac": metric(loop * 1e9, "ns/address"),
+        "generate_random_macs": metric(bulk * 1e9, "ns/address"),
+    }
+
+
+def bench_parsing(scale):
+    count = 10_000 // scale
+    last = count - 1
+    ifconfig, ipconfig = synthetic_ifconfig(count).encode(), synthetic_ipconfig(count).encode()
+    windows_mac = mac(last).replace(":", "-").upper()
+    metrics = {}
+    # macOS: Linux reads the interfaces from netlink or sysfs, only macOS parses `ifconfig -a`.
+    for name, os, output, interface, expected in [
+        ("ifconfig", "macos", ifconfig, f"veth{last}", mac(last)),
+        ("ipconfig", "windows", ipconfig, f"Ethernet {last}", windows_mac),
+    ]:
+        with patch.object(spoof_mac.subprocess, "check_output", return_value=output):
+            table = get_all_macs(os, backend="subprocess")
+            assert len(table) == count and table.mac(interface) == expected
+            seconds = best(lambda: get_all_macs(os, backend="subprocess"))
+        metrics[f"get_all_macs.{name}"] = metric(seconds * 1e3, f"ms/{count} interfaces")
+    # `ifconfig <interface>` prints that interface only; `ipconfig` prints every adapter.
+    for name, output, os, interface, expected, factor, unit in [
+        ("ifconfig", synthetic_ifconfig(1).encode(), "unix", "veth0", mac(0), 1e6, "us/lookup"),
+        ("ipconfig", ipconfig, "windows", f"Ethernet {last}", windows_mac, 1e3, f"ms/{count} interfaces"),
+    ]:
+        with patch.object(spoof_mac.subprocess, "check_output", return_value=output):
+            assert get_current_mac(os, interface, backend="subprocess") == expected
+            seconds = best(lambda: get_current_mac(os, interface, backend="subprocess"))
+        metrics[f"get_current_mac.{name}"] = metric(seconds * factor, unit)
+    return metrics
+
+
+def bench_useragent(scale):
+    calls = 100_000 // scale
+    metrics = {}
+    try:
+        with patch.object(UserAgentPool, "from_fake_useragent", side_effect=ImportError("benchmark")):
+            spoof_useragent.reload()
+        seconds = best(lambda: [spoof_useragent.get_random_useragent() for _ in range(calls)]) / calls
+        metrics["get_random_useragent.static"] = metric(seconds * 1e6, "us/call")
+        seconds = best(lambda: [spoof_useragent.get_useragent(device="mobile") for _ in range(calls)]) / calls
+        metrics["get_useragent.mobile"] = metric(seconds * 1e6, "us/call")
+        pool = spoof_useragent.reload()
+        if importlib.util.find_spec("fake_useragent") is not None:
+            seconds = best(lambda: [spoof_useragent.get_random_useragent() for _ in range(calls)]) / calls
+            metrics["get_random_useragent.fake_useragent"] = metric(seconds * 1e6, "us/call")
+        else:
+            print(f"  fake_useragent is not installed, skipped (pool of {len(pool)} static agents)")
+    finally:
+        spoof_useragent.reload()
+    return metrics
+
+
+def bench_http(scale):
+    count = 2_000 // scale
+    server, url = start_server()
+    try:
+        # make_request_with_useragent prints the User-Agent it sends.
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            for _ in range(count):
+                spoof_useragent.make_request_with_useragent(url)
+            shared = count / (time.perf_counter() - start)
+        with spoof_useragent.UserAgentClient() as client:
+            start = time.perf_counter()
+            for _ in range(count):
+                client.get(url)
+            pooled = count / (time.perf_counter() - start)
+    finally:
+        server.shutdown()
+        server.server_close()
+    return {
+        "make_request_with_useragent": metric(shared, "req/s", "higher"),
+        "client.get": metric(pooled, "req/s", "higher"),
+    }
+
+
+GROUPS = {"mac": bench_mac, "parsing": bench_parsing, "useragent": bench_useragent, "http": bench_http}
+
+
+def run(groups=None, quick=False):
+    """
+    Run the benchmark groups (all of them by default).
+
+    Args:
+        groups (list[str]): names from GROUPS.
+        quick (bool): run a tenth of the iterations, for smoke tests.
+
+    Returns:
+        dict: "meta" (date, Python, platform) and "metrics", a dict "group.name" ->
+              {"value", "unit", "better"} where better is "lower" or "higher".
+    """
+    metrics = {}
+    for name in groups or GROUPS:
+        print(f"{name}...")
+        for key, value in GROUPS[name](10 if quick else 1).items():
+            metrics[f"{name}.{key}"] = value
+            print(f"  {key:40} {value['value']:12.2f} {value['unit']}")
+    return {
+        "meta": {"date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                 "python": platform.python_version(), "platform": platform.platform(), "quick": quick},
+        "metrics": metrics,
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare results with a baseline, both as returned by `run`.
+
+    Returns:
+        list[tuple]: (name, baseline value, current value, relative slowdown) of every metric
+                     worse than the baseline by more than threshold (0.25 = 25 %).
+    """
+    regressions = []
+    for name, current in results["metrics"].items():
+        previous = baseline.get("metrics", {}).get(name)
+        if previous is None or not previous["value"] or not current["value"]:
+            continue
+        if current["better"] == "higher":
+            slowdown = previous["value"] / current["value"] - 1
+        else:
+            slowdown = current["value"] / previous["value"] - 1
+        if slowdown > threshold:
+            regressions.append((name, previous["value"], current["value"], slowdown))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite.")
+    parser.add_argument("groups", nargs="*", metavar="group",
+                        help=f"groups to run among {', '.join(GROUPS)} (all by default)")
+    parser.add_argument("--quick", action="store_true", help="a tenth of the iterations")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown flagged as a regression (default %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    args = parser.parse_args(argv)
+    unknown = set(args.groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"unknown group(s): {', '.join(sorted(unknown))}")
+
+    results = run(args.groups, args.quick)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"baseline saved to {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print(f"no baseline at {baseline_path}, run with --save-baseline to create it")
+        return 0
+    regressions = compare(results, json.loads(baseline_path.read_text()), args.threshold)
+    for name, previous, current, slowdown in regressions:
+        print(f"REGRESSION {name}: {previous:.2f} -> {current:.2f} ({slowdown:+.0%})")
+    if not regressions:
+        print(f"no regression above {args.threshold:.0%} against {baseline_path}")
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""
+dnscache.py
+
+This module caches host name resolutions in the process, for workloads sending many short
+requests to a few hosts:
+- `DnsCache` keeps the addresses of each host until their TTL runs out, bounded in entries
+  (LRU), and reports hits, misses and resolve times in `stats()`; concurrent misses on one
+  host share a single resolve
+- `prefetch(hosts)` resolves a list of hosts ahead of a burst
+- resolvers are callables host -> (getaddrinfo() tuples, ttl or None): `system_resolver`
+  (the default) goes through getaddrinfo, which does not expose TTLs, so its answers are
+  kept `default_ttl` seconds; `StaticResolver` answers from a dict, to test offline
+
+`spoof_useragent.UserAgentClient(dns_cache=DnsCache())` resolves the hosts of its new
+connections through the cache (see httpconn.py), and `UserAgentClient.warm_up(urls)` also
+opens pooled connections ahead of time.
+"""
+
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+
+def system_resolver(host):
+    """Resolve host with the system resolver. Returns (TCP getaddrinfo() tuples with port 0, None)."""
+    return socket.getaddrinfo(host, 0, 0, socket.SOCK_STREAM), None
+
+
+class StaticResolver:
+    """
+    Resolver answering from a dict, counting its calls in `calls`.
+
+    Args:
+        hosts (dict): host -> IPv4 / IPv6 address, or a list of them.
+        ttl (float): TTL of every answer, in seconds.
+    """
+
+    def __init__(self, hosts, ttl=300):
+        self.hosts = hosts
+        self.ttl = ttl
+        self.calls = 0
+
+    def __call__(self, host):
+        self.calls += 1
+        addresses = self.hosts.get(host)
+        if addresses is None:
+            raise socket.gaierror(socket.EAI_NONAME, f"unknown host {host}")
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        infos = []
+        for address in addresses:
+            if ":" in address:
+                infos.append((socket.AF_INET6, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", (address, 0, 0, 0)))
+            else:
+                infos.append((socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", (address, 0)))
+        return infos, self.ttl
+
+
+class _Flight:
+    """A resolve in progress, waited on by the lookups of the same host that miss meanwhile."""
+
+    __slots__ = ("done", "infos", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.infos = None
+        self.error = None
+
+
+def _with_port(infos, port):
+    return [(family, type_, proto, canonname, (sockaddr[0], port) + tuple(sockaddr[2:]))
+            for family, type_, proto, canonname, sockaddr in infos]
+
+
+class DnsCache:
+    """
+    TTL-respecting cache of host name resolutions, safe to share between threads.
+
+    Args:
+        resolver (callable): host -> (getaddrinfo() tuples, ttl in seconds or None),
+                             `system_resolver` by default.
+        default_ttl (float): how long answers without a TTL are kept.
+        max_ttl (float): upper bound of the TTLs, so a long TTL does not pin a moved host.
+        max_entries (int): hosts kept, the least recently used are evicted.
+    """
+
+    def __init__(self, resolver=system_resolver, default_ttl=30.0, max_ttl=3600.0, max_entries=1024):
+        self.resolver = resolver
+        self.default_ttl = default_ttl
+        self.max_ttl = max_ttl
+        self.max_entries = max_entries
+        # host -> (getaddrinfo() tuples with port 0, expiry on the monotonic clock)
+        self._entries = OrderedDict()
+        # host -> _Flight of the resolve running for it
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.expired = 0
+        self.failures = 0
+        self.resolve_time = 0.0
+        self.resolve_max = 0.0
+
+    def resolve(self, host, port=0):
+        """
+        The addresses of host, from the cache while their TTL lasts. A miss while another
+        thread resolves the same host waits for that resolve instead of starting its own.
+
+        Args:
+            host (str): a host name or an IP address (IP addresses are not cached).
+            port (int): port put in the returned socket addresses.
+
+        Returns:
+            list: getaddrinfo()-style (family, type, proto, canonname, sockaddr) tuples.
+
+        Raises:
+            socket.gaierror: if the host does not resolve (failures are not cached).
+        """
+        if _is_address(host):
+            return socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM, 0, socket.AI_NUMERICHOST)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(host)
+                    self.hits += 1
+                    return _with_port(entry[0], port)
+                del self._entries[host]
+                self.expired += 1
+            flight = self._flights.get(host)
+            leader = flight is None
+            if leader:
+                self.misses += 1
+                flight = self._flights[host] = _Flight()
+            else:
+                self.shared += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return _with_port(flight.infos, port)
+        try:
+            flight.infos = self._fetch(host)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[host]
+            flight.done.set()
+        return _with_port(flight.infos, port)
+
+    def _fetch(self, host):
+        start = time.perf_counter()
+        try:
+            infos, ttl = self.resolver(host)
+        except OSError:
+            with self._lock:
+                self.failures += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.resolve_time += elapsed
+                self.resolve_max = max(self.resolve_max, elapsed)
+        ttl = min(self.default_ttl if ttl is None else ttl, self.max_ttl)
+        if ttl > 0 and infos:
+            with self._lock:
+                self._entries[host] = (infos, time.monotonic() + ttl)
+                self._entries.move_to_end(host)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return infos
+
+    def prefetch(self, hosts):
+        """
+        Resolve hosts ahead of a burst, refreshing the entries already cached.
+
+        Returns:
+            dict: host -> number of addresses, or the socket.gaierror it failed with.
+        """
+        results = {}
+        for host in hosts:
+            try:
+                results[host] = len(self._fetch(host))
+            except OSError as e:
+                results[host] = e
+        return results
+
+    def invalidate(self, host=None):
+        """Forget one host, or every host when None."""
+        with self._lock:
+            if host is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(host, None)
+
+    def stats(self):
+        """
+        Returns:
+            dict: hits, misses (expired entries included), expired, shared (misses that waited
+                  for the resolve of another thread), failures, entries, and resolve_time /
+                  resolve_max, the total and slowest resolver time in seconds.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "expired": self.expired, "shared": self.shared,
+                    "failures": self.failures,
+                    "entries": len(self._entries), "resolve_time": self.resolve_time,
+                    "resolve_max": self.resolve_max}
+
+
+def _is_address(host):
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            socket.inet_pton(family, host)
+            return True
+        except OSError:
+            pass
+    return False
@@ -0,0 +1,352 @@
+"""
+fetch.py
+
+This module fetches many URLs concurrently with asyncio, each request carrying a
+spoofed User-Agent:
+- `fetch_many()` is an async iterator yielding one `FetchResult` per URL as soon as it
+  completes, with a global and a per-host concurrency limit and a timeout per request
+- failures (connection refused, timeout, bad response...) are yielded as results
+  carrying the exception, they never stop the other fetches
+- bodies are kept in memory, or streamed into a per-request sink (see `variants.py`)
+- `fetch_all()` runs `fetch_many()` to completion from synchronous code
+
+HTTP/1.1 is spoken directly over asyncio streams (http and https, Content-Length,
+chunked and read-until-close bodies), and connections are kept alive and reused per host.
+"""
+
+import asyncio
+import socket
+import ssl
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+try:
+    from . import instrument
+    from .spoof_useragent import get_random_useragent
+except ImportError:
+    import instrument
+    from spoof_useragent import get_random_useragent
+
+FetchResult = namedtuple("FetchResult", ["url", "status", "headers", "body", "user_agent", "elapsed", "error"])
+FetchResult.__doc__ = """
+Outcome of one URL in `fetch_many`.
+
+status, headers (lowercase names) and body are None when the request failed, error is then
+the exception. elapsed is the time from sending the request to the end of the body, in seconds.
+"""
+
+MAX_HEADER_LINES = 100
+# URLs started and not yet yielded, per unit of concurrency: URLs waiting for a busy host do
+# not hold a global slot, and the read-ahead lets URLs to other hosts start meanwhile.
+READ_AHEAD = 16
+# Largest piece handed to a body sink at once.
+READ_SIZE = 64 * 1024
+
+
+def _user_agent_picker(ua_policy):
+    """
+    Turn a ua_policy into a function url -> User-Agent.
+
+    None or "random": a random User-Agent per request, "per-host": one random
+    User-Agent per host, a str: that User-Agent, a callable: called with the URL.
+    """
+    if ua_policy is None or ua_policy == "random":
+        return lambda url: get_random_useragent()
+    if ua_policy == "per-host":
+        chosen = {}
+        return lambda url: chosen.setdefault(urlsplit(url).netloc, get_random_useragent())
+    if isinstance(ua_policy, str):
+        return lambda url: ua_policy
+    if callable(ua_policy):
+        return ua_policy
+    raise ValueError(f"unsupported ua_policy: {ua_policy!r}")
+
+
+def _host_key(parts):
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https"):
+        raise ValueError(f"unsupported URL scheme: {parts.scheme!r}")
+    if not parts.hostname:
+        raise ValueError("URL has no host")
+    return scheme, parts.hostname, parts.port or (443 if scheme == "https" else 80)
+
+
+class _ConnectionPool:
+    """Idle keep-alive connections, per (scheme, host, port)."""
+
+    def __init__(self, ssl_context):
+        self._ssl_context = ssl_context
+        self._idle = {}
+
+    async def acquire(self, key):
+        """Return (reader, writer, reused)."""
+        idle = self._idle.get(key)
+        while idle:
+            reader, writer = idle.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return reader, writer, True
+            writer.close()
+        scheme, host, port = key
+        context = self._ssl_context if scheme == "https" else None
+        if instrument.collector is not None:
+            reader, writer = await _traced_open(instrument.collector, host, port, context)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, ssl=context)
+        return reader, writer, False
+
+    def release(self, key, reader, writer, reusable):
+        if reusable:
+            self._idle.setdefault(key, []).append((reader, writer))
+        else:
+            writer.close()
+
+    def close(self):
+        for connections in self._idle.values():
+            for _reader, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+
+async def _traced_open(collector, host, port, context):
+    """open_connection() in three timed steps: "dns", "connect" and, for https, "tls"."""
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    try:
+        addresses = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    finally:
+        collector.observe("http", "dns", time.perf_counter() - start, host=host)
+    start = time.perf_counter()
+    try:
+        error = None
+        for _family, _type, _proto, _name, address in addresses:
+            try:
+                reader, writer = await asyncio.open_connection(address[0], address[1])
+                break
+            except OSError as e:
+                error = e
+        else:
+            raise error
+    finally:
+        collector.observe("http", "connect", time.perf_counter() - start, host=host)
+    if context is not None:
+        start = time.perf_counter()
+        try:
+            await writer.start_tls(context, server_hostname=host)
+        except BaseException:
+            writer.close()
+            raise
+        finally:
+            collector.observe("http", "tls", time.perf_counter() - start, host=host)
+    return reader, writer
+
+
+async def _read_headers(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("connection closed before the response")
+    version, _, rest = status_line.decode("latin-1").rstrip("\r\n").partition(" ")
+    if not version.startswith("HTTP/"):
+        raise ValueError(f"invalid status line: {status_line!r}")
+    status = int(rest[:3])
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            return version, status, headers
+        name, _, value = line.decode("latin-1").partition(":")
+        name = name.strip().lower()
+        value = value.strip()
+        headers[name] = f"{headers[name]}, {value}" if name in headers else value
+    raise ValueError("too many response headers")
+
+
+async def _read_body(reader, headers, sink=None):
+    """
+    Return (body, whether the connection can be reused).
+
+    With a sink, the body is passed to `sink.update()` in pieces of at most READ_SIZE bytes
+    instead of being kept, and the sink is returned as the body.
+    """
+    if sink is None and "content-length" in headers and "chunked" not in headers.get("transfer-encoding", "").lower():
+        return await reader.readexactly(int(headers["content-length"])), True
+    chunks = []
+    write = chunks.append if sink is None else sink.update
+
+    async def copy(size):
+        while size:
+            piece = await reader.readexactly(min(size, READ_SIZE))
+            write(piece)
+            size -= len(piece)
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        while True:
+            size = int((await reader.readline()).split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                break
+            await copy(size)
+            await reader.readexactly(2)
+        reusable = True
+    elif "content-length" in headers:
+        await copy(int(headers["content-length"]))
+        reusable = True
+    else:
+        while True:
+            piece = await reader.read(READ_SIZE)
+            if not piece:
+                break
+            write(piece)
+        reusable = False
+    return (b"".join(chunks) if sink is None else sink), reusable
+
+
+async def _request(pool, url, user_agent, sink=None):
+    parts = urlsplit(url)
+    key = _host_key(parts)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    default_port = 443 if key[0] == "https" else 80
+    host = key[1] if key[2] == default_port else f"{key[1]}:{key[2]}"
+    request = (f"GET {path} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: {user_agent}\r\n"
+               f"Accept: */*\r\nAccept-Encoding: identity\r\nConnection: keep-alive\r\n\r\n").encode("latin-1")
+    collector = instrument.collector
+    while True:
+        reader, writer, reused = await pool.acquire(key)
+        try:
+            sent = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            version, status, headers = await _read_headers(reader)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            writer.close()
+            if reused:
+                # The server closed an idle keep-alive connection: try again on a new one.
+                continue
+            raise
+        except BaseException:
+            writer.close()
+            raise
+        break
+    if collector is not None:
+        received = time.perf_counter()
+        collector.observe("http", "ttfb", received - sent, host=key[1])
+    try:
+        if status in (204, 304) or 100 <= status < 200:
+            body, reusable = (b"" if sink is None else sink), True
+        else:
+            body, reusable = await _read_body(reader, headers, sink)
+    except BaseException:
+        writer.close()
+        raise
+    if collector is not None:
+        collector.observe("http", "body", time.perf_counter() - received, host=key[1])
+    reusable = reusable and headers.get("connection", "").lower() != "close" and version != "HTTP/1.0"
+    pool.release(key, reader, writer, reusable)
+    return status, headers, body
+
+
+async def fetch_many(urls, concurrency=20, ua_policy=None, per_host=6, timeout=10.0, ssl_context=None,
+                     body_sink=None):
+    """
+    Fetch every URL with a spoofed User-Agent and yield the results as they complete.
+
+    Use it with `async for result in fetch_many(urls): ...`. URLs to one host are started in
+    order, the results come out in completion order, one per URL. A request takes a global
+    slot only once its host has a free slot, so a run of URLs to one busy host never keeps
+    the other hosts waiting. At most concurrency * READ_AHEAD URLs are started and not yet
+    yielded, so a consumer that stops pulling results stops the fetching too.
+
+    Args:
+        urls (iterable[str | tuple]): http:// or https:// URLs, consumed lazily; a (url, user_agent)
+                                      pair sends that User-Agent whatever the ua_policy.
+        concurrency (int): maximum number of requests in flight overall.
+        ua_policy: None or "random" (a random User-Agent per request), "per-host" (one random
+                   User-Agent per host), a User-Agent string, or a callable url -> User-Agent.
+        per_host (int): maximum number of requests in flight to one (scheme, host, port).
+        timeout (float): limit for each request, from connecting to the end of the body, in seconds.
+        ssl_context (ssl.SSLContext): for https URLs, `ssl.create_default_context()` by default.
+        body_sink (callable): (url, user_agent) -> object with an `update(bytes)` method. Each body
+                              is streamed into a new sink instead of being kept, and the sink is
+                              the `body` of the result.
+
+    Yields:
+        FetchResult: the outcome of each URL, failures included.
+
+    Raises:
+        Exception: what iterating urls raised, once the results already queued were yielded.
+    """
+    pick = _user_agent_picker(ua_policy)
+    pool = _ConnectionPool(ssl_context or ssl.create_default_context())
+    host_limits = {}
+    global_limit = asyncio.Semaphore(max(1, concurrency))
+    read_ahead = asyncio.Semaphore(max(1, concurrency) * READ_AHEAD)
+    results = asyncio.Queue()
+    tasks = set()
+    done = object()
+    failure = []
+
+    async def fetch(url):
+        user_agent = None
+        if isinstance(url, tuple):
+            url, user_agent = url
+        start = time.perf_counter()
+        try:
+            user_agent = user_agent or pick(url)
+            key = _host_key(urlsplit(url))
+            limit = host_limits.get(key)
+            if limit is None:
+                limit = host_limits[key] = asyncio.Semaphore(per_host)
+            sink = None if body_sink is None else body_sink(url, user_agent)
+            async with limit, global_limit:
+                start = time.perf_counter()
+                async with asyncio.timeout(timeout):
+                    status, headers, body = await _request(pool, url, user_agent, sink)
+            return FetchResult(url, status, headers, body, user_agent, time.perf_counter() - start, None)
+        except Exception as e:
+            return FetchResult(url, None, None, None, user_agent, time.perf_counter() - start, e)
+
+    async def run(url):
+        # The read-ahead slot is given back when the result is taken off the queue.
+        results.put_nowait(await fetch(url))
+
+    async def feed():
+        try:
+            for url in urls:
+                await read_ahead.acquire()
+                task = asyncio.create_task(run(url))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            while tasks:
+                await asyncio.wait(set(tasks))
+        except Exception as e:
+            failure.append(e)
+        finally:
+            results.put_nowait(done)
+
+    feeder = asyncio.create_task(feed())
+    try:
+        while (result := await results.get()) is not done:
+            read_ahead.release()
+            yield result
+        if failure:
+            raise failure[0]
+    finally:
+        feeder.cancel()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(feeder, *tasks, return_exceptions=True)
+        pool.close()
+
+
+def fetch_all(urls, **kwargs):
+    """
+    Run `fetch_many` to completion from synchronous code.
+
+    Returns:
+        list[FetchResult]: in completion order.
+    """
+    async def collect():
+        return [result async for result in fetch_many(urls, **kwargs)]
+    return asyncio.run(collect())
@@ -0,0 +1,251 @@
+"""
+httpcache.py
+
+This module caches HTTP responses per (URL, User-Agent class, Vary-selected request headers):
+- `ResponseCache` keeps entries in an in-memory LRU bounded by their total size, and
+  optionally in a directory so they survive the process
+- stored entries are revalidated with If-None-Match / If-Modified-Since, so an unchanged
+  resource costs a 304 instead of a full transfer; entries still fresh per
+  Cache-Control max-age are served without any request
+- `stats()` reports hits, misses, revalidations and evictions
+
+The cache only stores and looks up entries, `spoof_useragent.UserAgentClient` drives it.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+CacheEntry = namedtuple("CacheEntry", ["url", "status", "headers", "body", "vary", "stored_at"])
+CacheEntry.__doc__ = """
+One stored response. headers is a dict, vary the request header names (lowercase) the
+response varies on, stored_at a `time.time()` value.
+"""
+
+# Fixed cost counted for each entry on top of its body, for the size bound.
+ENTRY_OVERHEAD = 512
+MOBILE_MARKERS = ("Mobile", "Android", "iPhone", "iPod", "Windows Phone")
+
+
+def default_ua_class(user_agent):
+    """Split User-Agents into "mobile" and "desktop", the classes the cache is keyed on by default."""
+    if user_agent and any(marker in user_agent for marker in MOBILE_MARKERS):
+        return "mobile"
+    return "desktop"
+
+
+def _header(headers, name):
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _directives(headers):
+    directives = {}
+    for part in (_header(headers, "cache-control") or "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"')
+    return directives
+
+
+class ResponseCache:
+    """
+    LRU cache of HTTP responses, bounded by size, with an optional on-disk store.
+
+    Args:
+        max_bytes (int): total size kept in memory (bodies plus ENTRY_OVERHEAD each).
+        directory (str | None): also store entries there, one file each, and read them back
+                                on an in-memory miss.
+        ua_class (callable): User-Agent -> class name, part of the key (see `default_ua_class`).
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, directory=None, ua_class=default_ua_class):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.ua_class = ua_class
+        self._entries = OrderedDict()
+        self._vary = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _base(self, url, user_agent):
+        return url, self.ua_class(user_agent)
+
+    def _key(self, base, vary, request_headers):
+        # User-Agent is already represented by its class.
+        return base + tuple((name, _header(request_headers, name)) for name in vary if name != "user-agent")
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(json.dumps(key).encode()).hexdigest())
+
+    def lookup(self, url, user_agent, request_headers=None):
+        """
+        Returns:
+            CacheEntry: the stored response for this URL, User-Agent class and request headers, or None.
+        """
+        request_headers = request_headers or {}
+        base = self._base(url, user_agent)
+        with self._lock:
+            vary = self._vary.get(base, ())
+            key = self._key(base, vary, request_headers)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if self.directory is None:
+            return None
+        entry = self._load(key)
+        if entry is None and not vary:
+            # The Vary of this URL is not known yet in this process: it is stored on disk under the base key.
+            entry = self._load(base + ("vary",))
+            if entry is not None and entry.vary:
+                entry = self._load(self._key(base, entry.vary, request_headers))
+        if entry is not None:
+            with self._lock:
+                self._vary[base] = entry.vary
+                self._insert(self._key(base, entry.vary, request_headers), entry)
+        return entry
+
+    def is_fresh(self, entry, now=None):
+        """True if the entry is younger than its Cache-Control max-age (no request needed)."""
+        directives = _directives(entry.headers)
+        if "no-cache" in directives:
+            return False
+        try:
+            max_age = int(directives["max-age"])
+        except (KeyError, ValueError):
+            return False
+        return (now or time.time()) - entry.stored_at < max_age
+
+    def conditional_headers(self, entry):
+        """The If-None-Match / If-Modified-Since headers revalidating entry."""
+        headers = {}
+        etag = _header(entry.headers, "etag")
+        if etag:
+            headers["If-None-Match"] = etag
+        last_modified = _header(entry.headers, "last-modified")
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def store(self, url, user_agent, request_headers, status, headers, body):
+        """
+        Store a 200 response unless it forbids it (no-store, Vary: *) or has no validator
+        nor max-age, since it could never be reused without a full transfer.
+
+        Returns:
+            CacheEntry: the stored entry, or None.
+        """
+        headers = dict(headers)
+        directives = _directives(headers)
+        vary = tuple(sorted({name.strip().lower() for name in (_header(headers, "vary") or "").split(",")
+                             if name.strip()}))
+        reusable = _header(headers, "etag") or _header(headers, "last-modified") or "max-age" in directives
+        if status != 200 or "no-store" in directives or "*" in vary or not reusable:
+            return None
+        if len(body) + ENTRY_OVERHEAD > self.max_bytes:
+            return None
+        base = self._base(url, user_agent)
+        entry = CacheEntry(url, status, headers, body, vary, time.time())
+        key = self._key(base, vary, request_headers or {})
+        with self._lock:
+            self._vary[base] = vary
+            self._insert(key, entry)
+        if self.directory is not None:
+            self._save(key, entry)
+            if vary:
+                self._save(base + ("vary",), entry._replace(body=b""))
+        return entry
+
+    def refresh(self, entry, url, user_agent, request_headers, headers):
+        """
+        Record a 304 for entry: merge the new headers and restart its freshness.
+
+        Returns:
+            CacheEntry: the updated entry.
+        """
+        merged = dict(entry.headers)
+        for name, value in headers.items():
+            if name.lower() not in ("content-length", "transfer-encoding", "content-encoding"):
+                merged[name] = value
+        entry = entry._replace(headers=merged, stored_at=time.time())
+        key = self._key(self._base(url, user_agent), entry.vary, request_headers or {})
+        with self._lock:
+            self.revalidations += 1
+            self._insert(key, entry)
+        if self.directory is not None:
+            self._save(key, entry)
+        return entry
+
+    def count_hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def count_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def _insert(self, key, entry):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= len(old.body) + ENTRY_OVERHEAD
+        self._entries[key] = entry
+        self._size += len(entry.body) + ENTRY_OVERHEAD
+        while self._size > self.max_bytes:
+            _key, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted.body) + ENTRY_OVERHEAD
+            self.evictions += 1
+
+    def _save(self, key, entry):
+        meta = {"url": entry.url, "status": entry.status, "headers": entry.headers, "vary": entry.vary,
+                "stored_at": entry.stored_at}
+        path = self._path(key)
+        with open(path + ".tmp", "wb") as file:
+            file.write(json.dumps(meta).encode() + b"\n")
+            file.write(entry.body)
+        os.replace(path + ".tmp", path)
+
+    def _load(self, key):
+        try:
+            with open(self._path(key), "rb") as file:
+                meta = json.loads(file.readline())
+                body = file.read()
+        except (OSError, ValueError):
+            return None
+        return CacheEntry(meta["url"], meta["status"], meta["headers"], body, tuple(meta["vary"]), meta["stored_at"])
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        """Bytes currently accounted in memory."""
+        return self._size
+
+    def stats(self):
+        """
+        Returns:
+            dict: hits (served without a transfer: fresh or revalidated), misses (full transfers),
+                  revalidations (304 answers), evictions, entries and bytes in memory.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "revalidations": self.revalidations,
+                    "evictions": self.evictions, "entries": len(self._entries), "bytes": self._size}
+
+    def clear(self):
+        """Forget every in-memory entry (the on-disk store is kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._vary.clear()
+            self._size = 0
@@ -0,0 +1,148 @@
+"""
+httpconn.py
+
+This module provides the urllib3 connections behind `spoof_useragent.UserAgentClient`:
+- `TracedHTTPConnection` / `TracedHTTPSConnection` resolve the host and connect as two
+  separate steps, so the "dns", "connect" and "tls" phases of a new connection are timed
+  (see instrument.py); while instrumentation is disabled they behave exactly like the
+  urllib3 connections they extend
+- with a `dnscache.DnsCache`, that resolution step goes through the cache instead of
+  calling getaddrinfo() for every new connection
+- `TracedAdapter` is the requests `HTTPAdapter` whose pools open those connections
+"""
+
+import socket
+import time
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util.timeout import _DEFAULT_TIMEOUT
+try:
+    from . import instrument
+except ImportError:
+    import instrument
+
+
+class _TracedConnection:
+    """Mixin timing name resolution and the TCP connection of urllib3 connections."""
+
+    # Seconds spent in dns + connect by the last _new_conn, for the TLS time of HTTPS connections.
+    _setup = 0.0
+    # The DnsCache resolving the host, set by the pool (see TracedAdapter).
+    dns_cache = None
+
+    def _new_conn(self):
+        collector = instrument.collector
+        if collector is None:
+            if self.dns_cache is None:
+                return super()._new_conn()
+            return self._connect(self._resolve())
+        start = time.perf_counter()
+        try:
+            addresses = self._resolve()
+        finally:
+            dns = time.perf_counter() - start
+            collector.observe("http", "dns", dns, host=self.host)
+        start = time.perf_counter()
+        try:
+            sock = self._connect(addresses)
+        finally:
+            connect = time.perf_counter() - start
+            collector.observe("http", "connect", connect, host=self.host)
+        self._setup = dns + connect
+        return sock
+
+    def _resolve(self):
+        try:
+            if self.dns_cache is not None:
+                return self.dns_cache.resolve(self._dns_host, self.port)
+            return socket.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+
+    def _connect(self, addresses):
+        """
+        Connect to the first address of getaddrinfo() accepting it, like urllib3 does, with the
+        whole socket address: the scope of a link-local IPv6 address (fe80::1%eth0) is kept.
+        """
+        error = None
+        for family, type_, proto, _name, address in addresses:
+            sock = socket.socket(family, type_, proto)
+            try:
+                for option in self.socket_options or ():
+                    sock.setsockopt(*option)
+                if self.timeout is not _DEFAULT_TIMEOUT:
+                    sock.settimeout(self.timeout)
+                if self.source_address:
+                    sock.bind(self.source_address)
+                sock.connect(address)
+                return sock
+            except OSError as e:
+                sock.close()
+                error = e
+        if isinstance(error, TimeoutError):
+            raise ConnectTimeoutError(
+                self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})") from error
+        raise NewConnectionError(self, f"Failed to establish a new connection: {error}") from error
+
+
+class TracedHTTPConnection(_TracedConnection, HTTPConnection):
+    pass
+
+
+class TracedHTTPSConnection(_TracedConnection, HTTPSConnection):
+
+    def connect(self):
+        collector = instrument.collector
+        if collector is None:
+            return super().connect()
+        self._setup = 0.0
+        start = time.perf_counter()
+        super().connect()
+        collector.observe("http", "tls", time.perf_counter() - start - self._setup, host=self.host)
+
+
+class _TracedPool:
+    """Mixin handing the DnsCache of the pool to the connections it opens."""
+
+    dns_cache = None
+
+    def _new_conn(self):
+        conn = super()._new_conn()
+        conn.dns_cache = self.dns_cache
+        return conn
+
+
+class TracedHTTPConnectionPool(_TracedPool, HTTPConnectionPool):
+    ConnectionCls = TracedHTTPConnection
+
+
+class TracedHTTPSConnectionPool(_TracedPool, HTTPSConnectionPool):
+    ConnectionCls = TracedHTTPSConnection
+
+
+class TracedAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connection pools open Traced connections.
+
+    Args:
+        dns_cache (dnscache.DnsCache | None): resolve the hosts of new connections through it.
+        *args, **kwargs: passed to HTTPAdapter.
+    """
+
+    # Set before HTTPAdapter.__init__, which builds the pool manager.
+    dns_cache = None
+
+    def __init__(self, *args, dns_cache=None, **kwargs):
+        self.dns_cache = dns_cache
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        pools = {"http": TracedHTTPConnectionPool, "https": TracedHTTPSConnectionPool}
+        if self.dns_cache is not None:
+            # Pool managers create pools from a class and context keys alone, so the cache is bound to subclasses.
+            pools = {scheme: type(pool.__name__, (pool,), {"dns_cache": self.dns_cache})
+                     for scheme, pool in pools.items()}
+        self.poolmanager.pool_classes_by_scheme = pools
@@ -0,0 +1,217 @@
+"""
+ifparse.py
+
+This module parses the interface listings of the system tools in one linear scan:
+- `ifconfig -a` (net-tools, old net-tools and BSD/macOS layouts)
+- `ip link` / `ip -o link` (iproute2)
+- `ipconfig` / `ipconfig /all` (Windows)
+
+Every pattern is compiled once at import. Each parser takes the output line by line
+through `feed()`, so it can consume a subprocess pipe while the command is still
+writing (see `run_and_parse`), and `close()` returns the parsed `Interface` list.
+"""
+
+import re
+import subprocess
+from collections import namedtuple
+
+Interface = namedtuple("Interface", ["name", "mac", "index", "flags", "mtu", "description"],
+                       defaults=(None, None, None, None))
+Interface.__doc__ = """One interface of a snapshot, fields the source does not report are None."""
+
+IFCONFIG_HEADER = re.compile(r'(\S+?):?\s+(?:flags=([0-9a-fA-F]+)<[^>]*>(?:\s+mtu\s+(\d+))?|Link encap)')
+IFCONFIG_ETHER = re.compile(r'\b(?:ether|HWaddr|lladdr)\s+([0-9a-fA-F]{2}(?::[0-9a-fA-F]{2}){5})')
+IFCONFIG_MTU = re.compile(r'\bMTU:(\d+)')
+IP_LINK_HEADER = re.compile(r'(\d+):\s+([^:@\s]+)(?:@\S+)?:\s+<([^>]*)>.*?\bmtu\s+(\d+)')
+IP_LINK_ADDRESS = re.compile(r'\blink/\S+\s+([0-9a-f]{2}(?::[0-9a-f]{2}){5})\b')
+IPCONFIG_HEADER = re.compile(r'[^:]*? adapter ([^:]+):')
+IPCONFIG_FIELD = re.compile(r'\s+([^.:]+?)[ .]*: ?(.*)')
+
+# Kernel IFF_* values of the flag names printed by `ip link`.
+IP_LINK_FLAGS = {
+    "UP": 0x1, "BROADCAST": 0x2, "DEBUG": 0x4, "LOOPBACK": 0x8, "POINTOPOINT": 0x10,
+    "NOTRAILERS": 0x20, "RUNNING": 0x40, "NOARP": 0x80, "PROMISC": 0x100, "ALLMULTI": 0x200,
+    "MASTER": 0x400, "SLAVE": 0x800, "MULTICAST": 0x1000, "PORTSEL": 0x2000, "AUTOMEDIA": 0x4000,
+    "DYNAMIC": 0x8000, "LOWER_UP": 0x10000, "DORMANT": 0x20000, "ECHO": 0x40000,
+}
+
+
+class IfconfigParser:
+    """
+    Incremental parser for `ifconfig -a`.
+
+    Args:
+        hex_flags (bool): macOS prints the flags in hexadecimal, Linux in decimal.
+    """
+
+    def __init__(self, hex_flags=False):
+        self._base = 16 if hex_flags else 10
+        self._interfaces = []
+        self._current = None
+
+    def feed(self, line):
+        """Consume one line of output (with or without its newline)."""
+        if line[:1] not in ("", " ", "\t", "\n"):
+            header = IFCONFIG_HEADER.match(line)
+            if header:
+                self._flush()
+                flags, mtu = header.group(2), header.group(3)
+                self._current = {
+                    "name": header.group(1),
+                    "mac": None,
+                    "flags": int(flags, self._base) if flags else None,
+                    "mtu": int(mtu) if mtu else None,
+                }
+        current = self._current
+        if current is None:
+            return
+        if current["mac"] is None and ("ether" in line or "HWaddr" in line or "lladdr" in line):
+            ether = IFCONFIG_ETHER.search(line)
+            if ether:
+                current["mac"] = ether.group(1).lower()
+        if current["mtu"] is None and "MTU:" in line:
+            mtu = IFCONFIG_MTU.search(line)
+            if mtu:
+                current["mtu"] = int(mtu.group(1))
+
+    def _flush(self):
+        if self._current is not None:
+            self._interfaces.append(Interface(**self._current))
+            self._current = None
+
+    def close(self):
+        """Finish the last interface and return every parsed Interface."""
+        self._flush()
+        return self._interfaces
+
+
+class IpLinkParser:
+    """Incremental parser for `ip link` and `ip -o link` (one or two lines per interface)."""
+
+    def __init__(self):
+        self._interfaces = []
+        self._current = None
+
+    def feed(self, line):
+        """Consume one line of output (with or without its newline)."""
+        if line[:1].isdigit():
+            header = IP_LINK_HEADER.match(line)
+            if header:
+                self._flush()
+                flags = 0
+                for name in header.group(3).split(","):
+                    flags |= IP_LINK_FLAGS.get(name, 0)
+                self._current = {
+                    "name": header.group(2),
+                    "mac": None,
+                    "index": int(header.group(1)),
+                    "flags": flags,
+                    "mtu": int(header.group(4)),
+                }
+        if self._current is not None and self._current["mac"] is None and "link/" in line:
+            address = IP_LINK_ADDRESS.search(line)
+            if address:
+                self._current["mac"] = address.group(1)
+
+    def _flush(self):
+        if self._current is not None:
+            self._interfaces.append(Interface(**self._current))
+            self._current = None
+
+    def close(self):
+        """Finish the last interface and return every parsed Interface."""
+        self._flush()
+        return self._interfaces
+
+
+class IpconfigParser:
+    """
+    Incremental parser for `ipconfig` and `ipconfig /all`.
+
+    Adapters are named after their header line ("Ethernet adapter Ethernet:" -> "Ethernet"),
+    the Description field is kept as the interface description.
+    """
+
+    def __init__(self):
+        self._interfaces = []
+        self._current = None
+
+    def feed(self, line):
+        """Consume one line of output (with or without its newline)."""
+        stripped = line.strip()
+        if stripped.endswith(":") and " adapter " in stripped:
+            header = IPCONFIG_HEADER.fullmatch(stripped)
+            if header:
+                self._flush()
+                self._current = {"name": header.group(1), "mac": None, "description": None}
+                return
+        current = self._current
+        if current is None:
+            return
+        if "Physical Address" in line or "Description" in line:
+            field = IPCONFIG_FIELD.match(line)
+            if field:
+                key, value = field.group(1), field.group(2).strip()
+                if key == "Physical Address":
+                    current["mac"] = value
+                elif key == "Description":
+                    current["description"] = value
+
+    def _flush(self):
+        if self._current is not None:
+            self._interfaces.append(Interface(**self._current))
+            self._current = None
+
+    def close(self):
+        """Finish the last adapter and return every parsed Interface."""
+        self._flush()
+        return self._interfaces
+
+
+def parse_lines(lines, parser):
+    """
+    Feed every line of an iterable (a list, a file, a pipe...) to parser.
+
+    Returns:
+        list[Interface]: what parser.close() returns.
+    """
+    feed = parser.feed
+    for line in lines:
+        feed(line)
+    return parser.close()
+
+
+def parse_ifconfig(output, hex_flags=False):
+    """Parse a whole `ifconfig -a` output, see `IfconfigParser`."""
+    return parse_lines(output.splitlines(), IfconfigParser(hex_flags))
+
+
+def parse_ip_link(output):
+    """Parse a whole `ip link` / `ip -o link` output, see `IpLinkParser`."""
+    return parse_lines(output.splitlines(), IpLinkParser())
+
+
+def parse_ipconfig(output):
+    """Parse a whole `ipconfig` / `ipconfig /all` output, see `IpconfigParser`."""
+    return parse_lines(output.splitlines(), IpconfigParser())
+
+
+def run_and_parse(args, parser):
+    """
+    Run a command and parse its output while it streams out of the pipe.
+
+    Args:
+        args (list[str]): the command, e.g. ['ip', '-o', 'link'].
+        parser: an IfconfigParser, IpLinkParser or IpconfigParser.
+
+    Returns:
+        list[Interface]: the parsed interfaces.
+
+    Raises:
+        subprocess.CalledProcessError: if the command exits with a non-zero status.
+    """
+    with subprocess.Popen(args, stdout=subprocess.PIPE, text=True, errors='ignore') as process:
+        interfaces = parse_lines(process.stdout, parser)
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, args)
+    return interfaces
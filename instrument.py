@@ -0,0 +1,236 @@
+"""
+instrument.py
+
+This module times the phases of the slow operations of the tool:
+- `Collector` aggregates phase durations in histograms and passes each one, as an
+  `Event`, to the hooks registered with `add_hook()`
+- `enable()` installs a process-wide collector, `disable()` removes it; while none is
+  installed the instrumented code only checks `instrument.collector is None`
+- histograms export to the Prometheus text format (`to_prometheus()`) or to JSON (`to_json()`)
+
+Instrumented operations and their phases:
+- "change_mac": read, live, down, set, up, verify (spoof_mac.change_mac and change_macs)
+- "http": dns, connect, tls, ttfb, body (spoof_useragent.UserAgentClient and fetch.fetch_many)
+"""
+
+import bisect
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager, nullcontext
+
+Event = namedtuple("Event", ["name", "phase", "duration", "labels", "timestamp"])
+Event.__doc__ = """
+One timed phase: duration in seconds (monotonic clock), labels a dict such as
+{"interface": "eth0"} or {"host": "example.com"}, timestamp the `time.time()` of its end.
+"""
+
+# Upper bounds in seconds, from 100 us to 30 s.
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0, 30.0)
+
+# The installed Collector, None when instrumentation is disabled.
+collector = None
+_NULL_SPAN = nullcontext()
+
+
+class Histogram:
+    """
+    Count, sum, min, max and bucket counts of observed durations.
+
+    Args:
+        buckets (tuple[float]): increasing upper bounds, an implicit +Inf bucket is added.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def cumulative(self):
+        """
+        Returns:
+            list[tuple]: (upper bound, observations at or below it), ending with (inf, count).
+        """
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class Collector:
+    """
+    Aggregates phase durations per (operation, phase) and forwards them to hooks.
+
+    Hooks are called synchronously, in the thread of the timed operation, with one Event
+    per phase; an exception raised by a hook is logged and otherwise ignored.
+
+    Args:
+        buckets (tuple[float]): histogram upper bounds in seconds.
+        hooks (iterable[callable]): initial hooks.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, hooks=()):
+        self.buckets = tuple(buckets)
+        self.hooks = list(hooks)
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def add_hook(self, hook):
+        """Call hook(event) for every phase observed from now on."""
+        self.hooks.append(hook)
+        return hook
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def observe(self, name, phase, duration, **labels):
+        """Record one phase of an operation, see `Event`."""
+        with self._lock:
+            histogram = self._histograms.get((name, phase))
+            if histogram is None:
+                histogram = self._histograms[name, phase] = Histogram(self.buckets)
+            histogram.observe(duration)
+        trace = getattr(self._local, "trace", None)
+        if trace is not None:
+            trace[phase] = trace.get(phase, 0.0) + duration
+        if self.hooks:
+            event = Event(name, phase, duration, labels, time.time())
+            for hook in list(self.hooks):
+                try:
+                    hook(event)
+                except Exception:
+                    import logging
+                    logging.getLogger(__name__).exception("instrumentation hook %r failed", hook)
+
+    @contextmanager
+    def span(self, name, phase, **labels):
+        """Time the body of a with statement as one phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, phase, time.perf_counter() - start, **labels)
+
+    @contextmanager
+    def trace(self):
+        """
+        Collect the phases observed by this thread during the with statement.
+
+        Yields:
+            dict: phase -> total duration, filled as the phases are observed.
+        """
+        previous = getattr(self._local, "trace", None)
+        self._local.trace = phases = {}
+        try:
+            yield phases
+        finally:
+            self._local.trace = previous
+
+    def histogram(self, name, phase):
+        """The Histogram of one phase, None if it was never observed."""
+        return self._histograms.get((name, phase))
+
+    def to_json(self):
+        """
+        Returns:
+            dict: operation -> phase -> {"count", "sum", "min", "max", "buckets"}, buckets
+                  mapping each upper bound (as a string, "+Inf" last) to its cumulative count.
+        """
+        result = {}
+        with self._lock:
+            for (name, phase), histogram in sorted(self._histograms.items()):
+                result.setdefault(name, {})[phase] = {
+                    "count": histogram.count, "sum": histogram.sum, "min": histogram.min, "max": histogram.max,
+                    "buckets": {_bound(bound): count for bound, count in histogram.cumulative()},
+                }
+        return result
+
+    def to_prometheus(self, prefix="spoof_tool"):
+        """
+        Returns:
+            str: one histogram metric per operation, `<prefix>_<operation>_phase_seconds`,
+                 with the phase as a label, in the Prometheus text exposition format.
+        """
+        lines = []
+        for name, phases in self.to_json().items():
+            metric = f"{prefix}_{name}_phase_seconds"
+            lines.append(f"# HELP {metric} Duration of the {name} phases in seconds.")
+            lines.append(f"# TYPE {metric} histogram")
+            for phase, data in phases.items():
+                for bound, count in data["buckets"].items():
+                    lines.append(f'{metric}_bucket{{phase="{phase}",le="{bound}"}} {count}')
+                lines.append(f'{metric}_sum{{phase="{phase}"}} {data["sum"]!r}')
+                lines.append(f'{metric}_count{{phase="{phase}"}} {data["count"]}')
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def reset(self):
+        """Forget every histogram (hooks are kept)."""
+        with self._lock:
+            self._histograms.clear()
+
+
+def _bound(bound):
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+def enable(new_collector=None, **kwargs):
+    """
+    Install a process-wide collector.
+
+    Args:
+        new_collector (Collector): the collector to install, a new one built from kwargs by default.
+
+    Returns:
+        Collector: the installed collector.
+    """
+    global collector
+    collector = new_collector or Collector(**kwargs)
+    return collector
+
+
+def disable():
+    """Remove the installed collector, instrumented code goes back to untimed paths."""
+    global collector
+    collector = None
+
+
+def span(name, phase, **labels):
+    """
+    Time the body of a with statement as one phase with the installed collector, or do
+    nothing when instrumentation is disabled.
+    """
+    if collector is None:
+        return _NULL_SPAN
+    return collector.span(name, phase, **labels)
+
+
+def logging_hook(logger=None, level=None):
+    """
+    Args:
+        logger (logging.Logger): where to log, the logger of this module by default.
+        level (int): logging level, DEBUG by default.
+
+    Returns:
+        callable: a hook logging every event as "operation phase duration labels".
+    """
+    import logging
+    logger = logger or logging.getLogger(__name__)
+    level = logging.DEBUG if level is None else level
+
+    def hook(event):
+        logger.log(level, "%s %s %.6fs %s", event.name, event.phase, event.duration, event.labels)
+    return hook
@@ -0,0 +1,190 @@
+"""
+interfaces.py
+
+This module builds a snapshot of every network interface of the host in one pass:
+- One rtnetlink dump on Linux
+- /sys/class/net when netlink is not usable
+- One `ifconfig -a` (unix/macOS) or `ipconfig /all` (Windows) otherwise
+
+The snapshot is an `InterfaceTable`, so looking up many interfaces costs one
+sweep instead of one process spawn per interface.
+"""
+
+import os
+import subprocess
+try:
+    from . import netlink
+    from .ifparse import Interface, parse_ifconfig, parse_ip_link, parse_ipconfig
+except ImportError:
+    import netlink
+    from ifparse import Interface, parse_ifconfig, parse_ip_link, parse_ipconfig
+
+SYSFS_NET = "/sys/class/net"
+
+
+class InterfaceTable:
+    """
+    A read-only snapshot of the host interfaces, keyed by interface name.
+
+    It behaves like a dict of name -> Interface, plus `mac()` and `find()` helpers.
+    The snapshot never refreshes itself: build a new one to see later changes.
+    """
+
+    def __init__(self, interfaces):
+        self._by_name = {interface.name: interface for interface in interfaces}
+
+    def __len__(self):
+        return len(self._by_name)
+
+    def __iter__(self):
+        return iter(self._by_name)
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def __getitem__(self, name):
+        return self._by_name[name]
+
+    def __repr__(self):
+        return f"InterfaceTable({list(self._by_name.values())!r})"
+
+    def get(self, name, default=None):
+        return self._by_name.get(name, default)
+
+    def values(self):
+        return self._by_name.values()
+
+    def items(self):
+        return self._by_name.items()
+
+    def macs(self):
+        """
+        Returns:
+            dict: interface name -> MAC address (None for links without one).
+        """
+        return {name: interface.mac for name, interface in self._by_name.items()}
+
+    def find(self, text):
+        """
+        Find an interface by exact name, else by a case-sensitive substring of its
+        name or description (what `get_current_mac` always did on Windows).
+
+        Returns:
+            Interface: the first match, or None.
+        """
+        interface = self._by_name.get(text)
+        if interface is not None:
+            return interface
+        for interface in self._by_name.values():
+            if text in interface.name or (interface.description and text in interface.description):
+                return interface
+        return None
+
+    def mac(self, name):
+        """
+        Returns:
+            str: the MAC address of the interface, or None if unknown or without address.
+        """
+        interface = self.find(name)
+        return interface.mac if interface is not None else None
+
+    @classmethod
+    def from_netlink(cls, nl=None):
+        """
+        Build the snapshot from a single RTM_GETLINK dump.
+
+        Args:
+            nl (netlink.NetlinkSocket): socket to reuse, a temporary one is opened if None.
+        """
+        if nl is None:
+            with netlink.NetlinkSocket() as nl:
+                links = nl.dump_links()
+        else:
+            links = nl.dump_links()
+        return cls(Interface(link.name, netlink.bytes_to_mac(link.address), link.index, link.flags, link.mtu)
+                   for link in links)
+
+    @classmethod
+    def from_sysfs(cls, root=SYSFS_NET):
+        """
+        Build the snapshot from /sys/class/net/<name>/{address,ifindex,flags,mtu}.
+
+        Args:
+            root (str): sysfs directory, overridable for tests.
+        """
+        interfaces = []
+        for name in sorted(os.listdir(root)):
+            values = {}
+            for field in ("address", "ifindex", "flags", "mtu"):
+                try:
+                    with open(os.path.join(root, name, field)) as f:
+                        values[field] = f.read().strip()
+                except OSError:
+                    values[field] = None
+            interfaces.append(Interface(
+                name=name,
+                mac=values["address"] or None,
+                index=int(values["ifindex"]) if values["ifindex"] else None,
+                flags=int(values["flags"], 16) if values["flags"] else None,
+                mtu=int(values["mtu"]) if values["mtu"] else None,
+            ))
+        return cls(interfaces)
+
+    @classmethod
+    def from_ifconfig(cls, output, hex_flags=False):
+        """
+        Build the snapshot from the output of `ifconfig -a`.
+
+        Both the BSD/macOS and the net-tools layouts are understood, see `ifparse`.
+
+        Args:
+            output (str): the command output.
+            hex_flags (bool): macOS prints the flags in hexadecimal, Linux in decimal.
+        """
+        return cls(parse_ifconfig(output, hex_flags))
+
+    @classmethod
+    def from_ip_link(cls, output):
+        """Build the snapshot from the output of `ip link` or `ip -o link`."""
+        return cls(parse_ip_link(output))
+
+    @classmethod
+    def from_ipconfig(cls, output):
+        """
+        Build the snapshot from the output of `ipconfig` or `ipconfig /all`.
+
+        Adapters are named after their header line ("Ethernet adapter Ethernet:" -> "Ethernet"),
+        the Description field is kept so `find()` can match on it.
+        """
+        return cls(parse_ipconfig(output))
+
+
+def snapshot(operating_system="unix", use_netlink=None):
+    """
+    Take a snapshot of every interface with the cheapest source the OS offers.
+
+    Args:
+        operating_system (str): "unix", "macos" or "windows" (case-insensitive).
+        use_netlink (bool): force netlink on or off on unix, None to use it when available.
+
+    Returns:
+        InterfaceTable: the snapshot.
+
+    Raises:
+        OSError, subprocess.CalledProcessError: when the source cannot be read.
+        ValueError: for an unsupported operating system.
+    """
+    os_name = operating_system.lower()
+    if os_name == "windows":
+        return InterfaceTable.from_ipconfig(subprocess.check_output(['ipconfig', '/all']).decode(errors='ignore'))
+    if os_name not in ("unix", "macos"):
+        raise ValueError(f"unsupported operating system: {operating_system}")
+    if os_name == "unix":
+        if use_netlink is None:
+            use_netlink = netlink.is_available()
+        if use_netlink:
+            return InterfaceTable.from_netlink()
+        if os.path.isdir(SYSFS_NET):
+            return InterfaceTable.from_sysfs()
+    output = subprocess.check_output(['ifconfig', '-a']).decode(errors='ignore')
+    return InterfaceTable.from_ifconfig(output, hex_flags=os_name == "macos")
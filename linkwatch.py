@@ -0,0 +1,233 @@
+"""
+linkwatch.py
+
+This module keeps an always-current, in-memory view of the host interfaces by
+listening to the kernel's RTNLGRP_LINK notifications (Linux only):
+- `get()` / `table()` read the cached state without any syscall
+- `wait_for()` blocks until an interface reaches a given address / state, or times out
+- `downtime()` reports how long the last down -> up cycle of an interface lasted,
+  timed on the notifications themselves
+- an error that stops the thread is kept in `error` and raised again by every read, so a
+  dead watcher never serves a stale cache
+
+It replaces re-polling `ifconfig` after a change: `spoof_mac` changes the link and
+waits on the watcher for "address == new MAC and link UP".
+"""
+
+import errno
+import socket
+import threading
+import time
+try:
+    from . import netlink
+    from .interfaces import Interface, InterfaceTable
+except ImportError:
+    import netlink
+    from interfaces import Interface, InterfaceTable
+
+RTM_DELLINK = 17
+RTMGRP_LINK = 0x1
+
+
+class LinkWatcher:
+    """
+    A background thread mirroring every link of the network namespace it was created in.
+
+    Start it with `start()` or as a context manager, stop it with `close()`. The cache is
+    filled with one RTM_GETLINK dump after subscribing, so no notification is lost in between.
+
+    Args:
+        poll_interval (float): how often the thread checks for `close()`, in seconds.
+
+    Attributes:
+        error (Exception): what stopped the thread, None while it runs. `get`, `get_mac`,
+                           `table`, `wait_for` and `downtime` raise it again.
+    """
+
+    def __init__(self, poll_interval=0.1):
+        self._poll_interval = poll_interval
+        self._links = {}
+        self._names = {}
+        self._down_at = {}
+        self._cycles = {}
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        self._sock = None
+        self.error = None
+
+    def start(self):
+        """Subscribe to link notifications, load the current state and start the thread."""
+        self._sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, netlink.NETLINK_ROUTE)
+        self._sock.bind((0, RTMGRP_LINK))
+        self._sock.settimeout(self._poll_interval)
+        self._resync()
+        self._thread = threading.Thread(target=self._run, name="LinkWatcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Stop the thread and release the socket."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _resync(self):
+        with netlink.NetlinkSocket() as nl:
+            links = nl.dump_links()
+        now = time.perf_counter()
+        with self._condition:
+            self._links.clear()
+            self._names.clear()
+            for link in links:
+                self._update(link, now)
+            self._condition.notify_all()
+
+    def _update(self, link, now):
+        previous = self._links.get(link.name)
+        old_name = self._names.get(link.index)
+        if old_name is not None and old_name != link.name:
+            self._links.pop(old_name, None)
+        self._links[link.name] = link
+        self._names[link.index] = link.name
+        if previous is None:
+            return
+        was_up = previous.flags & netlink.IFF_UP
+        is_up = link.flags & netlink.IFF_UP
+        if was_up and not is_up:
+            self._down_at[link.name] = now
+        elif is_up and not was_up and link.name in self._down_at:
+            down_at = self._down_at.pop(link.name)
+            self._cycles[link.name] = (down_at, now)
+
+    def _remove(self, link):
+        name = self._names.pop(link.index, link.name)
+        self._links.pop(name, None)
+
+    def _run(self):
+        try:
+            self._listen()
+        except Exception as e:
+            with self._condition:
+                self.error = e
+                self._condition.notify_all()
+
+    def _check(self):
+        """Raise the error that stopped the thread, if any. Condition held."""
+        if self.error is not None:
+            raise self.error
+
+    def _listen(self):
+        while not self._stop.is_set():
+            try:
+                data = self._sock.recv(65536)
+            except socket.timeout:
+                continue
+            except OSError as e:
+                if e.errno == errno.ENOBUFS:
+                    # The kernel dropped notifications: start again from a fresh dump.
+                    self._resync()
+                    continue
+                if self._stop.is_set():
+                    return
+                raise
+            now = time.perf_counter()
+            with self._condition:
+                for msg_type, _flags, _seq, payload in netlink.iter_messages(data):
+                    if msg_type == netlink.RTM_NEWLINK:
+                        self._update(netlink.parse_link(payload), now)
+                    elif msg_type == RTM_DELLINK:
+                        self._remove(netlink.parse_link(payload))
+                self._condition.notify_all()
+
+    def get(self, interface):
+        """
+        Returns:
+            netlink.Link: the cached state of interface, or None if it does not exist.
+
+        Raises:
+            Exception: the error that stopped the thread, see `error`.
+        """
+        with self._condition:
+            self._check()
+            return self._links.get(interface)
+
+    def get_mac(self, interface):
+        """
+        Returns:
+            str: the cached MAC address as "xx:xx:xx:xx:xx:xx", or None.
+        """
+        link = self.get(interface)
+        return netlink.bytes_to_mac(link.address) if link is not None else None
+
+    def table(self):
+        """
+        Returns:
+            InterfaceTable: a snapshot of the cache.
+        """
+        with self._condition:
+            self._check()
+            links = list(self._links.values())
+        return InterfaceTable(Interface(link.name, netlink.bytes_to_mac(link.address), link.index, link.flags, link.mtu)
+                              for link in links)
+
+    def wait_for(self, interface, address=None, up=None, timeout=5.0):
+        """
+        Block until interface matches the expected state.
+
+        Args:
+            interface (str): The name of the network interface (e.g., "eth0").
+            address (str | bytes | Mac | None): expected hardware address, None for any.
+            up (bool | None): expected IFF_UP state, None for any.
+            timeout (float): maximum wait, in seconds.
+
+        Returns:
+            netlink.Link: the matching state, or None if the timeout expired first.
+
+        Raises:
+            Exception: the error that stopped the thread, also while waiting.
+        """
+        if address is not None and not isinstance(address, bytes):
+            address = netlink.mac_to_bytes(address) if isinstance(address, str) else bytes(address)
+
+        def matches():
+            self._check()
+            link = self._links.get(interface)
+            if link is None:
+                return None
+            if address is not None and link.address != address:
+                return None
+            if up is not None and bool(link.flags & netlink.IFF_UP) != up:
+                return None
+            return link
+
+        with self._condition:
+            return self._condition.wait_for(matches, timeout)
+
+    def downtime(self, interface, since=None):
+        """
+        How long the last down -> up cycle of interface lasted, from the notifications.
+
+        Args:
+            interface (str): The name of the network interface (e.g., "eth0").
+            since (float): ignore cycles that went down before this `time.perf_counter()` value.
+
+        Returns:
+            float: seconds between the down and the up notification, or None if no cycle was seen.
+        """
+        with self._condition:
+            self._check()
+            cycle = self._cycles.get(interface)
+        if cycle is None or (since is not None and cycle[0] < since):
+            return None
+        return cycle[1] - cycle[0]
@@ -0,0 +1,322 @@
+"""
+macaddr.py
+
+This module provides compact MAC address types:
+- `Mac`, one address stored as a 48-bit int, parsed from and formatted to the
+  colon (unix), hyphen (Windows), Cisco-dotted and bare notations
+- `MacArray`, an ordered list of addresses backed by array('Q')
+- `MacSet`, a sorted, duplicate-free set of addresses backed by array('Q')
+
+The containers store 8 bytes per address instead of one Python object each,
+so millions of addresses can be held and searched cheaply.
+"""
+
+import re
+from array import array
+from bisect import bisect_left
+
+_HEX12 = re.compile(r'[0-9A-Fa-f]{12}')
+_SEPARATED = re.compile(r'[0-9A-Fa-f]{2}([:-])[0-9A-Fa-f]{2}(?:\1[0-9A-Fa-f]{2}){4}')
+_CISCO = re.compile(r'[0-9A-Fa-f]{4}\.[0-9A-Fa-f]{4}\.[0-9A-Fa-f]{4}')
+_MAX = (1 << 48) - 1
+
+FORMATS = ("unix", "macos", "windows", "cisco", "bare")
+
+
+def parse_mac(text):
+    """
+    Parse a MAC address written in any supported notation.
+
+    Args:
+        text (str): "aa:bb:cc:dd:ee:ff", "AA-BB-CC-DD-EE-FF", "aabb.ccdd.eeff" or "aabbccddeeff".
+
+    Returns:
+        int: the address as a 48-bit integer.
+
+    Raises:
+        ValueError: if text is not a MAC address.
+    """
+    length = len(text)
+    if length == 17 and _SEPARATED.fullmatch(text):
+        return int(text[0:2] + text[3:5] + text[6:8] + text[9:11] + text[12:14] + text[15:17], 16)
+    if length == 14 and _CISCO.fullmatch(text):
+        return int(text[0:4] + text[5:9] + text[10:14], 16)
+    if length == 12 and _HEX12.fullmatch(text):
+        return int(text, 16)
+    raise ValueError(f"not a MAC address: {text!r}")
+
+
+def format_mac(value, fmt="unix"):
+    """
+    Format a 48-bit integer as a MAC address.
+
+    Args:
+        value (int): the address.
+        fmt (str): "unix"/"macos" (aa:bb:cc:dd:ee:ff), "windows" (AA-BB-CC-DD-EE-FF),
+                   "cisco" (aabb.ccdd.eeff) or "bare" (aabbccddeeff).
+
+    Returns:
+        str: the formatted address.
+    """
+    if fmt in ("unix", "macos"):
+        return value.to_bytes(6, "big").hex(":")
+    if fmt == "windows":
+        return value.to_bytes(6, "big").hex("-").upper()
+    if fmt == "cisco":
+        return value.to_bytes(6, "big").hex(".", 2)
+    if fmt == "bare":
+        return f"{value:012x}"
+    raise ValueError(f"unknown MAC format: {fmt!r}")
+
+
+def _as_int(mac):
+    if type(mac) is Mac:
+        return mac._value
+    if isinstance(mac, str):
+        return parse_mac(mac)
+    if isinstance(mac, int):
+        if not 0 <= mac <= _MAX:
+            raise ValueError(f"not a 48-bit MAC address: {mac!r}")
+        return mac
+    if isinstance(mac, (bytes, bytearray)) and len(mac) == 6:
+        return int.from_bytes(mac, "big")
+    raise TypeError(f"cannot make a MAC address out of {mac!r}")
+
+
+class Mac:
+    """
+    One MAC address, stored as a 48-bit int.
+
+    Build it from a string in any notation, an int, 6 raw bytes or another Mac.
+    Two Macs compare and hash like their integers, whatever notation they were
+    parsed from. str() gives the unix notation, `format()` the others.
+    """
+
+    __slots__ = ("_value",)
+
+    def __init__(self, mac):
+        self._value = _as_int(mac)
+
+    @classmethod
+    def _from_int(cls, value):
+        mac = object.__new__(cls)
+        mac._value = value
+        return mac
+
+    def __int__(self):
+        return self._value
+
+    def __bytes__(self):
+        return self._value.to_bytes(6, "big")
+
+    def __str__(self):
+        return format_mac(self._value)
+
+    def __repr__(self):
+        return f"Mac('{format_mac(self._value)}')"
+
+    def __format__(self, spec):
+        return format_mac(self._value, spec or "unix")
+
+    def format(self, fmt="unix"):
+        """Return the address in the given notation, see `format_mac`."""
+        return format_mac(self._value, fmt)
+
+    def __hash__(self):
+        return hash(self._value)
+
+    def __eq__(self, other):
+        if type(other) is Mac:
+            return self._value == other._value
+        return NotImplemented
+
+    def __ne__(self, other):
+        if type(other) is Mac:
+            return self._value != other._value
+        return NotImplemented
+
+    def __lt__(self, other):
+        if type(other) is Mac:
+            return self._value < other._value
+        return NotImplemented
+
+    def __le__(self, other):
+        if type(other) is Mac:
+            return self._value <= other._value
+        return NotImplemented
+
+    def __gt__(self, other):
+        if type(other) is Mac:
+            return self._value > other._value
+        return NotImplemented
+
+    def __ge__(self, other):
+        if type(other) is Mac:
+            return self._value >= other._value
+        return NotImplemented
+
+    @property
+    def oui(self):
+        """The 24-bit vendor prefix."""
+        return self._value >> 24
+
+    @property
+    def is_multicast(self):
+        return bool(self._value >> 40 & 0x01)
+
+    @property
+    def is_local(self):
+        """True for a locally administered address."""
+        return bool(self._value >> 40 & 0x02)
+
+
+class MacArray:
+    """
+    An ordered sequence of MAC addresses stored in an array('Q').
+
+    Items go in as anything `Mac` accepts and come out as Mac objects.
+    """
+
+    __slots__ = ("_values",)
+
+    def __init__(self, macs=()):
+        self._values = array("Q")
+        self.extend(macs)
+
+    @classmethod
+    def frombytes(cls, data):
+        """Rebuild an array from `tobytes()` output (native byte order)."""
+        macs = cls()
+        macs._values.frombytes(data)
+        return macs
+
+    def tobytes(self):
+        return self._values.tobytes()
+
+    def append(self, mac):
+        self._values.append(_as_int(mac))
+
+    def extend(self, macs):
+        if isinstance(macs, (MacArray, MacSet)):
+            self._values.extend(macs._values)
+        else:
+            self._values.extend(_as_int(mac) for mac in macs)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            macs = MacArray()
+            macs._values = self._values[index]
+            return macs
+        return Mac._from_int(self._values[index])
+
+    def __iter__(self):
+        return map(Mac._from_int, self._values)
+
+    def __contains__(self, mac):
+        try:
+            return _as_int(mac) in self._values
+        except (TypeError, ValueError):
+            return False
+
+    def __repr__(self):
+        return f"MacArray({[format_mac(value) for value in self._values]!r})"
+
+    def ints(self):
+        """The underlying array('Q') (not a copy)."""
+        return self._values
+
+
+class MacSet:
+    """
+    A set of MAC addresses kept sorted in an array('Q').
+
+    Membership is a binary search, bulk `update` sorts once, and iteration yields
+    Mac objects in ascending order.
+    """
+
+    __slots__ = ("_values",)
+
+    def __init__(self, macs=()):
+        self._values = array("Q")
+        self.update(macs)
+
+    def update(self, macs):
+        """
+        Add many addresses at once: the batch is sorted, then merged with the set into a new
+        array. A small batch binary-searches the set and copies the runs between its
+        addresses as slices, a large one walks both arrays.
+        """
+        if isinstance(macs, MacSet):
+            new = macs._values
+        elif isinstance(macs, MacArray):
+            new = sorted(macs._values)
+        else:
+            new = sorted(_as_int(mac) for mac in macs)
+        if not new:
+            return
+        old = self._values
+        size = len(old)
+        gallop = len(new) * 16 < size
+        merged = array("Q")
+        append = merged.append
+        start = 0
+        previous = None
+        for value in new:
+            if value == previous:
+                continue
+            previous = value
+            if gallop:
+                index = bisect_left(old, value, start)
+                if index > start:
+                    merged.extend(old[start:index])
+            else:
+                index = start
+                while index < size and old[index] < value:
+                    append(old[index])
+                    index += 1
+            if index == size or old[index] != value:
+                append(value)
+            start = index
+        merged.extend(old[start:])
+        self._values = merged
+
+    def add(self, mac):
+        value = _as_int(mac)
+        index = bisect_left(self._values, value)
+        if index == len(self._values) or self._values[index] != value:
+            self._values.insert(index, value)
+
+    def discard(self, mac):
+        value = _as_int(mac)
+        index = bisect_left(self._values, value)
+        if index < len(self._values) and self._values[index] == value:
+            del self._values[index]
+
+    def __contains__(self, mac):
+        try:
+            value = _as_int(mac)
+        except (TypeError, ValueError):
+            return False
+        index = bisect_left(self._values, value)
+        return index < len(self._values) and self._values[index] == value
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return map(Mac._from_int, self._values)
+
+    def __eq__(self, other):
+        if isinstance(other, MacSet):
+            return self._values == other._values
+        return NotImplemented
+
+    def __repr__(self):
+        return f"MacSet({[format_mac(value) for value in self._values]!r})"
+
+    def ints(self):
+        """The underlying sorted array('Q') (not a copy)."""
+        return self._values
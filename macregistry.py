@@ -0,0 +1,422 @@
+"""
+macregistry.py
+
+This module keeps a registry of allocated MAC addresses in a memory-mapped file:
+- `MacRegistry.allocate()` / `allocate_many(n)` draw random locally administered unicast
+  addresses (or addresses under a given OUI) that no other user of the registry holds
+- `reserve()` records addresses allocated elsewhere, `release()` gives addresses back
+- several processes can share one registry file: changes hold an exclusive flock on a
+  side lock file, lookups read the shared mapping without taking any lock
+
+The file is an open-addressing hash table of 64-bit slots, used in place through mmap, so
+lookups and insertions touch a few slots whatever the size of the registry and the
+addresses are never loaded as Python objects. It needs POSIX file locking (fcntl).
+"""
+
+import mmap
+import os
+import sys
+import threading
+from array import array
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    from .macaddr import Mac, MacArray, _as_int
+except ImportError:
+    from macaddr import Mac, MacArray, _as_int
+
+# Header words: magic, capacity, live entries, used slots (live + tombstones), retired flag.
+_MAGIC = int.from_bytes(b"MACREG01", "little")
+_CAPACITY, _COUNT, _USED, _RETIRED = 1, 2, 3, 4
+_HEADER = 8
+# A slot holds address + 1, so 0 marks an empty slot; released slots become tombstones.
+_TOMBSTONE = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+_M64 = (1 << 64) - 1
+MIN_CAPACITY = 1024
+MAX_LOAD = 0.7
+# First octet mask: clear the multicast bit, set the locally administered bit.
+_LOCAL_UNICAST = bytes((b & 0xFE) | 0x02 for b in range(256))
+# Draws in a row that only hit allocated addresses before the address space is deemed full.
+MAX_COLLISIONS = 64
+
+
+def _draw(count, oui):
+    """
+    Draw count random addresses without a Python operation per address: the bytes are laid
+    out as little-endian 64-bit words and loaded into an array('Q') in one go.
+
+    Args:
+        oui (bytes): three fixed leading octets, or None for locally administered unicast
+                     addresses (multicast bit cleared, local bit set).
+    """
+    buffer = bytearray(8 * count)
+    if oui is None:
+        data = os.urandom(6 * count)
+        for octet in range(5):
+            buffer[octet::8] = data[5 - octet::6]
+        buffer[5::8] = data[0::6].translate(_LOCAL_UNICAST)
+    else:
+        data = os.urandom(3 * count)
+        for octet in range(3):
+            buffer[octet::8] = data[2 - octet::3]
+            buffer[3 + octet::8] = oui[2 - octet:3 - octet] * count
+    values = array("Q")
+    values.frombytes(buffer)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _parse_oui(oui):
+    if oui is None:
+        return None
+    prefix = bytes.fromhex(oui.replace(":", "").replace("-", ""))
+    if len(prefix) != 3:
+        raise ValueError(f"an OUI is three octets, got {oui!r}")
+    return prefix
+
+
+class MacRegistry:
+    """
+    A set of allocated MAC addresses stored in a memory-mapped file shared by processes.
+
+    Lookups take no lock: writers change one aligned 8-byte slot at a time and never
+    rewrite a table in place (a grown table is a new file renamed over the old one, which
+    is then flagged as retired), so a lookup racing with a change sees the registry either
+    before or after it. Changes also check, under the lock, that the mapped file is still
+    the one at path, so a process dying between the rename and the retired flag never
+    makes the others write into a file nobody reads any more.
+
+    Args:
+        path (str): the registry file, created if missing, next to a `path + ".lock"` file.
+        capacity (int): initial number of slots of a new file (grown as needed).
+
+    Raises:
+        OSError: if the platform has no fcntl file locking.
+        ValueError: if path is not a registry file.
+    """
+
+    def __init__(self, path, capacity=MIN_CAPACITY):
+        if fcntl is None:
+            raise OSError("MacRegistry needs POSIX file locking (fcntl)")
+        self.path = os.fspath(path)
+        self._initial = max(MIN_CAPACITY, 1 << (max(capacity, 1) - 1).bit_length())
+        self._thread_lock = threading.Lock()
+        self._lock_fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        self._mmap = None
+        # (st_dev, st_ino) of the mapped file, to notice it was renamed over.
+        self._file_id = None
+        # (header words, slots, mask, shift), swapped as one attribute so lock-free lookups
+        # never mix the slots of one table with the hash parameters of another.
+        self._table = None
+        try:
+            with self._locked(exclusive=True):
+                pass
+        except BaseException:
+            self.close()
+            raise
+
+    def _map(self, create):
+        """
+        (Re)map the current registry file. Lock held.
+
+        Only a writer, under the exclusive lock, creates and sizes the file (create=True). A
+        reader finding it missing or shorter than a header gets an empty table, flagged as
+        retired so the next use maps the file again.
+        """
+        try:
+            fd = os.open(self.path, os.O_RDWR | (os.O_CREAT if create else 0), 0o644)
+        except FileNotFoundError:
+            if create:
+                raise
+            self._adopt(None, _empty_words(), None)
+            return
+        try:
+            stat = os.fstat(fd)
+            size = stat.st_size
+            fresh = size == 0
+            if size < _HEADER * 8 and not create:
+                mapping = None
+            else:
+                if fresh:
+                    size = (_HEADER + self._initial) * 8
+                    os.ftruncate(fd, size)
+                mapping = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        if mapping is None:
+            self._adopt(None, _empty_words(), None)
+            return
+        words = memoryview(mapping).cast("Q")
+        if fresh:
+            words[0] = _MAGIC
+            words[_CAPACITY] = self._initial
+        elif len(words) < _HEADER or words[0] != _MAGIC or len(words) != _HEADER + words[_CAPACITY]:
+            words.release()
+            mapping.close()
+            raise ValueError(f"{self.path} is not a MAC registry file")
+        self._adopt(mapping, words, (stat.st_dev, stat.st_ino))
+
+    def _adopt(self, mapping, words, file_id):
+        old_mapping, old_table = self._mmap, self._table
+        capacity = words[_CAPACITY]
+        self._mmap = mapping
+        self._file_id = file_id
+        self._table = (words, words[_HEADER:], capacity - 1, 65 - capacity.bit_length())
+        _release(old_mapping, old_table)
+
+    @contextmanager
+    def _locked(self, exclusive):
+        with self._thread_lock:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                # Another process grew the table into a new file and retired this one, or
+                # died after the rename, before it could set the retired flag.
+                if self._table is None or self._table[0][_RETIRED] or self._replaced():
+                    self._map(create=exclusive)
+                yield self._table
+            finally:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _replaced(self):
+        """Whether the file at path is no longer the mapped one. Lock held."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return True
+        return (stat.st_dev, stat.st_ino) != self._file_id
+
+    def _lookup_table(self):
+        """The table for lookups, remapped under the lock first when it was retired."""
+        table = self._table
+        try:
+            if not table[0][_RETIRED]:
+                return table
+        except (TypeError, ValueError):
+            pass  # closed, or released by a remap in another thread
+        with self._locked(exclusive=False) as table:
+            return table
+
+    def _find(self, table, key):
+        """Index of the slot holding key, -1 when absent."""
+        _words, slots, mask, shift = table
+        i = ((key * _GOLDEN) & _M64) >> shift
+        slot = slots[i]
+        while slot != key:
+            if not slot:
+                return -1
+            i = (i + 1) & mask
+            slot = slots[i]
+        return i
+
+    def _insert(self, table, values):
+        """
+        Store the addresses not present yet, reusing the first tombstone met on each probe.
+
+        Returns:
+            list[int]: the addresses that were stored, in order.
+        """
+        words, slots, mask, shift = table
+        stored = []
+        used = 0
+        for value in values:
+            key = value + 1
+            i = ((key * _GOLDEN) & _M64) >> shift
+            free = -1
+            slot = slots[i]
+            while slot:
+                if slot == key:
+                    break
+                if slot == _TOMBSTONE and free < 0:
+                    free = i
+                i = (i + 1) & mask
+                slot = slots[i]
+            else:
+                if free < 0:
+                    free = i
+                    used += 1
+                slots[free] = key
+                stored.append(value)
+        words[_USED] += used
+        words[_COUNT] += len(stored)
+        return stored
+
+    def _make_room(self, table, extra):
+        """Grow (or clean tombstones from) the table so extra insertions keep it under MAX_LOAD."""
+        words, slots = table[0], table[1]
+        if words[_USED] + extra <= words[_CAPACITY] * MAX_LOAD:
+            return table
+        capacity = MIN_CAPACITY
+        while (words[_COUNT] + extra) * 2 > capacity:
+            capacity *= 2
+        live = array("Q", (slot for slot in slots if slot and slot != _TOMBSTONE))
+        # Built in a new file then renamed over the old one, so a crash never leaves half a
+        # table and lock-free readers of the old one keep a consistent view.
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, (_HEADER + capacity) * 8)
+            mapping = mmap.mmap(fd, (_HEADER + capacity) * 8)
+            stat = os.fstat(fd)
+        finally:
+            os.close(fd)
+        new = memoryview(mapping).cast("Q")
+        new[0] = _MAGIC
+        new[_CAPACITY] = capacity
+        mask, shift = capacity - 1, 65 - capacity.bit_length()
+        with new[_HEADER:] as new_slots:
+            for key in live:
+                i = ((key * _GOLDEN) & _M64) >> shift
+                while new_slots[i]:
+                    i = (i + 1) & mask
+                new_slots[i] = key
+        new[_COUNT] = new[_USED] = len(live)
+        mapping.flush()
+        os.replace(tmp, self.path)
+        words[_RETIRED] = 1
+        self._adopt(mapping, new, (stat.st_dev, stat.st_ino))
+        return self._table
+
+    def allocate(self, oui=None):
+        """
+        Allocate one free address.
+
+        Args:
+            oui (str): optional vendor prefix such as "00:1a:2b"; by default the address is
+                       random, unicast and locally administered.
+
+        Returns:
+            Mac: an address no other user of the registry holds, now recorded in it.
+        """
+        return self.allocate_many(1, oui)[0]
+
+    def allocate_many(self, n, oui=None):
+        """
+        Allocate n distinct free addresses under one lock, see `allocate`.
+
+        Returns:
+            MacArray: the addresses, in allocation order.
+
+        Raises:
+            ValueError: if oui is not three octets or leaves room for fewer than n addresses.
+            RuntimeError: if the address space left is too crowded to find free addresses.
+        """
+        prefix = _parse_oui(oui)
+        if prefix is not None and n > 1 << 24:
+            raise ValueError(f"an OUI leaves room for {1 << 24} addresses, {n} were asked")
+        allocated = MacArray()
+        values = allocated.ints()
+        with self._locked(exclusive=True) as table:
+            table = self._make_room(table, n)
+            wasted = 0
+            while len(values) < n:
+                stored = self._insert(table, _draw(n - len(values), prefix))
+                values.extend(stored)
+                # Draws that only hit allocated addresses (or repeated one another).
+                wasted = 0 if stored else wasted + n - len(values)
+                if wasted >= MAX_COLLISIONS:
+                    self._remove(table, values)
+                    raise RuntimeError("no free address left" + (f" under {oui}" if oui else ""))
+        return allocated
+
+    def reserve(self, macs):
+        """
+        Record addresses allocated outside the registry so they are never handed out.
+
+        Args:
+            macs (iterable): addresses in any form `Mac` accepts.
+
+        Returns:
+            int: how many of them were not recorded yet.
+        """
+        values = [_as_int(mac) for mac in macs]
+        with self._locked(exclusive=True) as table:
+            table = self._make_room(table, len(values))
+            return len(self._insert(table, values))
+
+    def _remove(self, table, values):
+        words, slots = table[0], table[1]
+        removed = 0
+        for value in values:
+            i = self._find(table, value + 1)
+            if i >= 0:
+                slots[i] = _TOMBSTONE
+                removed += 1
+        words[_COUNT] -= removed
+        return removed
+
+    def release(self, mac):
+        """Give an address back. Returns True if it was allocated."""
+        return self.release_many([mac]) == 1
+
+    def release_many(self, macs):
+        """Give many addresses back under one lock. Returns how many were allocated."""
+        values = [_as_int(mac) for mac in macs]
+        with self._locked(exclusive=True) as table:
+            return self._remove(table, values)
+
+    def __contains__(self, mac):
+        try:
+            key = _as_int(mac) + 1
+        except (TypeError, ValueError):
+            return False
+        try:
+            return self._find(self._lookup_table(), key) >= 0
+        except ValueError:
+            # Another thread remapped the table during the lookup.
+            with self._locked(exclusive=False) as table:
+                return self._find(table, key) >= 0
+
+    def contains_many(self, macs):
+        """Look many addresses up at once. Returns a list of bools, in order."""
+        keys = [_as_int(mac) + 1 for mac in macs]
+        find = self._find
+        try:
+            table = self._lookup_table()
+            return [find(table, key) >= 0 for key in keys]
+        except ValueError:
+            with self._locked(exclusive=False) as table:
+                return [find(table, key) >= 0 for key in keys]
+
+    def __len__(self):
+        return self._lookup_table()[0][_COUNT]
+
+    def __iter__(self):
+        """The allocated addresses as Macs, in no particular order (a snapshot)."""
+        with self._locked(exclusive=False) as table:
+            values = array("Q", (slot - 1 for slot in table[1] if slot and slot != _TOMBSTONE))
+        return map(Mac._from_int, values)
+
+    def close(self):
+        with self._thread_lock:
+            _release(self._mmap, self._table)
+            self._mmap = self._table = None
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)
+                self._lock_fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _empty_words():
+    """Header and single empty slot of the retired table readers use while there is no file."""
+    words = memoryview(bytearray((_HEADER + 1) * 8)).cast("Q")
+    words[_CAPACITY] = words[_RETIRED] = 1
+    return words
+
+
+def _release(mapping, table):
+    """Unmap a table; lookups still holding it then fail with ValueError and retry."""
+    if table is not None:
+        table[1].release()
+        table[0].release()
+    if mapping is not None:
+        mapping.close()
@@ -1,16 +1,236 @@
-# This is a sample Python script.
+"""
+main.py
 
-# Press Shift+F10 to execute it or replace it with your code.
-# Press Double Shift to search everywhere for classes, files, tool windows, actions, and settings.
+Command-line interface of the spoof tool, also run by `python -m <package>`:
+- `mac get [interface]` — the MAC address of one interface, or of every interface
+- `mac set interface [mac]` — change the address of one interface (random by default)
+- `mac batch interface[=mac] ...` — change many interfaces in parallel
+- `mac reconcile policy.json` / `mac restore` — apply a declarative policy, or undo it (see reconcile.py)
+- `ua pick [--device mobile ...]` — print random User-Agents, optionally of one class
+- `ua fetch url [--output file]` — download a URL with a random or given User-Agent
 
+Only argparse is imported up front: every subcommand imports the modules it needs when it
+runs, so `mac` commands never load requests or fake_useragent (see tests/test_main.py for
+the import-time budget).
+"""
 
-def print_hi(name):
-    # Use a breakpoint in the code line below to debug your script.
-    print(f'Hi, {name}')  # Press Ctrl+F8 to toggle the breakpoint.
+import argparse
+import sys
 
 
-# Press the green button in the gutter to run the script.
-if __name__ == '__main__':
-    print_hi('PyCharm')
+def _default_os():
+    if sys.platform.startswith("win"):
+        return "windows"
+    if sys.platform == "darwin":
+        return "macos"
+    return "unix"
+
+
+def _mac_get(args):
+    try:
+        from . import spoof_mac
+    except ImportError:
+        import spoof_mac
+    if args.interface is None:
+        table = spoof_mac.get_all_macs(args.os, backend=args.backend)
+        if table is None:
+            return 1
+        for name, mac in table.macs().items():
+            print(f"{name}\t{mac or '-'}")
+        return 0
+    mac = spoof_mac.get_current_mac(args.os, args.interface, backend=args.backend)
+    if mac is None:
+        print(f"no MAC address found for {args.interface}", file=sys.stderr)
+        return 1
+    print(mac)
+    return 0
+
+
+def _parse_plan(entries):
+    """["eth0", "wlan0=aa:bb:cc:dd:ee:ff"] -> {"eth0": "random", "wlan0": "aa:bb:cc:dd:ee:ff"}"""
+    plan = {}
+    for entry in entries:
+        interface, _, mac = entry.partition("=")
+        plan[interface] = mac or "random"
+    return plan
+
+
+def _change(args, plan):
+    try:
+        from . import spoof_mac
+    except ImportError:
+        import spoof_mac
+    results = spoof_mac.change_macs(plan, args.os, max_workers=args.workers, fail_fast=args.fail_fast,
+                                    backend=args.backend, live=args.live)
+    if results is None:
+        return 1
+    return _print_results(results)
+
+
+def _print_results(results):
+    for result in results.values():
+        line = f"{result.interface}: {result.old_mac or '-'} -> {result.new_mac or '-'} {result.status}"
+        if result.status == "changed":
+            line += f" ({result.method}, {result.elapsed * 1000:.1f} ms)"
+        elif result.error is not None:
+            line += f" ({result.error})"
+        print(line)
+    return 0 if all(result.status == "changed" for result in results.values()) else 1
+
+
+def _mac_set(args):
+    return _change(args, {args.interface: args.mac})
+
+
+def _mac_batch(args):
+    return _change(args, _parse_plan(args.entries))
+
+
+def _reconcile(args):
+    try:
+        from . import reconcile
+    except ImportError:
+        import reconcile
+    journal = args.journal or reconcile.DEFAULT_JOURNAL
+    try:
+        if args.action == "restore":
+            report = reconcile.restore_all(journal, args.os, dry_run=args.dry_run, max_workers=args.workers,
+                                           backend=args.backend, live=args.live)
+        else:
+            report = reconcile.reconcile(args.policy, journal, args.os, dry_run=args.dry_run,
+                                         max_workers=args.workers, backend=args.backend, live=args.live)
+    except (OSError, ValueError) as e:
+        print("something occurred, please check", e, file=sys.stderr)
+        return 1
+    for name in report.missing:
+        print(f"{name}: not found", file=sys.stderr)
+    if args.dry_run:
+        for action in report.actions:
+            print(f"{action.interface}: {action.current} -> {action.target} planned")
+        status = 0
+    else:
+        status = _print_results(report.results)
+    print(f"{len(report.actions)} to change, {len(report.unchanged)} unchanged, {len(report.missing)} missing")
+    return status
+
+
+def _useragent_module(args):
+    try:
+        from . import spoof_useragent
+    except ImportError:
+        import spoof_useragent
+    if args.file:
+        spoof_useragent.load_useragents(args.file)
+    return spoof_useragent
+
 
-# See PyCharm help at https://www.jetbrains.com/help/pycharm/
+def _criteria(args):
+    return {field: getattr(args, field) for field in ("browser", "engine", "os", "device", "major")}
+
+
+def _ua_pick(args):
+    spoof_useragent = _useragent_module(args)
+    for _ in range(args.count):
+        agent = spoof_useragent.get_useragent(**_criteria(args))
+        if agent is None:
+            print("no User-Agent of the pool matches", file=sys.stderr)
+            return 1
+        print(agent)
+    return 0
+
+
+def _ua_fetch(args):
+    import requests
+    spoof_useragent = _useragent_module(args)
+    user_agent = args.user_agent or spoof_useragent.get_useragent(**_criteria(args))
+    if user_agent is None:
+        print("no User-Agent of the pool matches", file=sys.stderr)
+        return 1
+    try:
+        with spoof_useragent.UserAgentClient(timeout=args.timeout) as client:
+            result = client.download(args.url, args.output, user_agent, max_bytes=args.max_bytes)
+    except (requests.RequestException, OSError) as e:
+        print("something occurred, please check", e, file=sys.stderr)
+        return 1
+    print(f"User-Agent: {user_agent}")
+    print(f"{result.status} {result.length} bytes sha256:{result.digest}" + (" (truncated)" if result.truncated else ""))
+    return 0 if result.status < 400 else 1
+
+
+def _add_criteria(parser):
+    parser.add_argument("--browser", help="e.g. chrome, firefox, safari, edge")
+    parser.add_argument("--engine", help="blink, gecko, webkit or trident")
+    parser.add_argument("--os", help="e.g. windows, macos, linux, ios, android")
+    parser.add_argument("--device", help="desktop, mobile or tablet")
+    parser.add_argument("--major", type=int, help="browser major version")
+    parser.add_argument("--file", help="User-Agent file to draw from instead of the default pool")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="spoof_tool", description="Spoof MAC addresses and User-Agents.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    mac = commands.add_parser("mac", help="read or change MAC addresses").add_subparsers(dest="action", required=True)
+    get = mac.add_parser("get", help="print the MAC address of an interface, or of all of them")
+    get.add_argument("interface", nargs="?")
+    get.set_defaults(func=_mac_get)
+    set_ = mac.add_parser("set", help="change the MAC address of an interface")
+    set_.add_argument("interface")
+    set_.add_argument("mac", nargs="?", default="random", help="new address (random by default)")
+    set_.set_defaults(func=_mac_set)
+    batch = mac.add_parser("batch", help="change the MAC address of many interfaces in parallel")
+    batch.add_argument("entries", nargs="+", metavar="interface[=mac]")
+    batch.add_argument("--workers", type=int, default=8, help="interfaces changed at the same time")
+    batch.add_argument("--fail-fast", action="store_true", help="stop starting interfaces after a failure")
+    batch.set_defaults(func=_mac_batch)
+    reconcile = mac.add_parser("reconcile", help="apply a policy file, changing only the interfaces that differ")
+    reconcile.add_argument("policy", help='JSON object of interface (or pattern) -> address, "random-once" or '
+                                          '"restore-original"')
+    restore = mac.add_parser("restore", help="put every journaled interface back to its original address")
+    for command in (reconcile, restore):
+        command.add_argument("--journal", help="journal of the original addresses (default ~/.cache/spoof_tool/)")
+        command.add_argument("--dry-run", action="store_true", help="only print the planned changes")
+        command.add_argument("--workers", type=int, default=8, help="interfaces changed at the same time")
+        command.set_defaults(func=_reconcile)
+    for command in (get, set_, batch, reconcile, restore):
+        command.add_argument("--os", default=_default_os(), choices=["unix", "macos", "windows"],
+                             help="operating system (default: %(default)s)")
+        command.add_argument("--backend", choices=["auto", "netlink", "helper", "subprocess"],
+                             help="unix / macOS backend")
+    for command in (set_, batch, reconcile, restore):
+        command.add_argument("--live", action="store_true", help="try to change the address with the link up")
+    set_.set_defaults(workers=1, fail_fast=False)
+
+    ua = commands.add_parser("ua", help="pick User-Agents or fetch with one").add_subparsers(dest="action",
+                                                                                             required=True)
+    pick = ua.add_parser("pick", help="print random User-Agents")
+    pick.add_argument("-n", "--count", type=int, default=1)
+    _add_criteria(pick)
+    pick.set_defaults(func=_ua_pick)
+    fetch = ua.add_parser("fetch", help="download a URL with a User-Agent")
+    fetch.add_argument("url")
+    fetch.add_argument("--user-agent", help="send this User-Agent instead of a random one")
+    fetch.add_argument("-o", "--output", help="write the body to this file (only a complete 2xx body is written)")
+    fetch.add_argument("--max-bytes", type=int, help="stop after this many bytes")
+    fetch.add_argument("--timeout", type=float, default=10, help="seconds (default %(default)s)")
+    _add_criteria(fetch)
+    fetch.set_defaults(func=_ua_fetch)
+    return parser
+
+
+def main(argv=None):
+    """
+    Run one command.
+
+    Args:
+        argv (list[str]): the arguments, sys.argv[1:] by default.
+
+    Returns:
+        int: the exit status, 0 on success.
+    """
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,318 @@
+"""
+netlink.py
+
+This module talks rtnetlink (RTM_GETLINK / RTM_SETLINK) over an AF_NETLINK socket
+so that Linux hosts can read and change link addresses without forking
+`ifconfig` or `macchanger`:
+- Read the hardware address, flags and MTU of one interface or of all of them
+- Set the hardware address of an interface
+- Bring an interface up or down
+
+Everything here is Linux only. Use `is_available()` before relying on it,
+`spoof_mac` falls back to the subprocess commands when it returns False.
+"""
+
+import errno as _errno
+import os
+import socket
+import struct
+import sys
+from collections import namedtuple
+
+NETLINK_ROUTE = 0
+
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+
+RTM_NEWLINK = 16
+RTM_GETLINK = 18
+RTM_SETLINK = 19
+
+NLM_F_REQUEST = 0x1
+NLM_F_ACK = 0x4
+NLM_F_DUMP = 0x300
+
+IFLA_ADDRESS = 1
+IFLA_IFNAME = 3
+IFLA_MTU = 4
+
+IFF_UP = 0x1
+IFF_RUNNING = 0x40
+IFF_LOWER_UP = 0x10000
+
+_NLMSGHDR = struct.Struct("=IHHII")
+_IFINFOMSG = struct.Struct("=BxHiII")
+_RTATTR = struct.Struct("=HH")
+_NLMSGERR = struct.Struct("=i")
+
+Link = namedtuple("Link", ["index", "name", "address", "flags", "mtu"])
+Link.__doc__ = """One interface as reported by the kernel (address is raw bytes or None)."""
+
+_available = None
+
+
+def _align(length):
+    return (length + 3) & ~3
+
+
+def is_available():
+    """
+    Tell whether an rtnetlink socket can be opened on this host.
+
+    The answer is computed once and cached for the life of the process.
+
+    Returns:
+        bool: True on Linux when a NETLINK_ROUTE socket can be created.
+    """
+    global _available
+    if _available is None:
+        if not sys.platform.startswith("linux") or not hasattr(socket, "AF_NETLINK"):
+            _available = False
+        else:
+            try:
+                socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE).close()
+                _available = True
+            except OSError:
+                _available = False
+    return _available
+
+
+def mac_to_bytes(mac):
+    """
+    Convert a MAC address string ("aa:bb:..", "AA-BB-..") to its 6 raw bytes.
+
+    Args:
+        mac (str): MAC address, colon or hyphen separated.
+
+    Returns:
+        bytes: the 6 address bytes.
+    """
+    return bytes.fromhex(mac.replace(":", "").replace("-", ""))
+
+
+def bytes_to_mac(raw):
+    """
+    Convert raw address bytes to the lower-case colon form used on unix.
+
+    Args:
+        raw (bytes): hardware address as returned by the kernel.
+
+    Returns:
+        str: MAC address as "xx:xx:xx:xx:xx:xx", or None if raw is None.
+    """
+    if raw is None:
+        return None
+    return raw.hex(":")
+
+
+def pack_attr(attr_type, payload):
+    """Encode one rtattr (header + payload + padding)."""
+    length = _RTATTR.size + len(payload)
+    return _RTATTR.pack(length, attr_type) + payload + b"\0" * (_align(length) - length)
+
+
+def pack_message(msg_type, flags, seq, body):
+    """Encode one netlink message around an already encoded body."""
+    return _NLMSGHDR.pack(_NLMSGHDR.size + len(body), msg_type, flags, seq, 0) + body
+
+
+def parse_attrs(data, offset=0):
+    """
+    Decode a run of rtattrs.
+
+    Args:
+        data (bytes): buffer holding the attributes.
+        offset (int): where the first attribute starts.
+
+    Returns:
+        dict: attribute type -> raw payload bytes.
+    """
+    attrs = {}
+    end = len(data)
+    while offset + _RTATTR.size <= end:
+        length, attr_type = _RTATTR.unpack_from(data, offset)
+        if length < _RTATTR.size:
+            break
+        attrs[attr_type] = data[offset + _RTATTR.size:offset + length]
+        offset += _align(length)
+    return attrs
+
+
+def parse_link(payload):
+    """
+    Decode the payload of an RTM_NEWLINK message into a `Link`.
+
+    Args:
+        payload (bytes): message bytes following the netlink header.
+
+    Returns:
+        Link: the decoded interface.
+    """
+    _family, _type, index, flags, _change = _IFINFOMSG.unpack_from(payload, 0)
+    attrs = parse_attrs(payload, _IFINFOMSG.size)
+    name = attrs.get(IFLA_IFNAME, b"").rstrip(b"\0").decode(errors="ignore")
+    mtu = attrs.get(IFLA_MTU)
+    return Link(
+        index=index,
+        name=name,
+        address=attrs.get(IFLA_ADDRESS),
+        flags=flags,
+        mtu=struct.unpack("=I", mtu)[0] if mtu else None,
+    )
+
+
+def iter_messages(data):
+    """
+    Split a datagram received from the kernel into its netlink messages.
+
+    Yields:
+        tuple: (msg_type, flags, seq, payload) for every message in data.
+    """
+    offset = 0
+    while offset + _NLMSGHDR.size <= len(data):
+        length, msg_type, flags, seq, _pid = _NLMSGHDR.unpack_from(data, offset)
+        if length < _NLMSGHDR.size:
+            break
+        yield msg_type, flags, seq, data[offset + _NLMSGHDR.size:offset + length]
+        offset += _align(length)
+
+
+class NetlinkSocket:
+    """
+    A NETLINK_ROUTE socket with the few link requests spoof_mac needs.
+
+    One socket can serve many requests, so batch callers should keep it open
+    rather than opening one per interface. It can be used as a context manager.
+    """
+
+    def __init__(self):
+        self._sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE)
+        self._sock.bind((0, 0))
+        self._seq = 0
+
+    def close(self):
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _request(self, msg_type, flags, body):
+        self._seq += 1
+        seq = self._seq
+        self._sock.send(pack_message(msg_type, flags | NLM_F_REQUEST, seq, body))
+        replies = []
+        while True:
+            data = self._sock.recv(65536)
+            for reply_type, _flags, reply_seq, payload in iter_messages(data):
+                if reply_seq != seq:
+                    continue
+                if reply_type == NLMSG_DONE:
+                    return replies
+                if reply_type == NLMSG_ERROR:
+                    error = -_NLMSGERR.unpack_from(payload, 0)[0]
+                    if error:
+                        raise OSError(error, os.strerror(error))
+                    return replies
+                replies.append(payload)
+                if not flags & NLM_F_DUMP and not flags & NLM_F_ACK:
+                    return replies
+
+    def _link_body(self, interface, flags=0, change=0, attrs=b""):
+        if isinstance(interface, int):
+            return _IFINFOMSG.pack(socket.AF_UNSPEC, 0, interface, flags, change) + attrs
+        name = pack_attr(IFLA_IFNAME, interface.encode() + b"\0")
+        return _IFINFOMSG.pack(socket.AF_UNSPEC, 0, 0, flags, change) + name + attrs
+
+    def get_link(self, interface):
+        """
+        Query one interface.
+
+        Args:
+            interface (str | int): interface name or ifindex.
+
+        Returns:
+            Link: the interface state.
+
+        Raises:
+            OSError: ENODEV when the interface does not exist.
+        """
+        try:
+            replies = self._request(RTM_GETLINK, 0, self._link_body(interface))
+        except OSError as e:
+            raise OSError(e.errno, e.strerror, str(interface)) from None
+        for payload in replies:
+            return parse_link(payload)
+        raise OSError(_errno.ENODEV, os.strerror(_errno.ENODEV), str(interface))
+
+    def dump_links(self):
+        """
+        Query every interface in one RTM_GETLINK dump.
+
+        Returns:
+            list[Link]: all interfaces known to the kernel, in ifindex order.
+        """
+        body = _IFINFOMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0)
+        return [parse_link(payload) for payload in self._request(RTM_GETLINK, NLM_F_DUMP, body)]
+
+    def set_link(self, interface, address=None, up=None):
+        """
+        Change the address and/or the administrative state of an interface.
+
+        Args:
+            interface (str | int): interface name or ifindex.
+            address (str | bytes | Mac | None): new hardware address, None to keep it.
+            up (bool | None): True to set IFF_UP, False to clear it, None to keep it.
+
+        Raises:
+            OSError: when the kernel refuses the change (EPERM, EBUSY, ENODEV...).
+        """
+        attrs = b""
+        if address is not None:
+            if isinstance(address, str):
+                address = mac_to_bytes(address)
+            elif not isinstance(address, bytes):
+                address = bytes(address)
+            attrs = pack_attr(IFLA_ADDRESS, address)
+        flags = IFF_UP if up else 0
+        change = IFF_UP if up is not None else 0
+        try:
+            self._request(RTM_SETLINK, NLM_F_ACK, self._link_body(interface, flags, change, attrs))
+        except OSError as e:
+            raise OSError(e.errno, e.strerror, str(interface)) from None
+
+
+def get_mac(interface):
+    """
+    Read the hardware address of an interface with a single RTM_GETLINK.
+
+    Args:
+        interface (str): The name of the network interface (e.g., "eth0").
+
+    Returns:
+        str: MAC address as "xx:xx:xx:xx:xx:xx", or None if the link has no address.
+    """
+    with NetlinkSocket() as nl:
+        return bytes_to_mac(nl.get_link(interface).address)
+
+
+def set_mac(interface, mac, cycle=True):
+    """
+    Set the hardware address of an interface.
+
+    Args:
+        interface (str): The name of the network interface (e.g., "eth0").
+        mac (str): new MAC address, colon or hyphen separated.
+        cycle (bool): bring the link down before the change and up after it,
+                      like `ifconfig down` / `macchanger` / `ifconfig up` did.
+    """
+    with NetlinkSocket() as nl:
+        if cycle:
+            nl.set_link(interface, up=False)
+        try:
+            nl.set_link(interface, address=mac)
+        finally:
+            if cycle:
+                nl.set_link(interface, up=True)
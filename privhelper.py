@@ -0,0 +1,432 @@
+"""
+privhelper.py
+
+This module runs MAC address changes in one long-lived privileged helper process, for the
+hosts where spoof_mac would otherwise fork `ifconfig` / `macchanger` (through sudo) for
+every step: macOS, and Linux without rtnetlink:
+- `HelperClient` starts the helper once (through `sudo -n` when not root) and sends it
+  batches of operations over a pipe, one JSON line per request and per reply
+- the helper changes interfaces with ioctls on a datagram socket, no process per command,
+  and reports each operation's outcome and timings back
+- `HelperClient.simulated(macs)` starts the same helper on in-memory interfaces
+  (`MemoryHost`), to test and benchmark the protocol without privileges
+
+Operations are "read", "live", "down", "set", "up" and "change", the whole
+read -> [live] -> down -> set -> up -> verify sequence of one interface.
+
+Usage (helper side): python -m <package>.privhelper [--os unix|macos] [--simulate eth0=aa:bb:cc:dd:ee:ff ...]
+"""
+
+import errno
+import json
+import os
+import selectors
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+from collections import namedtuple
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    from .ifparse import IFCONFIG_ETHER
+except ImportError:
+    from ifparse import IFCONFIG_ETHER
+
+OPERATIONS = ("read", "live", "down", "set", "up", "change")
+IFF_UP = 0x1
+# Seconds a client waits for the reply to one batch before killing the helper.
+TIMEOUT = 30.0
+
+# ioctl requests and struct ifreq layout: (SIOCGIFFLAGS, SIOCSIFFLAGS, set address request, ifreq size).
+_LINUX = (0x8913, 0x8914, 0x8924, 40)
+_MACOS = (0xC0206911, 0x80206910, 0x8020693C, 32)
+_SIOCGIFHWADDR = 0x8927
+_ARPHRD_ETHER = 1
+_AF_LINK = 18
+# Errors that mean "the driver does not take a new address with the link up".
+_LIVE_REFUSED = (errno.EBUSY, errno.EOPNOTSUPP, errno.EADDRNOTAVAIL)
+
+OpResult = namedtuple("OpResult", ["status", "value", "error", "timings", "seconds"])
+OpResult.__doc__ = """
+Reply to one operation of a batch. status is "ok", "failed" or "skipped" (not run because an
+earlier operation failed and the batch asked to stop), error the HelperError of a failed one.
+value is the address for "read", whether the address was taken for "live", and for
+"change" a dict with the "old" address (when it could be read), the "method" ("live" or
+"cycle") and the link "downtime" in seconds. timings maps each phase of a "change" to its
+duration; seconds is how long the operation took inside the helper.
+"""
+
+
+class HelperError(OSError):
+    """An operation failed in the helper; errno is the helper's when it was an OSError."""
+
+
+def _mac_bytes(mac):
+    digits = "".join(c for c in mac if c not in ":-.")
+    value = bytes.fromhex(digits)
+    if len(value) != 6:
+        raise ValueError(f"invalid MAC address {mac!r}")
+    return value
+
+
+def _mac_text(value):
+    return ":".join(f"{b:02x}" for b in value)
+
+
+# ----------------------
+# Helper side
+# ----------------------
+
+class IoctlHost:
+    """
+    The interfaces of this host, changed with ioctls on one datagram socket (needs root).
+
+    Args:
+        operating_system (str): "unix" (Linux) or "macos". macOS has no ioctl to read a link
+                                address, reads run `ifconfig interface` there.
+    """
+
+    def __init__(self, operating_system="unix"):
+        if fcntl is None:
+            raise OSError("the helper needs fcntl.ioctl")
+        self.os = operating_system.lower()
+        self._get_flags, self._set_flags, self._set_address, self._size = _MACOS if self.os == "macos" else _LINUX
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def _ioctl(self, request, interface, data=b""):
+        name = interface.encode()
+        if len(name) >= 16:
+            raise OSError(errno.ENODEV, f"invalid interface name {interface!r}")
+        buffer = bytearray(name.ljust(16, b"\0") + data.ljust(self._size - 16, b"\0"))
+        fcntl.ioctl(self._socket, request, buffer)
+        return bytes(buffer[16:])
+
+    def read(self, interface):
+        if self.os == "macos":
+            output = subprocess.check_output(["ifconfig", interface]).decode(errors="ignore")
+            match = IFCONFIG_ETHER.search(output)
+            if match is None:
+                raise OSError(errno.ENODEV, f"no MAC address found for {interface}")
+            return match.group(1).lower()
+        return _mac_text(self._ioctl(_SIOCGIFHWADDR, interface)[2:8])
+
+    def _flags(self, interface):
+        return struct.unpack_from("H", self._ioctl(self._get_flags, interface))[0]
+
+    def link(self, interface, up):
+        flags = self._flags(interface)
+        flags = flags | IFF_UP if up else flags & ~IFF_UP
+        self._ioctl(self._set_flags, interface, struct.pack("H", flags))
+
+    def set(self, interface, mac):
+        if self.os == "macos":
+            address = struct.pack("BB", 6, _AF_LINK) + _mac_bytes(mac)
+        else:
+            address = struct.pack("H", _ARPHRD_ETHER) + _mac_bytes(mac)
+        self._ioctl(self._set_address, interface, address)
+
+
+class MemoryHost:
+    """
+    Stand-in interfaces kept in memory, behind the same helper protocol.
+
+    Args:
+        macs (dict): interface -> address; every interface starts up.
+        broken (iterable): interfaces whose address cannot be set.
+        refuse_live (iterable): interfaces that refuse a new address while up (EBUSY),
+                                like most physical NICs.
+    """
+
+    def __init__(self, macs, broken=(), refuse_live=()):
+        self.links = {name: [_mac_text(_mac_bytes(mac)), True] for name, mac in macs.items()}
+        self.broken = set(broken)
+        self.refuse_live = set(refuse_live)
+
+    def _link(self, interface):
+        try:
+            return self.links[interface]
+        except KeyError:
+            raise OSError(errno.ENODEV, f"no interface named {interface}") from None
+
+    def read(self, interface):
+        return self._link(interface)[0]
+
+    def link(self, interface, up):
+        self._link(interface)[1] = up
+
+    def set(self, interface, mac):
+        link = self._link(interface)
+        if interface in self.broken:
+            raise OSError(errno.EIO, f"cannot set the address of {interface}")
+        if link[1] and interface in self.refuse_live:
+            raise OSError(errno.EBUSY, f"{interface} is up")
+        link[0] = _mac_text(_mac_bytes(mac))
+
+
+def _live(host, interface, mac):
+    try:
+        host.set(interface, mac)
+    except OSError as e:
+        if e.errno in _LIVE_REFUSED:
+            return False
+        raise
+    return True
+
+
+def _change(host, interface, mac, live, timings):
+    value = {"old": None, "method": None, "downtime": None}
+
+    def timed(phase, step, *args):
+        start = time.perf_counter()
+        try:
+            return step(*args)
+        finally:
+            timings[phase] = time.perf_counter() - start
+
+    try:
+        value["old"] = timed("read", host.read, interface)
+        if live and timed("live", _live, host, interface, mac):
+            value["method"], value["downtime"] = "live", 0.0
+        else:
+            value["method"] = "cycle"
+            timed("down", host.link, interface, False)
+            down = time.perf_counter()
+            try:
+                timed("set", host.set, interface, mac)
+            finally:
+                # The link comes back up even when the address is refused, like netlink.set_mac.
+                timed("up", host.link, interface, True)
+                value["downtime"] = time.perf_counter() - down
+        current = timed("verify", host.read, interface)
+        if _mac_bytes(current) != _mac_bytes(mac):
+            raise RuntimeError(f"{interface} reports {current} after the change, expected {mac}")
+    except Exception as e:
+        e.value = value
+        raise
+    return value
+
+
+def _run(host, op):
+    """Run one operation, returns its reply as a dict."""
+    timings = {}
+    start = time.perf_counter()
+    reply = {"status": "ok", "value": None, "error": None, "errno": None, "timings": timings}
+    try:
+        name, interface, mac = op["op"], op["interface"], op.get("mac")
+        if name == "read":
+            reply["value"] = host.read(interface)
+        elif name == "live":
+            reply["value"] = _live(host, interface, mac)
+        elif name in ("down", "up"):
+            host.link(interface, name == "up")
+        elif name == "set":
+            host.set(interface, mac)
+        elif name == "change":
+            reply["value"] = _change(host, interface, mac, op.get("live", False), timings)
+        else:
+            raise ValueError(f"unknown operation {name!r}")
+    except Exception as e:
+        reply.update(status="failed", value=getattr(e, "value", None), error=str(e) or type(e).__name__,
+                     errno=getattr(e, "errno", None))
+    reply["seconds"] = time.perf_counter() - start
+    return reply
+
+
+def serve(host, requests=None, replies=None):
+    """
+    Answer requests until the input is closed. A request is a JSON line
+    {"ops": [{"op": "change", "interface": "en0", "mac": "02:..", "live": false}, ...],
+    "stop_on_error": false}, its reply the JSON line {"results": [...]} in the same order.
+    """
+    requests = sys.stdin if requests is None else requests
+    replies = sys.stdout if replies is None else replies
+    for line in requests:
+        try:
+            request = json.loads(line)
+            results = []
+            for op in request["ops"]:
+                if request.get("stop_on_error") and any(r["status"] == "failed" for r in results):
+                    results.append({"status": "skipped", "value": None, "error": None, "errno": None,
+                                    "timings": {}, "seconds": 0.0})
+                else:
+                    results.append(_run(host, op))
+            reply = {"results": results}
+        except (ValueError, KeyError, TypeError) as e:
+            reply = {"error": f"bad request: {e}"}
+        replies.write(json.dumps(reply) + "\n")
+        replies.flush()
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Privileged helper of spoof_mac, speaks JSON lines on stdin/stdout.")
+    parser.add_argument("--os", default="macos" if sys.platform == "darwin" else "unix", choices=["unix", "macos"])
+    parser.add_argument("--simulate", nargs="*", metavar="interface=mac",
+                        help="serve in-memory interfaces instead of the host's")
+    parser.add_argument("--broken", nargs="*", default=(), help="simulated interfaces whose address cannot be set")
+    parser.add_argument("--refuse-live", nargs="*", default=(),
+                        help="simulated interfaces that refuse a new address while up")
+    args = parser.parse_args(argv)
+    if args.simulate is not None:
+        host = MemoryHost(dict(entry.split("=", 1) for entry in args.simulate), args.broken, args.refuse_live)
+    else:
+        host = IoctlHost(args.os)
+    serve(host)
+    return 0
+
+
+# ----------------------
+# Client side
+# ----------------------
+
+def _module_command():
+    """The command running this module as a script, and the directory it has to start in."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    if __package__:
+        return [sys.executable, "-m", f"{__package__}.privhelper"], os.path.dirname(here)
+    return [sys.executable, "-m", "privhelper"], here
+
+
+class HelperClient:
+    """
+    Connection to a running helper. Requests are serialized, so one client can be shared by
+    threads; `batch()` sends many operations in one round trip. A helper that does not reply
+    in time is killed, and the client then fails every request.
+
+    Args:
+        command (list[str]): how to start the helper, see `spawn()` and `simulated()`.
+        cwd (str): directory the helper starts in.
+        timeout (float): seconds to wait for the reply to one batch, TIMEOUT by default.
+    """
+
+    def __init__(self, command, cwd=None, timeout=None):
+        self._process = subprocess.Popen(command, cwd=cwd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+                                         bufsize=1)
+        self._lock = threading.Lock()
+        self.timeout = TIMEOUT if timeout is None else timeout
+        # Bytes read from the pipe past the last reply line.
+        self._pending = b""
+
+    @classmethod
+    def spawn(cls, operating_system="unix", sudo=None):
+        """
+        Start the helper on the host's interfaces.
+
+        Args:
+            operating_system (str): "unix" or "macos".
+            sudo (bool): start it through `sudo -n` (which never prompts), by default when not root.
+        """
+        command, cwd = _module_command()
+        if sudo is None:
+            sudo = hasattr(os, "geteuid") and os.geteuid() != 0
+        return cls((["sudo", "-n"] if sudo else []) + command + ["--os", operating_system.lower()], cwd)
+
+    @classmethod
+    def simulated(cls, macs, broken=(), refuse_live=()):
+        """Start the helper on in-memory interfaces, see `MemoryHost`."""
+        command, cwd = _module_command()
+        command += ["--simulate", *(f"{name}={mac}" for name, mac in macs.items())]
+        if broken:
+            command += ["--broken", *broken]
+        if refuse_live:
+            command += ["--refuse-live", *refuse_live]
+        return cls(command, cwd)
+
+    def batch(self, ops, stop_on_error=False):
+        """
+        Run operations in one round trip, in order.
+
+        Args:
+            ops (list[dict]): {"op": ..., "interface": ..., "mac": ..., "live": ...} each.
+            stop_on_error (bool): skip the operations after the first failure.
+
+        Returns:
+            list[OpResult]: one per operation, in order.
+
+        Raises:
+            HelperError: if the helper is gone, rejected the request or did not reply in time
+                         (errno ETIMEDOUT, the helper is then killed).
+        """
+        line = json.dumps({"ops": list(ops), "stop_on_error": stop_on_error}) + "\n"
+        with self._lock:
+            try:
+                self._process.stdin.write(line)
+                self._process.stdin.flush()
+                reply = self._read_reply(time.monotonic() + self.timeout)
+            except HelperError:
+                raise
+            except (OSError, ValueError) as e:
+                raise HelperError(errno.EPIPE, f"the helper is not running: {e}") from None
+        if reply is None:
+            raise HelperError(errno.EPIPE, f"the helper exited with status {self._process.poll()}")
+        reply = json.loads(reply)
+        if "error" in reply:
+            raise HelperError(reply["error"])
+        return [OpResult(r["status"], r["value"],
+                         None if r["error"] is None else HelperError(r["errno"] or errno.EIO, r["error"]),
+                         r["timings"], r["seconds"]) for r in reply["results"]]
+
+    def _read_reply(self, deadline):
+        """The next reply line, None once the helper closed its end. Lock held."""
+        fd = self._process.stdout.fileno()
+        with selectors.DefaultSelector() as selector:
+            selector.register(fd, selectors.EVENT_READ)
+            while b"\n" not in self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not selector.select(remaining):
+                    self._process.kill()
+                    self._process.wait()
+                    raise HelperError(errno.ETIMEDOUT, f"the helper did not reply within {self.timeout} seconds")
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    return None
+                self._pending += chunk
+        reply, _, self._pending = self._pending.partition(b"\n")
+        return reply
+
+    def call(self, op, interface, mac=None):
+        """Run one operation and return its value, raising its HelperError if it failed."""
+        result = self.batch([{"op": op, "interface": interface, "mac": mac}])[0]
+        if result.error is not None:
+            raise result.error
+        return result.value
+
+    def changes(self, plan, live=False, stop_on_error=False):
+        """
+        Change many interfaces in one round trip.
+
+        Args:
+            plan (dict): interface -> new address (str).
+            live (bool): try each change with the link up first.
+            stop_on_error (bool): skip the interfaces after the first failure.
+
+        Returns:
+            dict: interface -> OpResult of its "change", in the order of the plan.
+        """
+        ops = [{"op": "change", "interface": interface, "mac": mac, "live": live} for interface, mac in plan.items()]
+        return dict(zip(plan, self.batch(ops, stop_on_error)))
+
+    def close(self):
+        if self._process.poll() is None:
+            self._process.stdin.close()
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+        self._process.stdout.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,269 @@
+"""
+reconcile.py
+
+This module applies a declarative MAC address policy to the host:
+- `load_policy()` reads a JSON file mapping interfaces (or fnmatch patterns such as
+  "veth*") to a fixed address, "random-once" or "restore-original"
+- `reconcile()` diffs the policy against one snapshot of the interfaces and changes, in
+  parallel, only the interfaces whose address differs from the target: re-running an
+  unchanged policy does no link operation at all
+- `Journal` keeps the original address of every interface the reconciler changed, and the
+  address drawn for "random-once", so `restore_all()` puts a whole fleet back in one batch
+"""
+
+import fnmatch
+import json
+import os
+from collections import namedtuple
+try:
+    from .macaddr import Mac
+    from .spoof_mac import change_macs, generate_random_mac, get_all_macs
+except ImportError:
+    from macaddr import Mac
+    from spoof_mac import change_macs, generate_random_mac, get_all_macs
+
+RANDOM_ONCE = "random-once"
+RESTORE_ORIGINAL = "restore-original"
+DEFAULT_JOURNAL = os.path.join(os.path.expanduser("~"), ".cache", "spoof_tool", "macjournal.json")
+
+Action = namedtuple("Action", ["interface", "policy", "current", "target"])
+Action.__doc__ = """
+One change planned by `plan_changes`: the interface goes from its current address to
+target (both Mac), because of policy (a fixed address, "random-once" or "restore-original").
+"""
+
+Reconciliation = namedtuple("Reconciliation", ["actions", "unchanged", "missing", "results"])
+Reconciliation.__doc__ = """
+Outcome of `reconcile`: actions is the list of planned Actions, unchanged the interfaces
+already in the desired state, missing the interfaces named by the policy but absent from
+the host, results the spoof_mac.ChangeResult of each action (empty for a dry run).
+"""
+
+
+class Journal:
+    """
+    Original addresses of the interfaces changed by the reconciler, persisted in a JSON file.
+
+    An original is recorded once, before the first change of an interface, and kept until
+    the interface is restored; later changes never overwrite it.
+
+    Args:
+        path (str): the JSON file, created on `save()`.
+    """
+
+    def __init__(self, path=DEFAULT_JOURNAL):
+        self.path = path
+        self._entries = {}
+        try:
+            with open(path, encoding="utf-8") as file:
+                self._entries = json.load(file)["interfaces"]
+        except FileNotFoundError:
+            pass
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __contains__(self, interface):
+        return interface in self._entries
+
+    def original(self, interface):
+        """The Mac the interface had before its first change, None if it was never changed."""
+        entry = self._entries.get(interface)
+        return None if entry is None else Mac(entry["original"])
+
+    def assigned(self, interface):
+        """The Mac drawn for a "random-once" policy, None if none was drawn."""
+        entry = self._entries.get(interface)
+        return None if entry is None or entry.get("assigned") is None else Mac(entry["assigned"])
+
+    def record(self, interface, original, assigned=None):
+        """Remember the original address (unless already known) and the random-once address."""
+        entry = self._entries.setdefault(interface, {"original": str(Mac(original))})
+        if assigned is not None:
+            entry["assigned"] = str(Mac(assigned))
+
+    def forget(self, interface):
+        self._entries.pop(interface, None)
+
+    def save(self):
+        """Write the file atomically, so an interrupted run never loses recorded originals."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump({"interfaces": self._entries}, file, indent=1, sort_keys=True)
+        os.replace(self.path + ".tmp", self.path)
+
+
+def _check_policy(value):
+    if value in (RANDOM_ONCE, RESTORE_ORIGINAL):
+        return value
+    return Mac(value)
+
+
+def load_policy(path):
+    """
+    Read a policy file: a JSON object mapping interface names or fnmatch patterns to an
+    address in any notation `Mac` understands, "random-once" or "restore-original", e.g.
+    {"eth0": "02:00:00:00:00:01", "veth*": "random-once", "wlan0": "restore-original"}.
+
+    Returns:
+        dict: interface or pattern -> Mac, "random-once" or "restore-original", in file order.
+
+    Raises:
+        ValueError: if the file is not such an object or an address is invalid.
+    """
+    with open(path, encoding="utf-8") as file:
+        data = json.load(file)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: a policy is a JSON object of interface -> address")
+    return {interface: _check_policy(value) for interface, value in data.items()}
+
+
+def _expand(policy, table):
+    """Map every interface the policy applies to onto its policy; exact names win over patterns."""
+    patterns = [(pattern, value) for pattern, value in policy.items() if any(c in pattern for c in "*?[")]
+    desired = {}
+    if patterns:
+        for name in table:
+            for pattern, value in patterns:
+                if fnmatch.fnmatchcase(name, pattern):
+                    desired[name] = value
+                    break
+    for name, value in policy.items():
+        if not any(c in name for c in "*?["):
+            desired[name] = value
+    return desired
+
+
+def plan_changes(policy, table, journal, operating_system="unix", registry=None):
+    """
+    Diff a policy against a snapshot of the interfaces, without touching them.
+
+    Fixed addresses are compared with the current ones. "random-once" draws an address the
+    first time and records it in the journal, then keeps (or re-applies) that address.
+    "restore-original" targets the journaled original, and is a no-op for interfaces the
+    journal does not know.
+
+    Args:
+        policy (dict): as returned by `load_policy`.
+        table (InterfaceTable): the snapshot, from `spoof_mac.get_all_macs`.
+        journal (Journal): originals and random-once addresses.
+        operating_system (str): "unix", "macos" or "windows", for the random addresses.
+        registry (macregistry.MacRegistry): draw the "random-once" addresses from this registry.
+
+    Returns:
+        tuple: (actions, unchanged, missing) as in `Reconciliation`.
+    """
+    os_name = operating_system.lower()
+    actions, unchanged, missing = [], [], []
+    for interface, value in _expand(policy, table).items():
+        entry = table.get(interface)
+        if entry is None or entry.mac is None:
+            missing.append(interface)
+            continue
+        current = Mac(entry.mac)
+        if value == RANDOM_ONCE:
+            target = journal.assigned(interface)
+            if target is None:
+                if registry is not None:
+                    target = registry.allocate()
+                else:
+                    target = Mac(generate_random_mac(os_name))
+                journal.record(interface, current, assigned=target)
+        elif value == RESTORE_ORIGINAL:
+            target = journal.original(interface)
+            if target is None:
+                unchanged.append(interface)
+                continue
+        else:
+            target = value
+        if target == current:
+            if value == RESTORE_ORIGINAL:
+                _forget(journal, interface, registry)
+            unchanged.append(interface)
+        else:
+            actions.append(Action(interface, value, current, target))
+    return actions, unchanged, missing
+
+
+def _forget(journal, interface, registry):
+    """Drop a restored interface from the journal, giving its random-once address back to the registry."""
+    assigned = journal.assigned(interface)
+    if registry is not None and assigned is not None:
+        registry.release(assigned)
+    journal.forget(interface)
+
+
+def reconcile(policy, journal=DEFAULT_JOURNAL, operating_system="unix", table=None, dry_run=False, max_workers=8,
+              backend=None, live=False, registry=None):
+    """
+    Bring the interfaces to the state described by a policy, changing only what differs.
+
+    The interfaces are read once (one netlink dump or one `ifconfig -a` / `ipconfig /all`),
+    the originals of the interfaces about to change are journaled before any change, and the
+    changes run in parallel through `spoof_mac.change_macs`. Interfaces already in the
+    desired state get no link operation.
+
+    Args:
+        policy (dict | str): as returned by `load_policy`, or the path of a policy file.
+        journal (Journal | str): the journal or its path.
+        operating_system (str): "unix", "macos" or "windows".
+        table (InterfaceTable): a snapshot to diff against, read from the host by default.
+        dry_run (bool): only plan, change nothing and leave the journal file untouched.
+        max_workers (int): how many interfaces are changed at the same time.
+        backend (str): "auto", "netlink", "helper" or "subprocess", see `spoof_mac.change_mac`.
+        live (bool): try to change each address with the link up first.
+        registry (macregistry.MacRegistry): draw the "random-once" addresses from this registry,
+                                            and release them when their interface is restored.
+                                            A dry run leaves it untouched.
+
+    Returns:
+        Reconciliation: what was planned and the result of each change.
+
+    Raises:
+        OSError: if the interfaces could not be read or the journal written.
+        ValueError: if an address of the policy is invalid.
+    """
+    if isinstance(policy, (str, os.PathLike)):
+        policy = load_policy(policy)
+    else:
+        policy = {interface: _check_policy(value) for interface, value in policy.items()}
+    if not isinstance(journal, Journal):
+        journal = Journal(journal)
+    if table is None:
+        table = get_all_macs(operating_system, backend)
+        if table is None:
+            raise OSError("could not read the network interfaces")
+    actions, unchanged, missing = plan_changes(policy, table, journal, operating_system,
+                                               None if dry_run else registry)
+    if dry_run:
+        return Reconciliation(actions, unchanged, missing, {})
+    for action in actions:
+        journal.record(action.interface, action.current)
+    journal.save()
+    results = {}
+    if actions:
+        results = change_macs({action.interface: action.target for action in actions}, operating_system,
+                              max_workers=max_workers, backend=backend, live=live)
+        if results is None:
+            raise ValueError(f"unsupported operating system {operating_system!r}")
+        for action in actions:
+            if action.policy == RESTORE_ORIGINAL and results[action.interface].status == "changed":
+                _forget(journal, action.interface, registry)
+        journal.save()
+    return Reconciliation(actions, unchanged, missing, results)
+
+
+def restore_all(journal=DEFAULT_JOURNAL, operating_system="unix", **kwargs):
+    """
+    Put every journaled interface back to its original address in one parallel batch,
+    see `reconcile` for the other arguments.
+
+    Returns:
+        Reconciliation: restored interfaces leave the journal, failed ones stay in it.
+    """
+    if not isinstance(journal, Journal):
+        journal = Journal(journal)
+    return reconcile({interface: RESTORE_ORIGINAL for interface in journal}, journal, operating_system, **kwargs)
@@ -2,65 +2,166 @@
 spoof_mac.py
 
 This module handles MAC address operations:
-- Retrieve current MAC address
-- Generate random MAC address
-- Change MAC address using system commands
+- Retrieve current MAC address, of one interface or of all of them in one pass
+- Generate random MAC address, one at a time or in bulk
+- Change MAC address using system commands, or rtnetlink on Linux (see netlink.py), or
+  through a long-lived privileged helper process (see privhelper.py)
+- Change the MAC address of many interfaces in parallel with per-interface results
 
 Author: TonNom
 Created: 2025-05-27
 """
 
+import errno
 import subprocess
-import re
 import random
+import threading
+import time
+from collections import namedtuple
+from os import urandom
 try:
     import winreg
 except ImportError:
     winreg = None
+try:
+    from . import instrument, netlink
+    from .interfaces import InterfaceTable, snapshot
+    from .macaddr import Mac, format_mac
+    from .ifparse import IFCONFIG_ETHER
+    from .linkwatch import LinkWatcher
+    from .privhelper import HelperClient
+    from .winregistry import AdapterIndex
+except ImportError:
+    import instrument
+    import netlink
+    from interfaces import InterfaceTable, snapshot
+    from macaddr import Mac, format_mac
+    from ifparse import IFCONFIG_ETHER
+    from linkwatch import LinkWatcher
+    from privhelper import HelperClient
+    from winregistry import AdapterIndex
+
+# How long a netlink change may take to show up as "new address and link UP", in seconds.
+VERIFY_TIMEOUT = 5.0
+
+# "auto" uses rtnetlink when the host supports it, else the helper set by `set_helper` if
+# any, else the subprocess commands; "netlink", "helper" and "subprocess" force one of them.
+DEFAULT_BACKEND = "auto"
+_ADAPTER_INDEX = None
+_HELPER = None
+
+
+def _use_netlink(backend):
+    backend = (backend or DEFAULT_BACKEND).lower()
+    if backend in ("subprocess", "helper"):
+        return False
+    if backend == "netlink":
+        return True
+    return netlink.is_available()
+
+
+def _use_helper(os, backend):
+    if os not in ["unix", "macos"]:
+        return False
+    backend = (backend or DEFAULT_BACKEND).lower()
+    if backend == "helper":
+        return True
+    return backend == "auto" and _HELPER is not None and not (os == "unix" and netlink.is_available())
+
+
+def set_helper(helper):
+    """
+    Send the unix / macOS changes through a running privileged helper instead of forking
+    the system commands, see privhelper.py. None stops using it (it is not closed).
+
+    Args:
+        helper (privhelper.HelperClient): e.g. `HelperClient.spawn("macos")`.
+    """
+    global _HELPER
+    _HELPER = helper
+
 
+def _helper(os):
+    """The helper of the "helper" backend, started (through sudo when not root) on first use."""
+    global _HELPER
+    if _HELPER is None:
+        _HELPER = HelperClient.spawn(os)
+    return _HELPER
 
 
-def get_current_mac(operating_system = "Unix", interface = "wlan0"):
+def get_all_macs(operating_system = "Unix", backend = None):
+    """
+    Read every network interface of the host in a single pass.
+
+    On Linux this is one rtnetlink dump (or a /sys/class/net sweep), elsewhere a single
+    `ifconfig -a` or `ipconfig /all`, instead of one command per interface.
+
+    Args:
+        operating_system (str): the name of the operating system you are using (e.g., "Unix")
+        backend (str): "auto", "netlink", "helper" or "subprocess", defaults to DEFAULT_BACKEND.
+
+    Returns:
+        InterfaceTable: name -> Interface(name, mac, index, flags, mtu, description),
+                        see `InterfaceTable.macs()` for a plain name -> MAC dict.
+                        None if the interfaces could not be read.
+    """
+    os = operating_system.lower()
+    if os not in ["windows", "unix", "macos"]:
+        print("Enter a carried OS : 1.Windows, 2.Unix, 3.MacOS")
+        return
+    try:
+        return snapshot(os, use_netlink=_use_netlink(backend) if os == "unix" else False)
+    except Exception as e:
+        print("something occurred, please check", e)
+        return
+
+def get_current_mac(operating_system = "Unix", interface = "wlan0", backend = None, table = None, as_mac = False):
     """
     Get the current MAC address of a given network interface.
 
     Args:
         operating_system (str): the name of the operating system you are using (e.g., "Unix")
         interface (str): The name of the network interface (e.g., "en0").
+        backend (str): "auto", "netlink", "helper" or "subprocess", defaults to DEFAULT_BACKEND.
+                       Only used for unix, netlink is never available on macOS or Windows.
+        table (InterfaceTable): a snapshot from `get_all_macs()`. When given, the address is
+                                looked up in it and no command or syscall is issued.
+        as_mac (bool): return a `Mac` instead of a string.
 
     Returns:
-        str: MAC address as "XX:XX:XX:XX:XX:XX" or None if not found.
+        str: MAC address as "XX:XX:XX:XX:XX:XX" (or Mac) or None if not found.
     """
-    mac_filter = r'ether\s+([0-9a-f:]{2}(?::[0-9a-f:]{2}){5})' #I tried my best, but I hate this so much, chatGPT helped me to build for the regex pattern
-    win_mac_filter = r'Physical Address[.\s]*: ([0-9A-Fa-f\-]{17})'
     os = operating_system.lower()
 
-    if os == "windows":
-        try:
-            output = subprocess.check_output(['ipconfig']).decode(errors='ignore')
-            interface_blocks = output.split("\r\n\r\n")
-            for block in interface_blocks:
-                if interface in block:
-                    match = re.search(win_mac_filter, block)
-                    if match:
-                        return match.group(1)
-
-        except Exception as e:
-            print("something occurred, please check", e)
-            return
-    elif os in ["unix", "macos"]:
-        try:
-            output = subprocess.check_output(['ifconfig', interface]).decode(errors='ignore')
-            my_mac_addresses = re.search(mac_filter, output)
-            return my_mac_addresses.group(1)
-        except Exception as e:
-            print("something occurred, please check", e)
-            return
-    else:
+    if table is not None:
+        mac = table.mac(interface)
+        return Mac(mac) if as_mac and mac else mac
+    if os not in ["windows", "unix", "macos"]:
         print("Enter a carried OS : 1.Windows, 2.Unix, 3.MacOS")
         return
+    try:
+        mac = _read_mac(os, interface, backend)
+        return Mac(mac) if as_mac and mac else mac
+    except Exception as e:
+        print("something occurred, please check", e)
+        return
 
-def generate_random_mac(operating_system = "unix"): #I found this code https://codingfleet.com/transformation-details/generating-a-random-mac-address-in-python/
+def _read_mac(os, interface, backend = None):
+    """Read one MAC address like `get_current_mac`, but let errors propagate."""
+    if os == "windows":
+        output = subprocess.check_output(['ipconfig']).decode(errors='ignore')
+        return InterfaceTable.from_ipconfig(output).mac(interface)
+    if _use_helper(os, backend):
+        return _helper(os).call("read", interface)
+    if os == "unix" and _use_netlink(backend):
+        return netlink.get_mac(interface)
+    output = subprocess.check_output(['ifconfig', interface]).decode(errors='ignore')
+    my_mac_addresses = IFCONFIG_ETHER.search(output)
+    if my_mac_addresses is None:
+        raise LookupError(f"no MAC address found for {interface}")
+    return my_mac_addresses.group(1).lower()
+
+def generate_random_mac(operating_system = "unix", as_mac = False): #I found this code https://codingfleet.com/transformation-details/generating-a-random-mac-address-in-python/
     """
     Generate a random MAC address formatted according to the given operating system.
 
@@ -68,11 +169,13 @@ def generate_random_mac(operating_system = "unix"): #I found this code https://c
         operating_system (str): The target OS for which the MAC address should be generated.
                                 Accepted values are "unix", "macos", or "windows" (case-insensitive).
                                 Defaults to "unix".
+        as_mac (bool): return a `Mac` instead of a string. Defaults to False.
 
     Returns:
         str or None: A string representing the new MAC address in the appropriate format:
                      - Colon-separated (e.g., 'a2:bc:de:f1:23:45') for Unix/macOS
                      - Hyphen-separated (e.g., 'A2-BC-DE-F1-23-45') for Windows
+                     A Mac instead when as_mac is True.
                      Returns None if the OS is not recognized, and prints a warning message.
 
     Notes:
@@ -89,7 +192,7 @@ def generate_random_mac(operating_system = "unix"): #I found this code https://c
         second_digit = random.choice('02468ace')
         digits.insert(1, second_digit)
         new_mac_address = ':'.join(''.join(digits[i:i + 2]) for i in range(0, 12, 2))
-        return new_mac_address
+        return Mac(new_mac_address) if as_mac else new_mac_address
 
 
     elif os == "windows":
@@ -97,17 +200,89 @@ def generate_random_mac(operating_system = "unix"): #I found this code https://c
         second_digit = random.choice('02468ACE')
         digits.insert(1, second_digit)
         new_mac_address = '-'.join(''.join(digits[i:i + 2]) for i in range(0, 12, 2))
-        return new_mac_address
+        return Mac(new_mac_address) if as_mac else new_mac_address
 
     else:
         print("Enter a carried OS : 1.Windows, 2.Unix, 3.MacOS")
         return
 
-def change_mac(operating_system = 'unix', interface = 'eth0'):
+# First octet mask: clear the multicast bit, set the locally administered bit.
+_LOCAL_UNICAST = bytes((b & 0xFE) | 0x02 for b in range(256))
+
+def _random_mac_bytes(count, oui = None):
+    """Draw count addresses as one buffer of count * 6 bytes, without a Python loop per address."""
+    if oui is None:
+        buffer = bytearray(urandom(6 * count))
+        buffer[0::6] = buffer[0::6].translate(_LOCAL_UNICAST)
+        return buffer
+    buffer = bytearray(6 * count)
+    for i, octet in enumerate(oui):
+        buffer[i::6] = bytes((octet,)) * count
+    tail = urandom(3 * count)
+    for i in range(3):
+        buffer[3 + i::6] = tail[i::3]
+    return buffer
+
+def _format_macs(buffer, fmt):
+    """Format a buffer of 6-byte addresses with one hex conversion for the whole batch."""
+    text = buffer.hex("-").upper() if fmt == "windows" else buffer.hex(":")
+    return [text[i:i + 17] for i in range(0, len(text), 18)]
+
+def generate_random_macs(n, fmt = "unix", oui = None, unique = True, registry = None):
+    """
+    Generate many random MAC addresses at once.
+
+    The bytes of the whole batch come from a single `os.urandom` call, the first octet of
+    every address is fixed with a translation table (unicast, locally administered) and
+    the batch is hex-formatted in one go, which is much cheaper per address than calling
+    `generate_random_mac` in a loop.
+
+    Parameters:
+        n (int): how many addresses to generate.
+        fmt (str): "unix", "macos" (colon-separated, lower-case) or "windows"
+                   (hyphen-separated, upper-case), case-insensitive. Defaults to "unix".
+        oui (str): optional vendor prefix such as "00:1a:2b". When given, the three first
+                   octets are taken as-is and only the three last ones are random.
+        unique (bool): guarantee that the batch holds no duplicate. Defaults to True.
+        registry (macregistry.MacRegistry): draw the addresses from this registry instead, so
+                   they are also distinct from every address it already holds (in any
+                   process sharing it), and record them there.
+
+    Returns:
+        list[str] or None: the addresses, None if the format is not recognized
+                           (and prints a warning message).
+
+    Raises:
+        ValueError: if oui is not three octets, or if more unique addresses are asked
+                    for than the OUI leaves room for.
+        RuntimeError: if the registry has no free address left.
+    """
+    fmt = fmt.lower()
+    if fmt not in ["unix", "macos", "windows"]:
+        print("Enter a carried OS : 1.Windows, 2.Unix, 3.MacOS")
+        return
+    if registry is not None:
+        return [format_mac(value, fmt) for value in registry.allocate_many(n, oui).ints()]
+    prefix = None
+    if oui is not None:
+        prefix = bytes.fromhex(oui.replace(":", "").replace("-", ""))
+        if len(prefix) != 3:
+            raise ValueError(f"an OUI is three octets, got {oui!r}")
+        if unique and n > 1 << 24:
+            raise ValueError(f"an OUI leaves room for {1 << 24} unique addresses, {n} were asked")
+    macs = _format_macs(_random_mac_bytes(n, prefix), fmt)
+    if unique:
+        seen = dict.fromkeys(macs)
+        while len(seen) < n:
+            seen.update(dict.fromkeys(_format_macs(_random_mac_bytes(n - len(seen), prefix), fmt)))
+        macs = list(seen)
+    return macs
+
+def change_mac(operating_system = 'unix', interface = 'eth0', backend = None, new_mac = None, live = False):
     """
     Changes the MAC address of a network interface based on the operating system.
 
-    This function generates a random MAC address and applies it to the specified
+    This function generates a random MAC address (unless one is given) and applies it to the specified
     network interface. It supports Unix/Linux, macOS, and Windows platforms, using
     OS-specific tools and methods.
 
@@ -119,6 +294,21 @@ def change_mac(operating_system = 'unix', interface = 'eth0'):
     interface : str, optional
         The name of the network interface to modify (e.g., 'eth0', 'Wi-Fi').
         Default is 'eth0'.
+    backend : str, optional
+        'auto', 'netlink', 'helper' or 'subprocess', defaults to DEFAULT_BACKEND. Only
+        used for 'unix' and 'macos': with netlink the link is cycled and re-addressed
+        over one rtnetlink socket instead of forking `ifconfig` and `macchanger`, and
+        the result is confirmed from link notifications (see linkwatch.py) instead of
+        re-reading the interface. With helper the whole change is one request to the
+        privileged helper process (see `set_helper`).
+    new_mac : str or Mac, optional
+        The address to apply, in any notation `Mac` understands. A random one is
+        generated when None (the default).
+    live : bool, optional
+        First try to change the address with the link left up, which drivers such as
+        veth, macvlan, dummy or any IFF_LIVE_ADDR_CHANGE device accept, and only fall
+        back to the down/set/up cycle when it is refused. Never possible on Windows,
+        where the adapter has to be restarted. Default is False.
 
     Returns
     -------
@@ -132,35 +322,80 @@ def change_mac(operating_system = 'unix', interface = 'eth0'):
 
     Notes
     -----
-    - For Unix/Linux: uses `ifconfig` and `macchanger`.
+    - For Unix/Linux: uses rtnetlink when available, else `ifconfig` and `macchanger`.
     - For macOS: uses `ifconfig` to manually set the MAC address.
     - For Windows: modifies the registry via `winreg` and restarts the interface using `netsh`.
     - Administrator/root privileges are required for all platforms.
     - Regarding windows winreg use, I was able to find a detailed code existing explaining how to find the register
     """
     os = operating_system.lower()
-    new_mac = generate_random_mac(os)
-    if os == "unix":
+    try:
+        new_mac = generate_random_mac(os) if new_mac is None else _mac_text(new_mac, os)
+    except (TypeError, ValueError) as e:
+        print("something occurred, please check", e)
+        return
+    if os == "unix" and _use_netlink(backend):
         try:
-            print(f'current MAC Address: {get_current_mac(os, interface)} \n Turn off eth0' )
-            subprocess.check_output(['ifconfig', interface, 'down']).decode(errors='ignore')
+            with LinkWatcher() as watcher:
+                print(f'current MAC Address: {_phase("read", interface, watcher.get_mac, interface)}')
+                start = time.perf_counter()
+                changed_live = live and _phase("live", interface, _live_change, os, interface, new_mac, backend)
+                if changed_live:
+                    print(f'{interface} re-addressed live, link kept up')
+                else:
+                    print(f'{"Live change refused, c" if live else "C"}ycle {interface} over netlink')
+                    _phase("set", interface, netlink.set_mac, interface, new_mac)
+                link = _phase("verify", interface, watcher.wait_for, interface, new_mac,
+                              None if changed_live else True, VERIFY_TIMEOUT)
+                if link is None:
+                    print(f'{interface} did not come back up with {new_mac} within {VERIFY_TIMEOUT}s')
+                    return
+                downtime = 0.0 if changed_live else watcher.downtime(interface, since=start)
+            if downtime is None:
+                return print(f'Success. new MAC Address: {netlink.bytes_to_mac(link.address)}')
+            return print(f'Success. new MAC Address: {netlink.bytes_to_mac(link.address)} (link down {downtime * 1000:.1f} ms)')
+        except Exception as e:
+            print("something occurred, please check", e)
+            return
+    elif _use_helper(os, backend):
+        try:
+            result = _helper_changes(os, {interface: new_mac}, live)[interface]
+            print(f'current MAC Address: {result.old_mac}')
+            if result.status != "changed":
+                raise result.error
+            if result.method == "live":
+                return print(f'Success live macchange, {interface} kept up. new MAC Address: {result.new_mac}')
+            return print(f'Success. new MAC Address: {result.new_mac} (link down {result.downtime * 1000:.1f} ms)')
+        except Exception as e:
+            print("something occurred, please check", e)
+            return
+    elif os == "unix":
+        try:
+            print(f'current MAC Address: {_phase("read", interface, get_current_mac, os, interface, backend)}')
+            if live and _phase("live", interface, _live_change, os, interface, new_mac, backend):
+                return print(f'Success live macchange, {interface} kept up. new MAC Address: {_phase("verify", interface, get_current_mac, os, interface, backend)}')
+            print(f'{"Live change refused, t" if live else "T"}urn off {interface}')
+            _phase("down", interface, subprocess.check_output, ['ifconfig', interface, 'down'])
             print('Success \n Start macchange')
-            subprocess.check_output(['macchanger', '-m', new_mac, interface]).decode(errors='ignore')
-            print('Success macchange \n Turn on eth0')
-            subprocess.check_output(['ifconfig', interface, 'up']).decode(errors='ignore')
-            return print(f'Success. new MAC Address: {get_current_mac('unix', 'eth0')}')
+            _phase("set", interface, subprocess.check_output, ['macchanger', '-m', new_mac, interface])
+            print(f'Success macchange \n Turn on {interface}')
+            _phase("up", interface, subprocess.check_output, ['ifconfig', interface, 'up'])
+            return print(f'Success. new MAC Address: {_phase("verify", interface, get_current_mac, os, interface, backend)}')
         except Exception as e:
             print("something occurred, please check", e)
             return
     elif os == 'macos':
         try:
-            print(f'current MAC Address: {get_current_mac(os, interface)} \n Turn off eth0')
-            subprocess.check_output(['ifconfig', interface, 'down']).decode(errors='ignore')
+            print(f'current MAC Address: {_phase("read", interface, get_current_mac, os, interface)}')
+            if live and _phase("live", interface, _live_change, os, interface, new_mac, backend):
+                return print(f'Success live macchange, {interface} kept up. new MAC Address: {_phase("verify", interface, get_current_mac, os, interface, backend)}')
+            print(f'{"Live change refused, t" if live else "T"}urn off {interface}')
+            _phase("down", interface, subprocess.check_output, ['ifconfig', interface, 'down'])
             print('Success \n Start macchange')
-            subprocess.check_output(['ifconfig', interface, 'ether',new_mac]).decode(errors='ignore')
-            print('Success macchange \n Turn on eth0')
-            subprocess.check_output(['ifconfig', interface, 'up']).decode(errors='ignore')
-            return print(f'Success. new MAC Address: {get_current_mac('unix', 'eth0')}')
+            _phase("set", interface, subprocess.check_output, ['ifconfig', interface, 'ether', new_mac])
+            print(f'Success macchange \n Turn on {interface}')
+            _phase("up", interface, subprocess.check_output, ['ifconfig', interface, 'up'])
+            return print(f'Success. new MAC Address: {_phase("verify", interface, get_current_mac, os, interface, backend)}')
         except Exception as e:
             print("something occurred, please check", e)
             return
@@ -169,35 +404,15 @@ def change_mac(operating_system = 'unix', interface = 'eth0'):
             print("winreg module is not available on this platform.")
             return
         try:
-            print(f'Current MAC: {get_current_mac(os, interface)}')
-
-            reg_path = r'SYSTEM\CurrentControlSet\Control\Class\{4d36e972-e325-11ce-bfc1-08002be10318}'
-            found = False
-            with winreg.ConnectRegistry(None, winreg.HKEY_LOCAL_MACHINE) as hklm:
-                with winreg.OpenKey(hklm, reg_path) as base_key:
-                    for i in range(1000):
-                        try:
-                            subkey_name = f"{i:04}"
-                            with winreg.OpenKey(base_key, subkey_name, 0, winreg.KEY_ALL_ACCESS) as subkey:
-                                try:
-                                    reg_mac = winreg.QueryValueEx(subkey, "NetCfgInstanceId")[0]
-                                    reg_desc = winreg.QueryValueEx(subkey, "DriverDesc")[0]
-                                    if interface.lower() in reg_desc.lower():
-                                        winreg.SetValueEx(subkey, "NetworkAddress", 0, winreg.REG_SZ,
-                                                          new_mac.replace(":", ""))
-                                        found = True
-                                        print(f"MAC changed in the register : {new_mac.replace('-', '')}")
-                                        break
-                                except FileNotFoundError:
-                                    continue
-                        except OSError:
-                            break
-            if not found:
+            print(f'Current MAC: {_phase("read", interface, get_current_mac, os, interface)}')
+
+            if not _phase("set", interface, _set_registry_mac, interface, new_mac):
                 print("Cannot found the interface in the register.")
                 return
+            print(f"MAC changed in the register : {new_mac.replace('-', '')}")
 
-            subprocess.check_call(['netsh', 'interface', 'set', 'interface', interface, 'admin=disable'])
-            subprocess.check_call(['netsh', 'interface', 'set', 'interface', interface, 'admin=enable'])
+            _phase("down", interface, subprocess.check_call, ['netsh', 'interface', 'set', 'interface', interface, 'admin=disable'])
+            _phase("up", interface, subprocess.check_call, ['netsh', 'interface', 'set', 'interface', interface, 'admin=enable'])
             print(f"Success macchange {interface}.")
 
         except Exception as e:
@@ -206,6 +421,268 @@ def change_mac(operating_system = 'unix', interface = 'eth0'):
     else:
         print("Enter a carried OS : 1.Windows, 2.Unix, 3.MacOS or an existing interface")
 
+def _adapter_index():
+    """The process-wide AdapterIndex of the Windows registry, built on first use."""
+    global _ADAPTER_INDEX
+    if _ADAPTER_INDEX is None:
+        _ADAPTER_INDEX = AdapterIndex(winreg)
+    return _ADAPTER_INDEX
+
+def _set_registry_mac(interface, new_mac):
+    """
+    Write new_mac as the NetworkAddress of the adapter whose DriverDesc contains interface.
+
+    The adapter is found through a cached index of the class key (see winregistry.py)
+    instead of opening every subkey, and only its subkey is opened with write access.
+
+    Returns:
+        bool: True if the adapter was found and written, False otherwise.
+    """
+    return _adapter_index().set_network_address(interface, new_mac)
+
+ChangeResult = namedtuple("ChangeResult", ["interface", "old_mac", "new_mac", "status", "error", "timings", "elapsed",
+                                           "downtime", "method"], defaults=(None, None))
+ChangeResult.__doc__ = """
+Outcome of one interface in `change_macs`.
+
+status is "changed", "failed" or "skipped" (not attempted because of fail_fast),
+error is the exception when status is "failed", timings maps each phase
+("read", "live", "down", "set", "up", "verify") to its duration in seconds and elapsed is the total.
+method is "live" when the address was changed with the link up, "cycle" when the link went
+down/set/up. downtime is how long the link was down: 0.0 for a live change, measured on the
+link notifications with netlink, from the end of the "down" step to the end of the "up" step otherwise.
+"""
+
+def _live_change(os, interface, new_mac, backend):
+    """
+    Try to set the address with the link left up.
+
+    Returns:
+        bool: True if it worked, False if the driver or the tool refused it (the caller then
+              cycles the link). Other errors, such as a missing interface, are raised.
+    """
+    if os == "unix" and _use_netlink(backend):
+        try:
+            with netlink.NetlinkSocket() as nl:
+                nl.set_link(interface, address=new_mac)
+        except OSError as e:
+            if e.errno in (errno.EBUSY, errno.EOPNOTSUPP, errno.EADDRNOTAVAIL):
+                return False
+            raise
+        return True
+    if os in ["unix", "macos"]:
+        command = ['macchanger', '-m', new_mac, interface] if os == "unix" else ['ifconfig', interface, 'ether', new_mac]
+        try:
+            subprocess.check_output(command, stderr=subprocess.STDOUT)
+        except subprocess.CalledProcessError:
+            return False
+        return True
+    return False
+
+def _cycle_link(os, interface, new_mac, backend, timings, marks):
+    """
+    Re-address one interface with the link cycled: down -> set -> up (set -> down -> up on
+    Windows), timing each phase into timings and its end time into marks.
+
+    Once "down" succeeded "up" always runs, even when "set" fails, so a refused address never
+    leaves the link down (as in netlink.set_mac). The netlink socket is closed on return.
+    """
+    def run(phase, step):
+        _timed(timings, phase, step)
+        marks[phase] = time.perf_counter()
+
+    def down_set_up(down, set_, up):
+        run("down", down)
+        try:
+            run("set", set_)
+        finally:
+            run("up", up)
+
+    if os == "unix" and _use_netlink(backend):
+        with netlink.NetlinkSocket() as nl:
+            down_set_up(lambda: nl.set_link(interface, up=False), lambda: nl.set_link(interface, address=new_mac),
+                        lambda: nl.set_link(interface, up=True))
+    elif os in ["unix", "macos"]:
+        command = ['macchanger', '-m', new_mac, interface] if os == "unix" else ['ifconfig', interface, 'ether', new_mac]
+        down_set_up(lambda: subprocess.check_output(['ifconfig', interface, 'down']),
+                    lambda: subprocess.check_output(command),
+                    lambda: subprocess.check_output(['ifconfig', interface, 'up']))
+    else:
+        if winreg is None:
+            raise OSError("winreg module is not available on this platform.")
+
+        def set_registry():
+            if not _set_registry_mac(interface, new_mac):
+                raise LookupError(f"Cannot found the interface {interface} in the register.")
+        run("set", set_registry)
+        run("down", lambda: subprocess.check_call(['netsh', 'interface', 'set', 'interface', interface, 'admin=disable']))
+        run("up", lambda: subprocess.check_call(['netsh', 'interface', 'set', 'interface', interface, 'admin=enable']))
+
+def _mac_text(mac, os):
+    """The address as the string the OS tools expect, from a Mac or any notation."""
+    if os not in ["unix", "macos", "windows"]:
+        return mac
+    return Mac(mac).format(os)
+
+def _phase(phase, interface, step, *args):
+    """Run step(*args) as one phase of change_mac, timed only when instrumentation is enabled."""
+    if instrument.collector is None:
+        return step(*args)
+    with instrument.collector.span("change_mac", phase, interface=interface):
+        return step(*args)
+
+def _timed(timings, phase, step, *args):
+    start = time.perf_counter()
+    try:
+        return step(*args)
+    finally:
+        timings[phase] = time.perf_counter() - start
+
+def _apply_change(os, interface, new_mac, backend, watcher = None, live = False):
+    """
+    Run read -> down -> set -> up -> verify on one interface and report it as a ChangeResult.
+
+    With a LinkWatcher, read and verify come from its cache and notifications instead of
+    querying the interface again. With live, read -> live -> verify is tried first and the
+    down -> set -> up steps only run if the live change is refused.
+    """
+    timings = {}
+    marks = {}
+    start = time.perf_counter()
+    old_mac = None
+    downtime = None
+    method = None
+    as_mac = isinstance(new_mac, Mac)
+    try:
+        if new_mac is None or new_mac == "random":
+            new_mac = generate_random_mac(os)
+        if watcher is not None:
+            old_mac = _timed(timings, "read", watcher.get_mac, interface)
+            if old_mac is None:
+                raise LookupError(f"no interface named {interface}")
+        else:
+            old_mac = _timed(timings, "read", _read_mac, os, interface, backend)
+        text = _mac_text(new_mac, os)
+        if live and _timed(timings, "live", _live_change, os, interface, text, backend):
+            method = "live"
+        else:
+            method = "cycle"
+            _cycle_link(os, interface, text, backend, timings, marks)
+        if watcher is not None:
+            up = True if method == "cycle" else None
+            link = _timed(timings, "verify", watcher.wait_for, interface, Mac(new_mac), up, VERIFY_TIMEOUT)
+            if link is None:
+                raise TimeoutError(f"{interface} did not come back up with {new_mac} within {VERIFY_TIMEOUT}s")
+            downtime = watcher.downtime(interface, since=start) if method == "cycle" else 0.0
+        else:
+            current = _timed(timings, "verify", _read_mac, os, interface, backend)
+            if current is None or Mac(current) != Mac(new_mac):
+                raise RuntimeError(f"{interface} reports {current} after the change, expected {new_mac}")
+            downtime = marks["up"] - marks["down"] if method == "cycle" else 0.0
+        status, error = "changed", None
+    except Exception as e:
+        status, error = "failed", e
+    if instrument.collector is not None:
+        for phase, seconds in timings.items():
+            instrument.collector.observe("change_mac", phase, seconds, interface=interface, status=status)
+    if as_mac and old_mac:
+        old_mac = Mac(old_mac)
+    return ChangeResult(interface, old_mac, new_mac, status, error, timings, time.perf_counter() - start, downtime,
+                        method)
+
+def _helper_changes(os, plan, live, fail_fast = False):
+    """Run a whole plan as one helper request and report it as ChangeResults, like change_macs."""
+    targets = {}
+    for interface, new_mac in plan.items():
+        targets[interface] = generate_random_mac(os) if new_mac is None or new_mac == "random" else new_mac
+    try:
+        replies = _helper(os).changes({interface: _mac_text(new_mac, os) for interface, new_mac in targets.items()},
+                                      live, stop_on_error=fail_fast)
+    except Exception as e:
+        replies = {interface: e for interface in targets}
+    results = {}
+    for interface, new_mac in targets.items():
+        reply = replies[interface]
+        if isinstance(reply, Exception):
+            results[interface] = ChangeResult(interface, None, new_mac, "failed", reply, {}, 0.0)
+            continue
+        value = reply.value or {}
+        old_mac = value.get("old")
+        if old_mac and isinstance(new_mac, Mac):
+            old_mac = Mac(old_mac)
+        status = {"ok": "changed", "failed": "failed"}.get(reply.status, "skipped")
+        results[interface] = ChangeResult(interface, old_mac, new_mac, status, reply.error, reply.timings,
+                                          reply.seconds, value.get("downtime"), value.get("method"))
+        if instrument.collector is not None:
+            for phase, seconds in reply.timings.items():
+                instrument.collector.observe("change_mac", phase, seconds, interface=interface, status=status)
+    return results
+
+def change_macs(plan, operating_system = 'unix', max_workers = 8, fail_fast = False, backend = None, live = False,
+                registry = None):
+    """
+    Change the MAC address of many interfaces in parallel.
+
+    Every interface goes through read -> down -> set -> up -> verify on its own worker
+    of a thread pool, so independent interfaces do not wait on each other. With netlink,
+    one LinkWatcher serves the whole batch: reads come from its cache and each verify
+    waits for the link notification instead of querying the interface. With the helper
+    backend the whole plan is one request to the helper, which changes the interfaces
+    without forking a command. Nothing is printed: the outcome of each interface is
+    returned instead.
+
+    Args:
+        plan (dict | iterable): interface -> new MAC address (str or Mac), or "random" (or None)
+                                for a freshly generated one. Pairs are accepted as well.
+                                Interfaces planned with a Mac get Macs in their ChangeResult.
+        operating_system (str): "unix", "macos" or "windows" (case-insensitive).
+        max_workers (int): how many interfaces are changed at the same time.
+        fail_fast (bool): stop starting new interfaces after the first failure, the ones not
+                          started are reported as "skipped". Best-effort (False) tries them all.
+        backend (str): "auto", "netlink", "helper" or "subprocess", see `change_mac`.
+        live (bool): try to change each address with the link up first, see `change_mac`.
+        registry (macregistry.MacRegistry): draw the "random" addresses from this registry, so
+                              no other user of it holds them; the addresses of the interfaces
+                              that were not changed are released again.
+
+    Returns:
+        dict: interface -> ChangeResult, in the order of the plan.
+              None if the OS is not recognized, and prints a warning message.
+    """
+    os = operating_system.lower()
+    if os not in ["windows", "unix", "macos"]:
+        print("Enter a carried OS : 1.Windows, 2.Unix, 3.MacOS")
+        return
+    plan = dict(plan)
+    if registry is not None:
+        drawn = [interface for interface, new_mac in plan.items() if new_mac is None or new_mac == "random"]
+        plan.update(zip(drawn, generate_random_macs(len(drawn), os, registry=registry)))
+        results = change_macs(plan, os, max_workers, fail_fast, backend, live)
+        registry.release_many(plan[interface] for interface in drawn if results[interface].status != "changed")
+        return results
+    if _use_helper(os, backend):
+        return _helper_changes(os, plan, live, fail_fast)
+    stop = threading.Event()
+    watcher = LinkWatcher().start() if os == "unix" and _use_netlink(backend) else None
+
+    def worker(interface, new_mac):
+        if stop.is_set():
+            return ChangeResult(interface, None, new_mac, "skipped", None, {}, 0.0)
+        result = _apply_change(os, interface, new_mac, backend, watcher, live)
+        if fail_fast and result.status == "failed":
+            stop.set()
+        return result
+
+    # Imported here: concurrent.futures pulls in logging, which single-interface commands do not need.
+    from concurrent.futures import ThreadPoolExecutor
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(plan) or 1))) as executor:
+            futures = [executor.submit(worker, interface, new_mac) for interface, new_mac in plan.items()]
+    finally:
+        if watcher is not None:
+            watcher.close()
+    return {future.result().interface: future.result() for future in futures}
+
 if __name__ == '__main__':
     new_mac = generate_random_mac('windows')
     change_mac('unix', 'eth0')
\ No newline at end of file
@@ -1,40 +1,514 @@
-import requests
-from random import choice
+import hashlib
+import os
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+try:
+    from . import instrument
+    from .uapool import UserAgentPool
+except ImportError:
+    import instrument
+    from uapool import UserAgentPool
+
+# requests (and httpconn, built on it) is imported by the functions sending requests, not
+# here: picking a User-Agent or changing a MAC address must not pay for loading it.
+
+STATIC_USER_AGENTS = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.6312.105 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 13_4_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.6312.105 Safari/537.36',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.6312.105 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:126.0) Gecko/20100101 Firefox/126.0',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 13.4; rv:126.0) Gecko/20100101 Firefox/126.0',
+    'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:126.0) Gecko/20100101 Firefox/126.0',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 13_4_1) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Safari/605.1.15',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.6312.105 Safari/537.36 Edg/123.0.2420.81',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 13_4_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.6312.105 Safari/537.36 Edg/123.0.2420.81',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.6312.105 Safari/537.36 Edg/123.0.2420.81',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (iPad; CPU OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.6312.105 Mobile Safari/537.36',
+    'Mozilla/5.0 (Android 14; Mobile; rv:126.0) Gecko/126.0 Firefox/126.0'
+)
+
+# Where the pool classifications (see uaparse.py) are kept across runs, e.g.
+# uaparse.DEFAULT_CACHE_PATH; None (the default) classifies in memory and writes no file.
+CLASSIFICATION_CACHE = None
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+StreamResult = namedtuple("StreamResult", ["url", "status", "headers", "length", "digest", "truncated", "user_agent",
+                                           "elapsed"])
+StreamResult.__doc__ = """
+Outcome of `UserAgentClient.download`: length is the number of body bytes read, digest the
+hex hash of those bytes, truncated is True when max_bytes cut the body short.
+"""
+
+_pool = None
+_pool_source = None
+_pool_lock = threading.Lock()
+_classify_lock = threading.Lock()
+
+def _load_pool(path=None, use_mmap=True):
+    if path is not None:
+        pool = UserAgentPool.from_file(path, use_mmap=use_mmap)
+    else:
+        try:
+            pool = UserAgentPool.from_fake_useragent()
+        except Exception:
+            pool = UserAgentPool(STATIC_USER_AGENTS)
+    return pool
+
+def get_useragent_pool():
+    """
+    Returns the process-wide User-Agent pool, loading it on first use.
+
+    The pool comes from the `fake_useragent` dataset (weighted by usage share) when the
+    library is available, from STATIC_USER_AGENTS otherwise, or from the file given to
+    `load_useragents`.
+
+    Returns:
+        UserAgentPool: the shared pool.
+    """
+    pool = _pool
+    if pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _set_pool(_load_pool(*(_pool_source or ())), _pool_source)
+            pool = _pool
+    return pool
+
+def _set_pool(pool, source):
+    global _pool, _pool_source
+    _pool, _pool_source = pool, source
+
+def load_useragents(path, use_mmap=True):
+    """
+    Replaces the pool with the User-Agents of a file, see `UserAgentPool.from_file`.
+
+    Args:
+        path (str): one User-Agent per line, optionally prefixed by a weight and a tab.
+        use_mmap (bool): map the file (True) or stream it line by line (False).
+
+    Returns:
+        UserAgentPool: the new pool.
+    """
+    pool = _load_pool(path, use_mmap)
+    with _pool_lock:
+        _set_pool(pool, (path, use_mmap))
+    return pool
+
+def reload():
+    """
+    Rebuilds the pool from its current source (the user file if one was loaded,
+    the default source otherwise), e.g. after the file was edited.
+
+    Returns:
+        UserAgentPool: the new pool.
+    """
+    with _pool_lock:
+        source = _pool_source
+    pool = _load_pool(*(source or ()))
+    with _pool_lock:
+        _set_pool(pool, source)
+    return pool
 
 def get_random_useragent():
     """
     Returns a random User-Agent string.
 
-    Attempts to use the `fake_useragent` library to generate a User-Agent.
-    If unavailable, falls back to a static list of common User-Agents
-    covering Chrome, Firefox, Safari, and Edge across Windows, macOS, and Linux.
+    Draws from the shared pool (see `get_useragent_pool`), which is loaded once: from the
+    `fake_useragent` library when available, or from a static list of common User-Agents
+    covering Chrome, Firefox, Safari, and Edge across Windows, macOS, Linux, iOS and Android.
 
     Returns:
         str: A random User-Agent string.
     """
+    return get_useragent_pool().random()
+
+def get_useragent(browser=None, engine=None, os=None, device=None, major=None):
+    """
+    Returns a random User-Agent of the shared pool matching the given classification.
+
+    The pool is classified (see uaparse.py) by the first call with criteria, through
+    CLASSIFICATION_CACHE when set; after that a selection is one index lookup and one draw,
+    whatever the pool size. `get_random_useragent` never classifies.
+
+    Args:
+        browser (str): e.g. "chrome", "firefox", "safari", "edge".
+        engine (str): "blink", "gecko", "webkit" or "trident".
+        os (str): e.g. "windows", "macos", "linux", "ios", "android".
+        device (str): "desktop", "mobile" or "tablet".
+        major (int): the browser major version.
+
+    Returns:
+        str: A matching User-Agent string, or None if the pool has none.
+    """
+    criteria = {"browser": browser, "engine": engine, "os": os, "device": device, "major": major}
+    criteria = {field: value for field, value in criteria.items() if value is not None}
+    pool = get_useragent_pool()
+    if criteria and pool.index is None:
+        with _classify_lock:
+            if pool.index is None:
+                pool.classify(CLASSIFICATION_CACHE)
+    return pool.pick(**criteria)
+
+class UserAgentClient:
+    """
+    An HTTP client sending every request with a custom or random User-Agent over one
+    shared `requests.Session`, so connections to a host are kept alive and reused.
+
+    Args:
+        pool_connections (int): how many hosts get a connection pool.
+        pool_maxsize (int): how many connections are kept open per host.
+        max_retries (int): retries of a failed connection or a retryable status (0 to disable).
+            Read timeouts are not retried, they raise `requests.ReadTimeout` right away.
+        backoff_factor (float): retries sleep backoff_factor * 2 ** (retry - 1) seconds.
+        status_forcelist (iterable[int]): statuses that are retried.
+        timeout (float | tuple): default (connect, read) timeout of each request, in seconds.
+        keep_alive (bool): False sends "Connection: close" and opens a connection per request.
+        cache (httpcache.ResponseCache | None): serve repeated GETs from this cache, revalidated
+            with conditional requests (streamed requests and requests with params bypass it).
+        dns_cache (dnscache.DnsCache | None): resolve the hosts of new connections through this
+            cache instead of the system resolver every time, see also `warm_up`.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, max_retries=2, backoff_factor=0.1,
+                 status_forcelist=(502, 503, 504), timeout=10, keep_alive=True, cache=None, dns_cache=None):
+        import requests
+        from urllib3.util.retry import Retry
+        try:
+            from .httpconn import TracedAdapter
+        except ImportError:
+            from httpconn import TracedAdapter
+        self.timeout = timeout
+        self.cache = cache
+        self.dns_cache = dns_cache
+        self.pool_maxsize = pool_maxsize
+        retry = Retry(total=max_retries, read=False, backoff_factor=backoff_factor,
+                      status_forcelist=tuple(status_forcelist),
+                      allowed_methods=frozenset(["GET", "HEAD", "OPTIONS"]), raise_on_status=False)
+        adapter = TracedAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry,
+                                dns_cache=dns_cache)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if not keep_alive:
+            self.session.headers["Connection"] = "close"
+
+    def get(self, url, user_agent=None, timeout=None, **kwargs):
+        """
+        Sends a GET request with a custom or random User-Agent.
+
+        Args:
+            url (str): The target URL.
+            user_agent (Optional[str]): A specific User-Agent string to use.
+                If None, a random one is selected.
+            timeout (float | tuple | None): overrides the default timeout of the client.
+            **kwargs: passed to `requests.Session.get` (params, headers, stream...).
+
+        Returns:
+            requests.Response: The HTTP response object.
+
+        Raises:
+            requests.RequestException: if the request fails.
+        """
+        if user_agent is None:
+            user_agent = get_random_useragent()
+        headers = dict(kwargs.pop("headers", None) or {})
+        timeout = self.timeout if timeout is None else timeout
+        if self.cache is not None and not kwargs.get("stream") and not kwargs.get("params"):
+            return self._cached_get(url, user_agent, headers, timeout, kwargs)
+        headers["User-Agent"] = user_agent
+        return self._send(url, headers, timeout, kwargs)
+
+    def _send(self, url, headers, timeout, kwargs):
+        collector = instrument.collector
+        if collector is None:
+            return self.session.get(url, headers=headers, timeout=timeout, **kwargs)
+        host = urlsplit(url).hostname
+        with collector.trace() as phases:
+            start = time.perf_counter()
+            response = self.session.get(url, headers=headers, timeout=timeout, **kwargs)
+            total = time.perf_counter() - start
+        # requests' elapsed runs from sending the request to parsing the headers, a new connection included.
+        elapsed = response.elapsed.total_seconds()
+        collector.observe("http", "ttfb", max(0.0, elapsed - sum(phases.values())), host=host)
+        if not kwargs.get("stream"):
+            collector.observe("http", "body", max(0.0, total - elapsed), host=host)
+        return response
+
+    def _cached_get(self, url, user_agent, headers, timeout, kwargs):
+        cache = self.cache
+        entry = cache.lookup(url, user_agent, headers)
+        if entry is not None and cache.is_fresh(entry):
+            cache.count_hit()
+            return _cached_response(entry, url)
+        request_headers = dict(headers)
+        request_headers["User-Agent"] = user_agent
+        if entry is not None:
+            request_headers.update(cache.conditional_headers(entry))
+        response = self._send(url, request_headers, timeout, kwargs)
+        if entry is not None and response.status_code == 304:
+            response.close()
+            entry = cache.refresh(entry, url, user_agent, headers, response.headers)
+            cache.count_hit()
+            return _cached_response(entry, url)
+        cache.count_miss()
+        cache.store(url, user_agent, headers, response.status_code, response.headers, response.content)
+        return response
+
+    def download(self, url, sink=None, user_agent=None, chunk_size=DEFAULT_CHUNK_SIZE, max_bytes=None,
+                 hash_name="sha256", timeout=None):
+        """
+        Streams the body of a GET request through a hash, and optionally into a file,
+        without keeping it in memory.
+
+        Args:
+            url (str): The target URL.
+            sink (str | os.PathLike | int | file | None): a path to write the body to, an open
+                file descriptor, an object with a `write` method, or None to only hash it.
+                A path is written to a temporary file next to it once the response headers
+                arrived, and renamed over it only for a 2xx response whose body was read
+                entirely (not cut by max_bytes): an error page, a partial body or a failed
+                request leave an existing file as it was, and no new file is created.
+            user_agent (Optional[str]): A specific User-Agent string to use.
+                If None, a random one is selected.
+            chunk_size (int): how many bytes are read at a time.
+            max_bytes (int | None): stop after this many bytes, the rest of the body is not read.
+            hash_name (str): any `hashlib` algorithm.
+            timeout (float | tuple | None): overrides the default timeout of the client.
+
+        Returns:
+            StreamResult: the status, headers, length and digest of what was read.
+
+        Raises:
+            requests.RequestException: if the request fails.
+            OSError: if the sink cannot be written.
+        """
+        if user_agent is None:
+            user_agent = get_random_useragent()
+        start = time.perf_counter()
+        digest = hashlib.new(hash_name)
+        length = 0
+        truncated = False
+        finish = None
+        completed = False
+        try:
+            with self.get(url, user_agent, timeout=timeout, stream=True) as response:
+                write, finish = _open_sink(sink)
+                body_start = time.perf_counter()
+                for chunk in iter_body(response, chunk_size):
+                    if max_bytes is not None and length + len(chunk) > max_bytes:
+                        chunk = chunk[:max_bytes - length]
+                        truncated = True
+                    digest.update(chunk)
+                    length += len(chunk)
+                    if write is not None:
+                        write(chunk)
+                    if truncated:
+                        break
+                if instrument.collector is not None:
+                    instrument.collector.observe("http", "body", time.perf_counter() - body_start,
+                                                 host=urlsplit(url).hostname)
+                result = StreamResult(url, response.status_code, response.headers, length, digest.hexdigest(),
+                                      truncated, user_agent, time.perf_counter() - start)
+            completed = 200 <= result.status < 300 and not truncated
+            return result
+        finally:
+            if finish is not None:
+                finish(completed)
+
+    def warm_up(self, urls, connections=1):
+        """
+        Prepare a burst of requests: resolve the host of each URL ahead of time (through the
+        DNS cache of the client, if any) and open keep-alive connections to it, left in the
+        pool for the next requests to that host.
+
+        urllib3 has no public way to open a pooled connection without sending a request, so
+        this takes connections with `HTTPConnectionPool._get_conn` and gives them back with
+        `_put_conn`, and checks them with the `is_connected` property of urllib3 2.x
+        connections. Where any of the three is missing, one HEAD request per host opens a
+        single connection instead. A connection that failed to open goes back
+        to the pool closed, so the next request starts from a fresh socket.
+
+        Args:
+            urls (iterable[str]): URLs, or "scheme://host[:port]", one per host.
+            connections (int): connections to have open per host, at most pool_maxsize.
+
+        Returns:
+            dict: url -> number of open connections in its pool, or the exception that stopped
+                  the warm-up of that host (the others are still warmed up).
+        """
+        urls = list(urls)
+        if self.dns_cache is not None:
+            self.dns_cache.prefetch(dict.fromkeys(urlsplit(url).hostname for url in urls))
+        connect_timeout = self.timeout[0] if isinstance(self.timeout, tuple) else self.timeout
+        results = {}
+        for url in urls:
+            taken = []
+            try:
+                pool = self._pool(url)
+                if not _takes_connections(pool):
+                    self.session.head(url, headers={"User-Agent": get_random_useragent()}, timeout=self.timeout).close()
+                    results[url] = 1
+                    continue
+                for _ in range(min(connections, self.pool_maxsize)):
+                    conn = pool._get_conn()
+                    taken.append(conn)
+                    if not conn.is_connected:
+                        conn.timeout = connect_timeout
+                        try:
+                            conn.connect()
+                        except BaseException:
+                            # E.g. a failed TLS handshake leaves the TCP socket open.
+                            conn.close()
+                            raise
+                results[url] = len(taken)
+            except Exception as e:
+                results[url] = e
+            finally:
+                for conn in taken:
+                    pool._put_conn(conn)
+        return results
+
+    def _pool(self, url):
+        """
+        The urllib3 pool requests picks for url: same TLS settings and proxies as a real
+        request, environment (REQUESTS_CA_BUNDLE, *_PROXY) included.
+        """
+        import requests
+        settings = self.session.merge_environment_settings(url, {}, None, None, None)
+        return self.session.get_adapter(url).get_connection_with_tls_context(
+            requests.Request("GET", url).prepare(), settings["verify"], settings["proxies"], settings["cert"])
+
+    def close(self):
+        """Closes every pooled connection."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _takes_connections(pool):
+    """
+    Whether pool has the urllib3 calls `UserAgentClient.warm_up` opens connections with:
+    the private `_get_conn` / `_put_conn`, and `is_connected` (urllib3 2.x connections only).
+    """
+    return (hasattr(pool, "_get_conn") and hasattr(pool, "_put_conn")
+            and hasattr(pool.ConnectionCls, "is_connected"))
+
+def _cached_response(entry, url):
+    """Rebuilds a requests.Response from a cache entry, flagged with `from_cache = True`."""
+    import requests
+    from requests.structures import CaseInsensitiveDict
+    from requests.utils import get_encoding_from_headers
+    response = requests.Response()
+    response.status_code = entry.status
+    response.reason = "OK"
+    response.headers = CaseInsensitiveDict(entry.headers)
+    response._content = entry.body
+    response.url = url
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.from_cache = True
+    return response
+
+def iter_body(response, chunk_size=DEFAULT_CHUNK_SIZE, max_bytes=None):
+    """
+    Yields the body of a response opened with `stream=True` chunk by chunk.
+
+    Args:
+        response (requests.Response): the streamed response, closed when the body ends or is cut.
+        chunk_size (int): how many bytes are read at a time.
+        max_bytes (int | None): stop after this many bytes, the last chunk is cut to fit.
+
+    Yields:
+        bytes: the next chunk of the (decoded) body.
+    """
+    remaining = max_bytes
     try:
-        from fake_useragent import UserAgent
-        ua = UserAgent()
-        return ua.random
-    except Exception:
-        static_user_agents = [
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.6312.105 Safari/537.36',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 13_4_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.6312.105 Safari/537.36',
-            'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.6312.105 Safari/537.36',
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:126.0) Gecko/20100101 Firefox/126.0',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 13.4; rv:126.0) Gecko/20100101 Firefox/126.0',
-            'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:126.0) Gecko/20100101 Firefox/126.0',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 13_4_1) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Safari/605.1.15',
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.6312.105 Safari/537.36 Edg/123.0.2420.81',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 13_4_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.6312.105 Safari/537.36 Edg/123.0.2420.81',
-            'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.6312.105 Safari/537.36 Edg/123.0.2420.81'
-        ]
-        return choice(static_user_agents)
+        for chunk in response.iter_content(chunk_size):
+            if remaining is not None:
+                if len(chunk) >= remaining:
+                    if remaining:
+                        yield chunk[:remaining]
+                    return
+                remaining -= len(chunk)
+            yield chunk
+    finally:
+        response.close()
+
+def _write_fd(fd):
+    def write(chunk):
+        view = memoryview(chunk)
+        while view:
+            view = view[os.write(fd, view):]
+    return write
+
+def _open_sink(sink):
+    """
+    Returns (write, finish) for a download sink, None for what is not needed.
+
+    A path is written to `path.<pid>.<thread>.part`; finish(True) renames it over the path,
+    finish(False) removes it.
+    """
+    if sink is None:
+        return None, None
+    if isinstance(sink, int):
+        return _write_fd(sink), None
+    if hasattr(sink, "write"):
+        return sink.write, None
+    path = os.fspath(sink)
+    part = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+    file = open(part, "wb")
+
+    def finish(completed):
+        renamed = False
+        try:
+            file.close()
+            if completed:
+                os.replace(part, path)
+                renamed = True
+        finally:
+            if not renamed:
+                try:
+                    os.unlink(part)
+                except OSError:
+                    pass
+    return file.write, finish
+
+_client = None
+
+def set_client(client):
+    """
+    Replaces the shared client of `make_request_with_useragent`, e.g. with one using a cache:
+    `set_client(UserAgentClient(cache=ResponseCache()))`. None goes back to the default client.
+    """
+    global _client
+    with _pool_lock:
+        _client = client
+
+def get_client():
+    """
+    Returns the process-wide UserAgentClient used by `make_request_with_useragent`,
+    created with the default settings on first use.
+    """
+    global _client
+    if _client is None:
+        with _pool_lock:
+            if _client is None:
+                _client = UserAgentClient()
+    return _client
 
 def make_request_with_useragent(url, user_agent=None):
     """
     Sends a GET request to the specified URL using a custom or random User-Agent.
 
+    The request goes through the shared client (see `get_client`), so successive
+    requests to the same host reuse its keep-alive connection.
+
     Args:
         url (str): The target URL.
         user_agent (Optional[str]): A specific User-Agent string to use.
@@ -43,8 +517,41 @@ def make_request_with_useragent(url, user_agent=None):
     Returns:
         Optional[requests.Response]: The HTTP response object, or None if an error occurs.
     """
+    import requests
+    if user_agent is None:
+        user_agent = get_random_useragent()
+    print(user_agent)
+    try:
+        return get_client().get(url, user_agent)
+    except requests.RequestException as e:
+        print("something occurred, please check", e)
+        return None
+
+def download_with_useragent(url, sink=None, user_agent=None, max_bytes=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                            hash_name="sha256"):
+    """
+    Streams the response of a GET request with a custom or random User-Agent, see
+    `UserAgentClient.download`. Memory use does not depend on the size of the body.
+
+    Args:
+        url (str): The target URL.
+        sink (str | int | file | None): where to write the body (path, file descriptor or file), None to only hash it.
+        user_agent (Optional[str]): A specific User-Agent string to use.
+            If None, a random one is selected.
+        max_bytes (int | None): stop after this many bytes.
+        chunk_size (int): how many bytes are read at a time.
+        hash_name (str): any `hashlib` algorithm.
+
+    Returns:
+        Optional[StreamResult]: the length and digest of the body, or None if the request
+                                fails or the sink cannot be written.
+    """
+    import requests
     if user_agent is None:
         user_agent = get_random_useragent()
     print(user_agent)
-    headers = {'User-Agent': user_agent}
-    return requests.get(url, headers=headers, timeout=10)
\ No newline at end of file
+    try:
+        return get_client().download(url, sink, user_agent, chunk_size, max_bytes, hash_name)
+    except (requests.RequestException, OSError) as e:
+        print("something occurred, please check", e)
+        return None
@@ -0,0 +1,226 @@
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from .. import spoof_useragent
+
+IFACE = "nltest0"
+PATTERN = bytes(range(256)) * 256
+
+
+def _ip(*args):
+    subprocess.run(["ip", *args], check=True, capture_output=True)
+
+
+@pytest.fixture(autouse=True)
+def _classification_cache(tmp_path_factory, monkeypatch):
+    """Classify the shared User-Agent pool through a cache file of the test run, never the user's."""
+    path = tmp_path_factory.getbasetemp() / "uaclass.json"
+    monkeypatch.setattr(spoof_useragent, "CLASSIFICATION_CACHE", str(path))
+
+
+@pytest.fixture(scope="module")
+def netns():
+    """
+    Run the test module inside a fresh network namespace holding one test link.
+
+    The link is a dummy when the kernel has the driver, one end of a veth pair otherwise.
+    Switching back to the original namespace at teardown destroys everything created.
+    Needs root on Linux, skipped elsewhere.
+    """
+    if not sys.platform.startswith("linux") or os.geteuid() != 0:
+        pytest.skip("network namespaces need root on Linux")
+    if shutil.which("ip") is None or not hasattr(os, "unshare"):
+        pytest.skip("needs iproute2 and os.unshare")
+    original = os.open("/proc/self/ns/net", os.O_RDONLY)
+    try:
+        os.unshare(os.CLONE_NEWNET)
+    except OSError as e:
+        os.close(original)
+        pytest.skip(f"cannot create a network namespace: {e}")
+    try:
+        try:
+            _ip("link", "add", IFACE, "type", "dummy")
+        except subprocess.CalledProcessError:
+            _ip("link", "add", IFACE, "type", "veth", "peer", "name", IFACE + "p")
+        _ip("link", "set", IFACE, "address", "02:00:00:00:00:aa")
+        yield IFACE
+    finally:
+        os.setns(original, os.CLONE_NEWNET)
+        os.close(original)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    httpbin-like routes of the local test server:
+    /headers (request headers as JSON), /status/<code>, /flaky (503 until server.flaky runs out),
+    /delay/<seconds>, /bytes/<n> (n bytes of PATTERN repeated), /chunked (chunked transfer encoding),
+    /cached/etag|lastmod|fresh|vary (cacheable bodies depending on server.version and on a
+    mobile User-Agent), /page/<lines> (a chunked HTML page, slightly different for a mobile
+    User-Agent and replaced for a bot), and any other path answers 200 with a short body.
+    HEAD requests are recorded too and answer 200 without a body.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are two writes: with Nagle, delayed ACKs stall each keep-alive response.
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, code, body, content_type="text/plain"):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        with self.server.lock:
+            self.server.requests.append((self.path, dict(self.headers)))
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests.append((self.path, dict(self.headers)))
+            self.server.active += 1
+            self.server.max_active = max(self.server.max_active, self.server.active)
+        try:
+            self._route(self.path.partition("?")[0].strip("/").split("/"))
+        finally:
+            with self.server.lock:
+                self.server.active -= 1
+
+    def _route(self, parts):
+        if parts[0] == "headers":
+            self._send(200, json.dumps({"headers": dict(self.headers)}).encode(), "application/json")
+        elif parts[0] == "status":
+            self._send(int(parts[1]), b"")
+        elif parts[0] == "flaky":
+            with self.server.lock:
+                failing = self.server.flaky > 0
+                self.server.flaky -= failing
+            self._send(503 if failing else 200, b"flaky")
+        elif parts[0] == "delay":
+            time.sleep(float(parts[1]))
+            self._send(200, b"late")
+        elif parts[0] == "bytes":
+            size = int(parts[1])
+            self.send_response(200)
+            self.send_header("Content-Length", str(size))
+            self.end_headers()
+            for offset in range(0, size, len(PATTERN)):
+                self.wfile.write(PATTERN[:size - offset])
+        elif parts[0] == "cached":
+            self._cached(parts[1])
+        elif parts[0] == "page":
+            self._page(int(parts[1]))
+        elif parts[0] == "chunked":
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for chunk in (b"hello ", b"chunked ", b"world"):
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self._send(200, b"ok")
+
+
+    def _page(self, lines):
+        user_agent = self.headers.get("User-Agent", "")
+        if "bot" in user_agent.lower():
+            parts = [b"<html><body><p>Access denied to automated clients.</p></body></html>"]
+        else:
+            mobile = "Mobile" in user_agent
+            menu = b"<nav>compact mobile menu</nav>" if mobile else b"<nav>full desktop menu with links</nav>"
+            paragraphs = (b"<p>Paragraph %d of the article, the same words for every client.</p>\n" % i
+                          for i in range(lines))
+            parts = itertools.chain([b"<html><body>" + menu], paragraphs, [b"</body></html>"])
+        self.send_response(200)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        # Generated as it is sent, in odd-sized chunks so tokens are split across chunks.
+        buffer = b""
+        for part in parts:
+            buffer += part
+            while len(buffer) >= 1021:
+                self.wfile.write(b"3fd\r\n%s\r\n" % buffer[:1021])
+                buffer = buffer[1021:]
+        if buffer:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(buffer), buffer))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _cached(self, kind):
+        mobile = "Mobile" in self.headers.get("User-Agent", "")
+        body = f"{kind} v{self.server.version} {'mobile' if mobile else 'desktop'}"
+        headers = {}
+        if kind == "etag":
+            headers["ETag"] = f'"v{self.server.version}-{int(mobile)}"'
+            not_modified = self.headers.get("If-None-Match") == headers["ETag"]
+        elif kind == "lastmod":
+            headers["Last-Modified"] = "Wed, 21 Oct 2015 07:28:00 GMT"
+            not_modified = self.headers.get("If-Modified-Since") == headers["Last-Modified"]
+        elif kind == "fresh":
+            headers["Cache-Control"] = "max-age=60"
+            not_modified = False
+        else:
+            language = self.headers.get("Accept-Language", "")
+            body += f" {language}"
+            headers["Vary"] = "Accept-Language"
+            headers["ETag"] = f'"{language}"'
+            not_modified = self.headers.get("If-None-Match") == headers["ETag"]
+        if not_modified:
+            self.send_response(304)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
+        self.send_response(200)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+
+@pytest.fixture
+def http_server():
+    """
+    A local HTTP/1.1 keep-alive server on 127.0.0.1, see `_Handler` for its routes.
+
+    The server object is yielded with its base URL in `url`; it counts the accepted
+    TCP connections in `connections`, records (path, headers) of each request in `requests`
+    and the highest number of requests handled at the same time in `max_active`.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.requests = []
+    server.flaky = 0
+    server.version = 1
+    server.active = 0
+    server.max_active = 0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
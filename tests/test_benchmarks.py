@@ -0,0 +1,63 @@
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+
+"""
+Unit tests for the benchmark suite (benchmarks/suite.py).
+
+The suite is a script, it is loaded from its path; only its cheap groups are run.
+"""
+
+
+@pytest.fixture(scope="module")
+def suite():
+    path = Path(__file__).resolve().parent.parent / "benchmarks" / "suite.py"
+    spec = importlib.util.spec_from_file_location("benchmark_suite", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _results(**values):
+    return {"metrics": {name: {"value": value, "unit": "x", "better": "higher" if name.endswith("rate") else "lower"}
+                        for name, value in values.items()}}
+
+
+# ----------------------
+# Tests for the benchmark suite
+# ----------------------
+
+def test_compare_flags_regressions_only(suite):
+    """Test the threshold in both directions, and metrics missing from the baseline."""
+    baseline = _results(fast=1.0, slow=1.0, rate=100.0, dropped_rate=100.0)
+    results = _results(fast=0.5, slow=1.3, rate=90.0, dropped_rate=70.0, new=5.0)
+    regressions = suite.compare(results, baseline, threshold=0.25)
+    assert [name for name, *_ in regressions] == ["slow", "dropped_rate"]
+    assert regressions[0][1:] == (1.0, 1.3, pytest.approx(0.3))
+
+
+def test_run_offline_writes_json(suite, tmp_path, capsys):
+    """Test a quick run with mocked commands, saved as baseline and compared with it."""
+    baseline = tmp_path / "baseline.json"
+    output = tmp_path / "results.json"
+    assert suite.main(["mac", "parsing", "--quick", "--baseline", str(baseline), "--save-baseline"]) == 0
+    stored = json.loads(baseline.read_text())
+    assert set(stored["metrics"]) == {"mac.generate_random_mac", "mac.generate_random_macs",
+                                      "parsing.get_all_macs.ifconfig", "parsing.get_all_macs.ipconfig",
+                                      "parsing.get_current_mac.ifconfig", "parsing.get_current_mac.ipconfig"}
+    assert all(value["value"] > 0 for value in stored["metrics"].values())
+
+    for value in stored["metrics"].values():
+        value["value"] /= 100
+    baseline.write_text(json.dumps(stored))
+    assert suite.main(["mac", "--quick", "--baseline", str(baseline), "--output", str(output)]) == 1
+    assert "REGRESSION mac.generate_random_mac" in capsys.readouterr().out
+    assert json.loads(output.read_text())["meta"]["quick"] is True
+
+
+def test_unknown_group(suite):
+    """Test that a typo in a group name is an error."""
+    with pytest.raises(SystemExit):
+        suite.main(["macs"])
@@ -0,0 +1,196 @@
+import socket
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from .. import instrument, spoof_useragent
+from ..dnscache import DnsCache, StaticResolver
+from ..httpconn import TracedHTTPConnection, TracedHTTPConnectionPool
+from ..spoof_useragent import UserAgentClient
+
+"""
+Unit tests for the `dnscache` module and the DNS cache / warm-up of UserAgentClient.
+
+Host names are answered by a StaticResolver, so nothing leaves the machine: "api.test"
+resolves to the local server of conftest.py.
+"""
+
+AGENT = "Mozilla/5.0 (X11; Linux x86_64; rv:126.0) Gecko/20100101 Firefox/126.0"
+
+
+def _url(server, host="api.test"):
+    return server.url.replace("127.0.0.1", host)
+
+
+# ----------------------
+# Tests for DnsCache
+# ----------------------
+
+def test_hits_misses_and_ports():
+    """Test that a host is resolved once, with the port of each lookup put in the addresses."""
+    resolver = StaticResolver({"api.test": ["10.0.0.1", "fd00::1"]})
+    cache = DnsCache(resolver)
+    first = cache.resolve("api.test", 80)
+    assert [info[4] for info in first] == [("10.0.0.1", 80), ("fd00::1", 80, 0, 0)]
+    assert [info[4] for info in cache.resolve("api.test", 443)] == [("10.0.0.1", 443), ("fd00::1", 443, 0, 0)]
+    assert resolver.calls == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["resolve_time"] >= stats["resolve_max"] > 0
+
+
+def test_ttl_expiry():
+    """Test that an answer is dropped when its TTL runs out, and that a TTL of 0 is never cached."""
+    resolver = StaticResolver({"api.test": "10.0.0.1"}, ttl=0.05)
+    cache = DnsCache(resolver)
+    cache.resolve("api.test")
+    cache.resolve("api.test")
+    time.sleep(0.06)
+    cache.resolve("api.test")
+    assert resolver.calls == 2 and cache.stats()["expired"] == 1
+    resolver.ttl = 0
+    cache.invalidate()
+    cache.resolve("api.test")
+    cache.resolve("api.test")
+    assert resolver.calls == 4
+
+
+def test_default_and_max_ttl():
+    """Test that answers without a TTL get default_ttl, and that max_ttl caps the others."""
+    cache = DnsCache(lambda host: (StaticResolver({host: "10.0.0.1"})(host)[0], None), default_ttl=0)
+    cache.resolve("api.test")
+    assert cache.stats()["entries"] == 0
+    cache = DnsCache(StaticResolver({"api.test": "10.0.0.1"}, ttl=10 ** 6), max_ttl=0)
+    cache.resolve("api.test")
+    assert cache.stats()["entries"] == 0
+
+
+def test_failures_addresses_and_eviction():
+    """Test that failures are counted but not cached, IP addresses skip the cache, and the LRU bound."""
+    resolver = StaticResolver({f"host{i}.test": f"10.0.0.{i}" for i in range(3)})
+    cache = DnsCache(resolver, max_entries=2)
+    for _ in range(2):
+        with pytest.raises(socket.gaierror):
+            cache.resolve("unknown.test")
+    assert cache.stats()["failures"] == 2
+    assert cache.resolve("127.0.0.1", 8080)[0][4] == ("127.0.0.1", 8080)
+    for i in (0, 1, 0, 2):
+        cache.resolve(f"host{i}.test")
+    calls = resolver.calls
+    cache.resolve("host0.test")
+    assert resolver.calls == calls
+    cache.resolve("host1.test")
+    assert resolver.calls == calls + 1
+
+
+def test_concurrent_misses_share_one_resolve():
+    """Test that threads missing on the same host at once wait for a single resolve, failures included."""
+    class SlowResolver(StaticResolver):
+        def __call__(self, host):
+            time.sleep(0.2)
+            return super().__call__(host)
+    resolver = SlowResolver({"api.test": "10.0.0.1"})
+    cache = DnsCache(resolver)
+    outcomes = []
+
+    def lookup(host):
+        try:
+            outcomes.append(cache.resolve(host, 80)[0][4])
+        except socket.gaierror as e:
+            outcomes.append(e)
+    for host in ("api.test", "unknown.test"):
+        threads = [threading.Thread(target=lookup, args=(host,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert outcomes[:8] == [("10.0.0.1", 80)] * 8
+    assert all(isinstance(outcome, socket.gaierror) for outcome in outcomes[8:])
+    stats = cache.stats()
+    assert resolver.calls == 2 and (stats["misses"], stats["shared"], stats["failures"]) == (2, 14, 1)
+
+
+def test_prefetch():
+    """Test resolving a list of hosts ahead of time, failures included."""
+    resolver = StaticResolver({"a.test": "10.0.0.1", "b.test": ["10.0.0.2", "10.0.0.3"]})
+    cache = DnsCache(resolver)
+    results = cache.prefetch(["a.test", "b.test", "c.test"])
+    assert (results["a.test"], results["b.test"]) == (1, 2)
+    assert isinstance(results["c.test"], socket.gaierror)
+    cache.resolve("b.test")
+    assert resolver.calls == 3 and cache.stats()["hits"] == 1
+
+
+# ----------------------
+# Tests for UserAgentClient
+# ----------------------
+
+def test_client_resolves_through_the_cache(http_server):
+    """Test that new connections to a host resolve it once, and that it shows in the dns phase."""
+    resolver = StaticResolver({"api.test": "127.0.0.1"})
+    collector = instrument.enable()
+    try:
+        with UserAgentClient(keep_alive=False, dns_cache=DnsCache(resolver)) as client:
+            for _ in range(5):
+                assert client.get(_url(http_server) + "/headers", AGENT).json()["headers"]["Host"].startswith("api.test")
+    finally:
+        instrument.disable()
+    assert http_server.connections == 5
+    assert resolver.calls == 1 and client.dns_cache.stats()["hits"] == 4
+    assert collector.histogram("http", "dns").count == 5
+
+
+def test_warm_up_opens_pooled_connections(http_server):
+    """Test that warmed-up connections are the ones later requests use."""
+    resolver = StaticResolver({"api.test": "127.0.0.1"})
+    with UserAgentClient(pool_maxsize=4, dns_cache=DnsCache(resolver)) as client:
+        results = client.warm_up([_url(http_server), "http://unknown.test:1/"], connections=3)
+        assert results[_url(http_server)] == 3 and isinstance(results["http://unknown.test:1/"], Exception)
+        deadline = time.monotonic() + 2
+        while http_server.connections < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert http_server.connections == 3 and http_server.requests == []
+        for _ in range(6):
+            assert client.get(_url(http_server) + "/ok", AGENT).status_code == 200
+    assert http_server.connections == 3
+    # api.test was resolved once, by the prefetch; unknown.test by the prefetch and its failed connection.
+    stats = client.dns_cache.stats()
+    assert resolver.calls == 3 and (stats["hits"], stats["misses"], stats["failures"]) == (3, 1, 2)
+
+
+def test_warm_up_closes_failed_connections(http_server):
+    """Test that a connection whose TLS handshake failed is not left open in the pool."""
+    url = http_server.url.replace("http://", "https://")
+    with UserAgentClient(dns_cache=DnsCache(StaticResolver({}))) as client:
+        results = client.warm_up([url], connections=2)
+        assert isinstance(results[url], Exception)
+        pooled = [conn for conn in list(client._pool(url).pool.queue) if conn is not None]
+        assert pooled and not any(conn.is_connected for conn in pooled)
+
+
+def test_warm_up_without_private_pool_api(http_server, monkeypatch):
+    """Test the HEAD request fallback, taken for pools of urllib3 1.x connections (no is_connected)."""
+    class Urllib3v1Pool:
+        ConnectionCls = type("HTTPConnection", (), {"sock": None})
+        _get_conn = _put_conn = None
+    assert spoof_useragent._takes_connections(TracedHTTPConnectionPool("127.0.0.1"))
+    assert not spoof_useragent._takes_connections(Urllib3v1Pool())
+    monkeypatch.setattr(spoof_useragent, "_takes_connections", lambda pool: False)
+    with UserAgentClient() as client:
+        assert client.warm_up([http_server.url], connections=3) == {http_server.url: 1}
+        assert client.get(http_server.url + "/ok", AGENT).status_code == 200
+    assert [path for path, _headers in http_server.requests] == ["/", "/ok"]
+    assert http_server.connections == 1
+
+
+def test_connect_keeps_the_ipv6_scope():
+    """Test that a new connection connects to the whole resolved address, scope id of fe80:: included."""
+    conn = TracedHTTPConnection("api.test", 8080, timeout=2)
+    address = ("fe80::1", 8080, 0, 3)
+    with patch("socket.socket") as sock:
+        assert conn._connect([(socket.AF_INET6, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", address)]) is sock.return_value
+    sock.assert_called_once_with(socket.AF_INET6, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.return_value.settimeout.assert_called_once_with(2)
+    sock.return_value.connect.assert_called_once_with(address)
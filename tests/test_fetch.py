@@ -0,0 +1,136 @@
+import asyncio
+import socket
+
+import pytest
+
+from .. import fetch
+from ..fetch import FetchResult, fetch_all, fetch_many
+
+"""
+Unit tests for the `fetch` module.
+
+Every request goes to the local keep-alive server of the `http_server` fixture (see conftest.py).
+"""
+
+
+def _closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# ----------------------
+# Tests for fetch_many
+# ----------------------
+
+def test_fetch_all_returns_one_result_per_url(http_server):
+    """Test that every URL gets its result, with the spoofed User-Agent sent."""
+    urls = [f"{http_server.url}/headers?i={i}" for i in range(20)]
+    results = fetch_all(urls, ua_policy="MyCustomUserAgent/1.0")
+    assert sorted(result.url for result in results) == sorted(urls)
+    assert all(result.status == 200 and result.error is None for result in results)
+    assert b'"User-Agent": "MyCustomUserAgent/1.0"' in results[0].body
+    assert results[0].headers["content-type"] == "application/json"
+
+
+def test_fetch_many_streams_in_completion_order(http_server):
+    """Test that a fast URL is yielded before a slower one started earlier."""
+    async def first():
+        async for result in fetch_many([f"{http_server.url}/delay/0.3", f"{http_server.url}/"]):
+            return result
+    assert asyncio.run(first()).url == f"{http_server.url}/"
+
+
+def test_fetch_many_limits_per_host(http_server):
+    """Test that no more than per_host requests hit one host at the same time."""
+    fetch_all([f"{http_server.url}/delay/0.05"] * 12, concurrency=10, per_host=3)
+    assert http_server.max_active == 3
+
+
+def test_fetch_many_limits_globally(http_server):
+    """Test the global limit across two hosts (127.0.0.1 and localhost) of the same server."""
+    port = http_server.server_address[1]
+    urls = [f"http://127.0.0.1:{port}/delay/0.05", f"http://localhost:{port}/delay/0.05"] * 6
+    fetch_all(urls, concurrency=2, per_host=5)
+    assert http_server.max_active == 2
+
+
+def test_fetch_many_busy_host_does_not_delay_others(http_server):
+    """Test that URLs queued behind a slow host leave the global slots to the other hosts."""
+    port = http_server.server_address[1]
+    urls = [f"http://127.0.0.1:{port}/delay/0.3"] * 12 + [f"http://localhost:{port}/?i={i}" for i in range(6)]
+
+    async def fast_results():
+        start = asyncio.get_running_loop().time()
+        finished = []
+        async for result in fetch_many(urls, concurrency=6, per_host=2):
+            if "localhost" in result.url:
+                finished.append(asyncio.get_running_loop().time() - start)
+        return finished
+    finished = asyncio.run(fast_results())
+    assert len(finished) == 6 and max(finished) < 0.3
+
+
+def test_fetch_many_reuses_connections(http_server):
+    """Test that sequential requests to one host share one keep-alive connection."""
+    results = fetch_all([f"{http_server.url}/"] * 10 + [f"{http_server.url}/chunked"], concurrency=1)
+    assert all(result.status == 200 for result in results)
+    assert results[-1].body == b"hello chunked world"
+    assert http_server.connections == 1
+
+
+def test_fetch_many_reports_partial_failures(http_server):
+    """Test that refused connections, timeouts and bad URLs are results, not exceptions."""
+    urls = [f"{http_server.url}/", f"http://127.0.0.1:{_closed_port()}/", f"{http_server.url}/delay/1",
+            "ftp://127.0.0.1/", f"{http_server.url}/status/404"]
+    results = {result.url: result for result in fetch_all(urls, timeout=0.3)}
+    assert results[urls[0]].status == 200
+    assert isinstance(results[urls[1]].error, ConnectionRefusedError)
+    assert isinstance(results[urls[2]].error, TimeoutError)
+    assert isinstance(results[urls[3]].error, ValueError)
+    assert results[urls[4]].status == 404 and results[urls[4]].error is None
+    assert results[urls[1]].status is None and results[urls[1]].body is None
+
+
+def test_fetch_many_per_host_user_agent(http_server):
+    """Test that the per-host policy keeps one User-Agent for every request to a host."""
+    results = fetch_all([f"{http_server.url}/"] * 5, ua_policy="per-host")
+    assert len({result.user_agent for result in results}) == 1
+    assert {headers["User-Agent"] for _path, headers in http_server.requests} == {results[0].user_agent}
+
+
+def test_fetch_many_stalled_consumer_bounds_requests(http_server, monkeypatch):
+    """Test that a consumer that stops pulling results stops the requests after the read-ahead."""
+    monkeypatch.setattr(fetch, "READ_AHEAD", 2)
+
+    async def stall():
+        stream = fetch_many([f"{http_server.url}/bytes/100000"] * 400, concurrency=2)
+        async for _result in stream:
+            await asyncio.sleep(0.5)
+            await stream.aclose()
+    asyncio.run(stall())
+    # 2 * 2 results waiting for the consumer, plus the one it took.
+    assert len(http_server.requests) <= 5
+
+
+def test_fetch_many_failing_urls_iterator(http_server):
+    """Test that an error raised by the URL iterator reaches the consumer instead of hanging it."""
+    def urls():
+        yield f"{http_server.url}/"
+        raise RuntimeError("no more URLs")
+
+    async def consume():
+        async with asyncio.timeout(5):
+            return [result async for result in fetch_many(urls())]
+    with pytest.raises(RuntimeError, match="no more URLs"):
+        asyncio.run(consume())
+
+
+def test_fetch_many_early_exit_closes_cleanly(http_server):
+    """Test that leaving the loop early cancels the pending fetches."""
+    async def take_one():
+        stream = fetch_many([f"{http_server.url}/"] + [f"{http_server.url}/delay/0.2"] * 5)
+        async for result in stream:
+            await stream.aclose()
+            return result
+    assert isinstance(asyncio.run(take_one()), FetchResult)
@@ -0,0 +1,123 @@
+from ..httpcache import ENTRY_OVERHEAD, ResponseCache, default_ua_class
+from ..spoof_useragent import UserAgentClient
+
+"""
+Unit tests for the `httpcache` module.
+
+The client tests run against the /cached routes of the local server (see conftest.py).
+"""
+
+DESKTOP = "Mozilla/5.0 (X11; Linux x86_64; rv:126.0) Gecko/20100101 Firefox/126.0"
+DESKTOP_2 = "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:126.0) Gecko/20100101 Firefox/126.0"
+MOBILE = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148 Safari/604.1"
+
+
+def _bodies_sent(server):
+    return sum(1 for path, headers in server.requests if "If-None-Match" not in headers
+               and "If-Modified-Since" not in headers)
+
+
+# ----------------------
+# Tests for ResponseCache
+# ----------------------
+
+def test_default_ua_class():
+    """Test the default mobile / desktop split."""
+    assert default_ua_class(MOBILE) == "mobile"
+    assert default_ua_class(DESKTOP) == "desktop"
+
+
+def test_store_skips_uncacheable_responses():
+    """Test that no-store, Vary: *, errors and responses without validator are not stored."""
+    cache = ResponseCache()
+    assert cache.store("http://a/", DESKTOP, {}, 200, {"ETag": '"1"', "Cache-Control": "no-store"}, b"x") is None
+    assert cache.store("http://a/", DESKTOP, {}, 200, {"ETag": '"1"', "Vary": "*"}, b"x") is None
+    assert cache.store("http://a/", DESKTOP, {}, 404, {"ETag": '"1"'}, b"x") is None
+    assert cache.store("http://a/", DESKTOP, {}, 200, {}, b"x") is None
+    assert len(cache) == 0
+
+
+def test_lru_size_eviction():
+    """Test that the least recently used entries go first when the size bound is exceeded."""
+    cache = ResponseCache(max_bytes=3 * (1000 + ENTRY_OVERHEAD))
+    for name in "abc":
+        cache.store(f"http://{name}/", DESKTOP, {}, 200, {"ETag": '"1"'}, b"x" * 1000)
+    assert cache.lookup("http://a/", DESKTOP) is not None
+    cache.store("http://d/", DESKTOP, {}, 200, {"ETag": '"1"'}, b"x" * 1000)
+    assert cache.lookup("http://b/", DESKTOP) is None
+    assert cache.lookup("http://a/", DESKTOP) is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.size <= cache.max_bytes
+
+
+def test_key_includes_ua_class_and_vary():
+    """Test that entries are separated by User-Agent class and by the headers named in Vary."""
+    cache = ResponseCache()
+    cache.store("http://a/", DESKTOP, {"Accept-Language": "fr"}, 200, {"ETag": '"fr"', "Vary": "Accept-Language"}, b"fr")
+    assert cache.lookup("http://a/", DESKTOP_2, {"Accept-Language": "fr"}).body == b"fr"
+    assert cache.lookup("http://a/", DESKTOP, {"Accept-Language": "en"}) is None
+    assert cache.lookup("http://a/", MOBILE, {"Accept-Language": "fr"}) is None
+
+
+def test_disk_store_survives_process(tmp_path):
+    """Test that a new cache on the same directory finds the entries, Vary included."""
+    first = ResponseCache(directory=str(tmp_path))
+    first.store("http://a/", DESKTOP, {}, 200, {"ETag": '"1"'}, b"plain")
+    first.store("http://v/", DESKTOP, {"Accept-Language": "fr"}, 200, {"ETag": '"fr"', "Vary": "Accept-Language"}, b"fr")
+    second = ResponseCache(directory=str(tmp_path))
+    assert second.lookup("http://a/", DESKTOP).body == b"plain"
+    assert second.lookup("http://v/", DESKTOP, {"Accept-Language": "fr"}).body == b"fr"
+    assert second.lookup("http://v/", DESKTOP, {"Accept-Language": "en"}) is None
+
+
+# ----------------------
+# Tests for UserAgentClient with a cache
+# ----------------------
+
+def test_client_revalidates_with_etag(http_server):
+    """Test that a repeated GET costs a 304 and returns the stored body."""
+    cache = ResponseCache()
+    with UserAgentClient(cache=cache) as client:
+        first = client.get(http_server.url + "/cached/etag", DESKTOP)
+        second = client.get(http_server.url + "/cached/etag", DESKTOP_2)
+        assert second.text == first.text == "etag v1 desktop"
+        assert second.from_cache
+        http_server.version = 2
+        assert client.get(http_server.url + "/cached/etag", DESKTOP).text == "etag v2 desktop"
+    assert http_server.requests[1][1]["If-None-Match"] == '"v1-0"'
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["revalidations"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_client_revalidates_with_last_modified(http_server):
+    """Test revalidation through If-Modified-Since."""
+    cache = ResponseCache()
+    with UserAgentClient(cache=cache) as client:
+        for _ in range(3):
+            assert client.get(http_server.url + "/cached/lastmod", DESKTOP).text == "lastmod v1 desktop"
+    assert _bodies_sent(http_server) == 1
+    assert cache.stats()["revalidations"] == 2
+
+
+def test_client_serves_fresh_entries_without_request(http_server):
+    """Test that an entry within its max-age is served without contacting the server."""
+    cache = ResponseCache()
+    with UserAgentClient(cache=cache) as client:
+        for _ in range(3):
+            client.get(http_server.url + "/cached/fresh", DESKTOP)
+    assert len(http_server.requests) == 1
+    assert cache.stats()["hits"] == 2
+
+
+def test_client_keeps_classes_apart(http_server):
+    """Test that desktop and mobile clients get their own variant of a page."""
+    cache = ResponseCache()
+    with UserAgentClient(cache=cache) as client:
+        assert client.get(http_server.url + "/cached/etag", DESKTOP).text == "etag v1 desktop"
+        assert client.get(http_server.url + "/cached/etag", MOBILE).text == "etag v1 mobile"
+        assert client.get(http_server.url + "/cached/etag", MOBILE).text == "etag v1 mobile"
+        client.get(http_server.url + "/cached/vary", DESKTOP, headers={"Accept-Language": "fr"})
+        assert client.get(http_server.url + "/cached/vary", DESKTOP, headers={"Accept-Language": "en"}).text \
+            == "vary v1 desktop en"
+    assert cache.stats()["misses"] == 4
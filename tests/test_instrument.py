@@ -0,0 +1,171 @@
+import json
+import logging
+import shutil
+import ssl
+import subprocess
+import threading
+from http.server import ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from .. import instrument
+from ..fetch import fetch_all
+from ..instrument import Collector, Histogram
+from ..spoof_mac import change_mac, change_macs
+from ..spoof_useragent import UserAgentClient
+from .conftest import _Handler
+from .test_spoof_mac import FakeIfconfig
+
+"""
+Unit tests for the `instrument` module and the phases timed by spoof_mac, spoof_useragent and fetch.
+
+HTTP phases are measured against the local server of the `http_server` fixture (see conftest.py),
+and TLS against the same handler behind a self-signed certificate.
+"""
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64; rv:126.0) Gecko/20100101 Firefox/126.0"
+
+
+@pytest.fixture
+def collector():
+    """An enabled process-wide collector, removed after the test."""
+    try:
+        yield instrument.enable()
+    finally:
+        instrument.disable()
+
+
+@pytest.fixture
+def https_server(tmp_path):
+    """The handler of the http_server fixture behind TLS, with its certificate in `cafile`."""
+    if shutil.which("openssl") is None:
+        pytest.skip("needs openssl to create a certificate")
+    cert, key = tmp_path / "cert.pem", tmp_path / "key.pem"
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=localhost",
+                    "-addext", "subjectAltName=DNS:localhost", "-keyout", str(key), "-out", str(cert)],
+                   check=True, capture_output=True)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = server.active = server.max_active = 0
+    server.requests = []
+    server.url = f"https://localhost:{server.server_address[1]}"
+    server.cafile = str(cert)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+# ----------------------
+# Tests for Collector
+# ----------------------
+
+def test_histogram_buckets():
+    """Test bucket placement, cumulative counts and min / max."""
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+    assert histogram.cumulative() == [(0.1, 2), (1.0, 3), (float("inf"), 4)]
+    assert (histogram.count, histogram.min, histogram.max) == (4, 0.05, 3.0)
+    assert histogram.sum == pytest.approx(3.65)
+
+
+def test_hooks_receive_events(caplog):
+    """Test that hooks get one event per phase and that a failing hook is only logged."""
+    events = []
+    collector = Collector(hooks=[events.append])
+    collector.add_hook(lambda event: 1 / 0)
+    with caplog.at_level(logging.ERROR):
+        with collector.span("change_mac", "down", interface="eth0"):
+            pass
+    assert [(event.name, event.phase, event.labels) for event in events] == [("change_mac", "down", {"interface": "eth0"})]
+    assert events[0].duration >= 0
+    assert "instrumentation hook" in caplog.text
+
+
+def test_exports():
+    """Test the JSON and Prometheus text exports."""
+    collector = Collector(buckets=(0.01, 0.1))
+    collector.observe("http", "ttfb", 0.005)
+    collector.observe("http", "ttfb", 0.05)
+    collector.observe("http", "body", 1.0)
+    data = json.loads(json.dumps(collector.to_json()))
+    assert data["http"]["ttfb"]["buckets"] == {"0.01": 1, "0.1": 2, "+Inf": 2}
+    assert data["http"]["body"]["count"] == 1
+    text = collector.to_prometheus()
+    assert "# TYPE spoof_tool_http_phase_seconds histogram" in text
+    assert 'spoof_tool_http_phase_seconds_bucket{phase="ttfb",le="+Inf"} 2' in text
+    assert 'spoof_tool_http_phase_seconds_count{phase="body"} 1' in text
+    collector.reset()
+    assert collector.to_prometheus() == ""
+
+
+def test_disabled_is_a_no_op():
+    """Test that nothing is collected while instrumentation is disabled."""
+    instrument.disable()
+    assert instrument.span("change_mac", "read") is instrument.span("http", "dns")
+    with instrument.span("change_mac", "read"):
+        pass
+    assert instrument.collector is None
+
+
+# ----------------------
+# Tests for the instrumented operations
+# ----------------------
+
+def test_change_macs_phases(collector):
+    """Test the read / down / set / up / verify phases of a batch."""
+    events = []
+    collector.add_hook(events.append)
+    fake = FakeIfconfig({"veth0": "aa:bb:cc:dd:ee:00", "veth1": "aa:bb:cc:dd:ee:01"})
+    with patch('subprocess.check_output', side_effect=fake):
+        change_macs({"veth0": "random", "veth1": "random"}, 'unix', backend="subprocess")
+    assert set(collector.to_json()["change_mac"]) == {"read", "down", "set", "up", "verify"}
+    assert collector.histogram("change_mac", "down").count == 2
+    assert {event.labels["interface"] for event in events} == {"veth0", "veth1"}
+
+
+def test_change_mac_phases(collector, capsys):
+    """Test that the printing change_mac times the same phases."""
+    fake = FakeIfconfig({"veth0": "aa:bb:cc:dd:ee:00"})
+    with patch('subprocess.check_output', side_effect=fake):
+        change_mac('unix', 'veth0', backend="subprocess")
+    assert "Success. new MAC Address" in capsys.readouterr().out
+    assert set(collector.to_json()["change_mac"]) == {"read", "down", "set", "up", "verify"}
+
+
+def test_client_phases(collector, http_server):
+    """Test dns / connect once per connection, ttfb / body once per request."""
+    with UserAgentClient() as client:
+        for _ in range(3):
+            client.get(http_server.url + "/bytes/1000", USER_AGENT)
+    phases = collector.to_json()["http"]
+    assert phases["dns"]["count"] == phases["connect"]["count"] == 1
+    assert phases["ttfb"]["count"] == phases["body"]["count"] == 3
+    assert "tls" not in phases
+
+
+def test_client_tls_phase(collector, https_server):
+    """Test the tls phase of an https connection."""
+    with UserAgentClient() as client:
+        assert client.get(https_server.url + "/", USER_AGENT, verify=https_server.cafile).text == "ok"
+    phases = collector.to_json()["http"]
+    assert phases["tls"]["count"] == 1
+    assert phases["tls"]["sum"] > 0
+
+
+def test_fetch_phases(collector, https_server):
+    """Test the phases of fetch_many, TLS included."""
+    context = ssl.create_default_context(cafile=https_server.cafile)
+    results = fetch_all([https_server.url + "/"] * 4, concurrency=1, ssl_context=context)
+    assert all(result.status == 200 for result in results)
+    phases = collector.to_json()["http"]
+    assert phases["dns"]["count"] == phases["connect"]["count"] == phases["tls"]["count"] == 1
+    assert phases["ttfb"]["count"] == phases["body"]["count"] == 4
@@ -0,0 +1,164 @@
+from unittest.mock import patch
+
+import pytest
+
+from ..interfaces import Interface, InterfaceTable, snapshot
+
+"""
+Unit tests for the `interfaces` module.
+
+The snapshot sources are fed with recorded command outputs and a fake sysfs tree,
+so no real interface is read.
+"""
+
+NET_TOOLS_IFCONFIG = """\
+eth0: flags=4163<UP,BROADCAST,RUNNING,MULTICAST>  mtu 1500
+        inet 192.168.1.10  netmask 255.255.255.0  broadcast 192.168.1.255
+        ether ab:cd:ef:12:34:56  txqueuelen 1000  (Ethernet)
+
+lo: flags=73<UP,LOOPBACK,RUNNING>  mtu 65536
+        inet 127.0.0.1  netmask 255.0.0.0
+        loop  txqueuelen 1000  (Local Loopback)
+
+wlan0: flags=4099<UP,BROADCAST,MULTICAST>  mtu 1500
+        ether 02:11:22:33:44:55  txqueuelen 1000  (Ethernet)
+"""
+
+OLD_NET_TOOLS_IFCONFIG = """\
+eth0      Link encap:Ethernet  HWaddr 00:1A:2B:3C:4D:5E
+          inet addr:192.168.1.10  Bcast:192.168.1.255  Mask:255.255.255.0
+          UP BROADCAST RUNNING MULTICAST  MTU:1500  Metric:1
+"""
+
+MACOS_IFCONFIG = """\
+lo0: flags=8049<UP,LOOPBACK,RUNNING,MULTICAST> mtu 16384
+\tinet 127.0.0.1 netmask 0xff000000
+en0: flags=8863<UP,BROADCAST,SMART,RUNNING,SIMPLEX,MULTICAST> mtu 1500
+\tether a2:bc:de:f1:23:45
+\tinet 192.168.1.20 netmask 0xffffff00 broadcast 192.168.1.255
+"""
+
+IPCONFIG_ALL = """\
+Windows IP Configuration
+
+   Host Name . . . . . . . . . . . . : MY-COMPUTER
+   Primary Dns Suffix  . . . . . . . :
+
+Ethernet adapter Ethernet:
+
+   Connection-specific DNS Suffix  . : localdomain
+   Description . . . . . . . . . . . : Intel(R) Ethernet Connection
+   Physical Address. . . . . . . . . : AB-CD-EF-12-34-56
+   DHCP Enabled. . . . . . . . . . . : Yes
+
+Wireless LAN adapter Wi-Fi:
+
+   Description . . . . . . . . . . . : Realtek Wireless
+   Physical Address. . . . . . . . . : 02-11-22-33-44-55
+"""
+
+
+# ----------------------
+# Tests for InterfaceTable
+# ----------------------
+
+def test_table_mapping_behaviour():
+    """Test that the table behaves like a name -> Interface mapping."""
+    table = InterfaceTable([Interface("eth0", "ab:cd:ef:12:34:56", 2), Interface("lo", "00:00:00:00:00:00", 1)])
+    assert len(table) == 2
+    assert "eth0" in table and "wlan0" not in table
+    assert table["eth0"].index == 2
+    assert table.get("wlan0") is None
+    assert table.macs() == {"eth0": "ab:cd:ef:12:34:56", "lo": "00:00:00:00:00:00"}
+
+
+def test_table_find_matches_description():
+    """Test that find() falls back to a substring of the name or the description."""
+    table = InterfaceTable.from_ipconfig(IPCONFIG_ALL)
+    assert table.find("Wi-Fi").mac == "02-11-22-33-44-55"
+    assert table.mac("Intel") == "AB-CD-EF-12-34-56"
+    assert table.mac("Bluetooth") is None
+
+
+# ----------------------
+# Tests for the snapshot sources
+# ----------------------
+
+def test_from_ifconfig_net_tools():
+    """Test parsing a net-tools `ifconfig -a`, flags are decimal on Linux."""
+    table = InterfaceTable.from_ifconfig(NET_TOOLS_IFCONFIG)
+    assert list(table) == ["eth0", "lo", "wlan0"]
+    assert table["eth0"] == Interface("eth0", "ab:cd:ef:12:34:56", None, 4163, 1500)
+    assert table["lo"].mac is None
+    assert table["wlan0"].mac == "02:11:22:33:44:55"
+
+
+def test_from_ifconfig_old_net_tools():
+    """Test parsing the old `Link encap` layout."""
+    table = InterfaceTable.from_ifconfig(OLD_NET_TOOLS_IFCONFIG)
+    assert table["eth0"].mac == "00:1a:2b:3c:4d:5e"
+    assert table["eth0"].mtu == 1500
+
+
+def test_from_ifconfig_macos():
+    """Test parsing a macOS `ifconfig -a`, flags are hexadecimal there."""
+    table = InterfaceTable.from_ifconfig(MACOS_IFCONFIG, hex_flags=True)
+    assert table["en0"] == Interface("en0", "a2:bc:de:f1:23:45", None, 0x8863, 1500)
+    assert table["lo0"].mtu == 16384
+
+
+def test_from_ipconfig():
+    """Test parsing `ipconfig /all`, the global section is not an adapter."""
+    table = InterfaceTable.from_ipconfig(IPCONFIG_ALL)
+    assert list(table) == ["Ethernet", "Wi-Fi"]
+    assert table["Ethernet"].description == "Intel(R) Ethernet Connection"
+
+
+def test_from_sysfs(tmp_path):
+    """Test reading a /sys/class/net like tree."""
+    for name, address, index, flags, mtu in [("eth0", "ab:cd:ef:12:34:56", "2", "0x1003", "1500"),
+                                             ("lo", "00:00:00:00:00:00", "1", "0x9", "65536")]:
+        directory = tmp_path / name
+        directory.mkdir()
+        (directory / "address").write_text(address + "\n")
+        (directory / "ifindex").write_text(index + "\n")
+        (directory / "flags").write_text(flags + "\n")
+        (directory / "mtu").write_text(mtu + "\n")
+    table = InterfaceTable.from_sysfs(str(tmp_path))
+    assert table["eth0"] == Interface("eth0", "ab:cd:ef:12:34:56", 2, 0x1003, 1500)
+    assert table["lo"].index == 1
+
+
+# ----------------------
+# Tests for snapshot
+# ----------------------
+
+@patch("subprocess.check_output")
+def test_snapshot_windows_runs_one_command(mock_check_output):
+    """Test that a Windows snapshot costs a single ipconfig."""
+    mock_check_output.return_value = IPCONFIG_ALL.encode()
+    table = snapshot("windows")
+    mock_check_output.assert_called_once_with(['ipconfig', '/all'])
+    assert table.mac("Wi-Fi") == "02-11-22-33-44-55"
+
+
+@patch("subprocess.check_output")
+def test_snapshot_macos_runs_one_command(mock_check_output):
+    """Test that a macOS snapshot costs a single ifconfig -a."""
+    mock_check_output.return_value = MACOS_IFCONFIG.encode()
+    table = snapshot("macos")
+    mock_check_output.assert_called_once_with(['ifconfig', '-a'])
+    assert table.mac("en0") == "a2:bc:de:f1:23:45"
+
+
+def test_snapshot_invalid_os():
+    """Test that an unsupported OS is rejected."""
+    with pytest.raises(ValueError):
+        snapshot("beos")
+
+
+def test_from_ip_link():
+    """Test building the snapshot from `ip -o link`."""
+    table = InterfaceTable.from_ip_link(
+        "2: eth0: <BROADCAST,MULTICAST,UP,LOWER_UP> mtu 1500 qdisc fq_codel state UP\\    link/ether 52:54:00:12:34:56 brd ff:ff:ff:ff:ff:ff\n")
+    assert table["eth0"] == Interface("eth0", "52:54:00:12:34:56", 2, 0x11003, 1500)
@@ -0,0 +1,131 @@
+import errno
+import subprocess
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from .. import netlink
+from .. import spoof_mac
+from ..linkwatch import LinkWatcher
+from ..macaddr import Mac
+
+"""
+Unit tests for the `linkwatch` module.
+
+Most of them need root on Linux and run in the throwaway network namespace of the `netns`
+fixture (see conftest.py). Changes are made with `ip` or netlink and observed only
+through the watcher's notifications. The failing watcher test reads from a stand-in socket.
+"""
+
+
+def _ip(*args):
+    subprocess.run(["ip", *args], check=True, capture_output=True)
+
+
+@pytest.fixture
+def watcher(netns):
+    with LinkWatcher(poll_interval=0.05) as watcher:
+        yield watcher
+
+
+def test_initial_state(netns, watcher):
+    """Test that the cache is filled from the dump at start."""
+    assert watcher.get(netns).name == netns
+    assert watcher.get("doesnotexist0") is None
+    assert netns in watcher.table()
+    assert "lo" in watcher.table()
+
+
+def test_wait_for_external_change(netns, watcher):
+    """Test that a change made by another tool is seen through notifications."""
+    _ip("link", "set", netns, "address", "02:00:00:00:01:01")
+    link = watcher.wait_for(netns, address="02:00:00:00:01:01", timeout=2)
+    assert link is not None
+    assert watcher.get_mac(netns) == "02:00:00:00:01:01"
+
+
+def test_wait_for_timeout(netns, watcher):
+    """Test that an unmet expectation returns None after the timeout."""
+    start = time.perf_counter()
+    assert watcher.wait_for(netns, address=Mac("02:ff:ff:ff:ff:ff"), timeout=0.2) is None
+    assert time.perf_counter() - start >= 0.2
+
+
+def test_downtime(netns, watcher):
+    """Test that a down -> up cycle is timed from its notifications."""
+    with netlink.NetlinkSocket() as nl:
+        nl.set_link(netns, up=True)
+        assert watcher.wait_for(netns, up=True, timeout=2)
+        start = time.perf_counter()
+        nl.set_link(netns, up=False)
+        assert watcher.wait_for(netns, up=False, timeout=2)
+        time.sleep(0.05)
+        nl.set_link(netns, up=True)
+    assert watcher.wait_for(netns, up=True, timeout=2)
+    assert watcher.downtime(netns, since=start) >= 0.05
+    assert watcher.downtime(netns, since=time.perf_counter()) is None
+
+
+def test_links_added_and_removed(netns, watcher):
+    """Test that new and deleted links show up in the cache."""
+    _ip("link", "add", "lwtest0", "type", "veth", "peer", "name", "lwtest1")
+    assert watcher.wait_for("lwtest0", timeout=2) is not None
+    _ip("link", "del", "lwtest0")
+    deadline = time.monotonic() + 2
+    while watcher.get("lwtest0") is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert watcher.get("lwtest0") is None
+
+
+def test_change_mac_waits_on_notifications(netns, capsys):
+    """Test that change_mac confirms the change from the watcher, without re-reading the link."""
+    with patch.object(spoof_mac, "generate_random_mac", return_value="02:00:00:00:01:02"), \
+            patch.object(netlink, "get_mac", side_effect=AssertionError("re-polled")):
+        spoof_mac.change_mac("unix", netns, backend="netlink")
+    output = capsys.readouterr().out
+    assert "Success. new MAC Address: 02:00:00:00:01:02 (link down" in output
+
+
+def test_change_macs_reports_downtime(netns):
+    """Test that a netlink batch verifies through the watcher and reports the link downtime."""
+    with patch.object(netlink, "get_mac", side_effect=AssertionError("re-polled")):
+        results = spoof_mac.change_macs({netns: "02:00:00:00:01:03"}, "unix", backend="netlink")
+    result = results[netns]
+    assert result.status == "changed", result.error
+    assert result.downtime is not None and result.downtime >= 0
+    assert set(result.timings) == {"read", "down", "set", "up", "verify"}
+
+
+class _BrokenSocket:
+    def recv(self, size):
+        raise OSError(errno.EBADF, "Bad file descriptor")
+
+    def close(self):
+        pass
+
+
+def test_thread_error_is_raised_by_reads():
+    """Test that an error stopping the thread wakes up a waiter and is raised by later reads."""
+    watcher = LinkWatcher(poll_interval=0.05)
+    watcher._sock = _BrokenSocket()
+    errors = []
+
+    def wait():
+        try:
+            watcher.wait_for("eth0", up=True, timeout=5)
+        except OSError as e:
+            errors.append(e)
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    start = time.perf_counter()
+    watcher._thread = threading.Thread(target=watcher._run)
+    watcher._thread.start()
+    waiter.join()
+    assert time.perf_counter() - start < 2
+    assert errors == [watcher.error] and watcher.error.errno == errno.EBADF
+    for read in (lambda: watcher.get("eth0"), watcher.table, lambda: watcher.downtime("eth0")):
+        with pytest.raises(OSError):
+            read()
+    watcher.close()
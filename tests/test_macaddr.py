@@ -0,0 +1,154 @@
+import pickle
+
+import pytest
+
+from ..macaddr import Mac, MacArray, MacSet, format_mac, parse_mac
+
+"""
+Unit tests for the `macaddr` module.
+
+They cover parsing of every notation, formatting, comparison and hashing of `Mac`,
+and the array('Q') backed `MacArray` and `MacSet` containers.
+"""
+
+
+# ----------------------
+# Tests for parse_mac / format_mac
+# ----------------------
+
+@pytest.mark.parametrize("text", [
+    "ab:cd:ef:12:34:56",
+    "AB-CD-EF-12-34-56",
+    "abcd.ef12.3456",
+    "abcdef123456",
+    "AbCdEf123456",
+])
+def test_parse_mac_notations(text):
+    """Test that every supported notation parses to the same integer."""
+    assert parse_mac(text) == 0xabcdef123456
+
+
+@pytest.mark.parametrize("text", [
+    "ab:cd:ef:12:34",
+    "ab:cd-ef:12:34:56",
+    "ab:cd:ef:12:34:5g",
+    "0x1234567890",
+    "abcd.ef12-3456",
+    "",
+])
+def test_parse_mac_rejects_garbage(text):
+    """Test that malformed addresses raise ValueError."""
+    with pytest.raises(ValueError):
+        parse_mac(text)
+
+
+def test_format_mac():
+    """Test every output notation."""
+    value = 0x02abcdef0001
+    assert format_mac(value) == "02:ab:cd:ef:00:01"
+    assert format_mac(value, "macos") == "02:ab:cd:ef:00:01"
+    assert format_mac(value, "windows") == "02-AB-CD-EF-00-01"
+    assert format_mac(value, "cisco") == "02ab.cdef.0001"
+    assert format_mac(value, "bare") == "02abcdef0001"
+    with pytest.raises(ValueError):
+        format_mac(value, "beos")
+
+
+# ----------------------
+# Tests for Mac
+# ----------------------
+
+def test_mac_equality_and_hash_ignore_notation():
+    """Test that the same address parsed from different notations is one value."""
+    macs = {Mac("ab:cd:ef:12:34:56"), Mac("AB-CD-EF-12-34-56"), Mac("abcd.ef12.3456"), Mac(0xabcdef123456)}
+    assert len(macs) == 1
+    assert Mac(b"\xab\xcd\xef\x12\x34\x56") == Mac(Mac("abcdef123456"))
+    assert Mac("ab:cd:ef:12:34:56") != "ab:cd:ef:12:34:56"
+
+
+def test_mac_conversions():
+    """Test str, repr, int, bytes and format of a Mac."""
+    mac = Mac("02-AB-CD-EF-00-01")
+    assert str(mac) == "02:ab:cd:ef:00:01"
+    assert repr(mac) == "Mac('02:ab:cd:ef:00:01')"
+    assert int(mac) == 0x02abcdef0001
+    assert bytes(mac) == b"\x02\xab\xcd\xef\x00\x01"
+    assert mac.format("windows") == "02-AB-CD-EF-00-01"
+    assert f"{mac:cisco}" == "02ab.cdef.0001"
+
+
+def test_mac_ordering():
+    """Test that Macs order like their integers."""
+    assert Mac("00:00:00:00:00:01") < Mac("00:00:00:00:01:00") <= Mac("00:00:00:00:01:00")
+    assert sorted([Mac(3), Mac(1), Mac(2)]) == [Mac(1), Mac(2), Mac(3)]
+
+
+def test_mac_bits():
+    """Test the OUI, multicast and locally administered helpers."""
+    mac = Mac("02:1a:2b:3c:4d:5e")
+    assert mac.oui == 0x021a2b
+    assert mac.is_local and not mac.is_multicast
+    assert Mac("01:00:5e:00:00:01").is_multicast
+
+
+def test_mac_is_slotted_and_picklable():
+    """Test that a Mac carries no __dict__ and survives pickling."""
+    mac = Mac("02:00:00:00:00:01")
+    assert not hasattr(mac, "__dict__")
+    assert pickle.loads(pickle.dumps(mac)) == mac
+
+
+def test_mac_invalid_input():
+    """Test out-of-range ints and unsupported types."""
+    with pytest.raises(ValueError):
+        Mac(1 << 48)
+    with pytest.raises(TypeError):
+        Mac(1.5)
+
+
+# ----------------------
+# Tests for MacArray / MacSet
+# ----------------------
+
+def test_mac_array():
+    """Test that a MacArray keeps order and duplicates and round-trips through bytes."""
+    macs = MacArray(["02:00:00:00:00:02", Mac(1), "02-00-00-00-00-02"])
+    assert len(macs) == 3
+    assert macs[0] == macs[2] == Mac("02:00:00:00:00:02")
+    assert list(macs[1:]) == [Mac(1), Mac("02:00:00:00:00:02")]
+    assert "00:00:00:00:00:01" in macs and "zz" not in macs
+    assert macs.ints().itemsize == 8
+    assert list(MacArray.frombytes(macs.tobytes())) == list(macs)
+
+
+def test_mac_set():
+    """Test that a MacSet stays sorted, unique and searchable."""
+    macs = MacSet(["02:00:00:00:00:03", "02:00:00:00:00:01", "02-00-00-00-00-03"])
+    assert len(macs) == 2
+    macs.add(Mac("02:00:00:00:00:02"))
+    macs.add("02:00:00:00:00:02")
+    assert [str(mac) for mac in macs] == ["02:00:00:00:00:01", "02:00:00:00:00:02", "02:00:00:00:00:03"]
+    assert "0200.0000.0002" in macs
+    macs.discard("02:00:00:00:00:02")
+    macs.discard("02:00:00:00:00:09")
+    assert "02:00:00:00:00:02" not in macs
+    macs.update(MacArray(["02:00:00:00:00:04", "02:00:00:00:00:01"]))
+    assert list(macs.ints()) == sorted(macs.ints())
+    assert len(macs) == 3
+    assert MacSet(macs) == macs
+
+
+def test_mac_set_update_merges():
+    """Test merging batches with duplicates, overlaps and values on both ends of the set."""
+    macs = MacSet(range(10, 100, 10))
+    macs.update([95, 5, 50, 50, 100, 10, 5])
+    macs.update(MacSet([0, 55, 200]))
+    macs.update(MacArray([300, 1]))
+    macs.update([])
+    expected = sorted({*range(10, 100, 10), 95, 5, 100, 0, 55, 200, 300, 1})
+    assert list(macs.ints()) == expected and macs.ints().typecode == "Q"
+    macs.update(range(0, 10_000, 3))
+    expected = sorted({*expected, *range(0, 10_000, 3)})
+    assert list(macs.ints()) == expected
+    macs.update([20_000, 9_999, 1, 4, 4, 0])
+    assert list(macs.ints()) == sorted({*expected, 20_000, 9_999, 4})
@@ -0,0 +1,172 @@
+import itertools
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from ..macaddr import Mac
+from ..macregistry import MIN_CAPACITY, MacRegistry
+
+"""
+Unit tests for the `macregistry` module.
+
+The sharing tests run a second registry on the same file, in this process or in child
+interpreters, the way several tools of a lab would share it.
+"""
+
+PACKAGE = __package__.rpartition(".")[0]
+PACKAGE_PARENT = str(Path(__file__).resolve().parent.parent.parent)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "macs.reg")
+
+
+# ----------------------
+# Tests for allocation
+# ----------------------
+
+def test_allocate_is_unique_and_persistent(path):
+    """Test that allocated addresses are distinct, local unicast, and still known after a reopen."""
+    with MacRegistry(path) as registry:
+        macs = registry.allocate_many(5_000)
+        single = registry.allocate()
+        assert len(registry) == 5_001
+    assert len(set(macs.ints())) == 5_000 and single not in macs
+    assert all(mac.is_local and not mac.is_multicast for mac in macs)
+    with MacRegistry(path) as registry:
+        assert len(registry) == 5_001
+        assert all(registry.contains_many(macs)) and single in registry
+        assert sorted(registry) == sorted([*macs, single])
+
+
+def test_allocate_under_oui(path):
+    """Test the vendor prefix, a bad prefix and a request larger than a prefix allows."""
+    with MacRegistry(path) as registry:
+        assert all(str(mac).startswith("00:1a:2b:") for mac in registry.allocate_many(100, oui="00-1A-2B"))
+        with pytest.raises(ValueError):
+            registry.allocate(oui="00:1a")
+        with pytest.raises(ValueError):
+            registry.allocate_many((1 << 24) + 1, oui="00:1a:2b")
+
+
+def test_allocate_never_returns_reserved(path, monkeypatch):
+    """Test that reserved addresses are skipped and that a full space raises without leaking."""
+    from .. import macregistry
+    drawn = [Mac("02:00:00:00:00:01"), Mac("02:00:00:00:00:02")]
+    cycle = itertools.cycle(int(mac) for mac in drawn)
+    monkeypatch.setattr(macregistry, "_draw", lambda count, prefix: [next(cycle) for _ in range(count)])
+    with MacRegistry(path) as registry:
+        assert registry.reserve(["02:00:00:00:00:01"]) == 1
+        assert registry.allocate() == drawn[1]
+        with pytest.raises(RuntimeError):
+            registry.allocate_many(2)
+        assert len(registry) == 2
+
+
+def test_growth(path):
+    """Test that the table grows past its initial capacity without losing an address."""
+    with MacRegistry(path) as registry:
+        macs = registry.allocate_many(MIN_CAPACITY * 3)
+        assert len(registry) == MIN_CAPACITY * 3
+        assert all(registry.contains_many(macs))
+
+
+# ----------------------
+# Tests for reserve, release and lookups
+# ----------------------
+
+def test_reserve_release_contains(path):
+    """Test recording outside addresses, giving them back and re-recording them."""
+    with MacRegistry(path) as registry:
+        assert registry.reserve(["aa:bb:cc:dd:ee:00", "aabb.ccdd.ee01", "aa:bb:cc:dd:ee:00"]) == 2
+        assert "AA-BB-CC-DD-EE-01" in registry
+        assert "aa:bb:cc:dd:ee:02" not in registry and "not a mac" not in registry
+        assert registry.release("aa:bb:cc:dd:ee:00") is True
+        assert registry.release("aa:bb:cc:dd:ee:00") is False
+        assert registry.contains_many(["aa:bb:cc:dd:ee:00", "aa:bb:cc:dd:ee:01"]) == [False, True]
+        assert registry.reserve(["aa:bb:cc:dd:ee:00"]) == 1
+        assert registry.release_many(["aa:bb:cc:dd:ee:00", "aa:bb:cc:dd:ee:01", "aa:bb:cc:dd:ee:02"]) == 2
+        assert len(registry) == 0 and list(registry) == []
+
+
+def test_not_a_registry(path):
+    """Test that another file is refused instead of being overwritten."""
+    Path(path).write_bytes(b"x" * 4096)
+    with pytest.raises(ValueError):
+        MacRegistry(path)
+
+
+# ----------------------
+# Tests for sharing a registry
+# ----------------------
+
+def test_stale_instance_follows_growth(path):
+    """Test that a second instance sees the addresses of the first one after the file was rebuilt."""
+    with MacRegistry(path) as first, MacRegistry(path) as second:
+        before = first.allocate()
+        assert before in second
+        macs = first.allocate_many(MIN_CAPACITY * 2)
+        assert all(second.contains_many(macs)) and len(second) == len(first)
+        later = second.allocate_many(100)
+        assert all(first.contains_many(later))
+
+
+def test_writer_dying_after_the_rename(path, monkeypatch):
+    """Test that a grown file left without the retired flag on the old one is still picked up."""
+    from .. import macregistry
+    with MacRegistry(path) as first, MacRegistry(path) as second:
+        before = first.allocate_many(10)
+        assert all(second.contains_many(before))
+        replace = macregistry.os.replace
+
+        def die_after_rename(src, dst):
+            replace(src, dst)
+            raise KeyboardInterrupt
+        monkeypatch.setattr(macregistry.os, "replace", die_after_rename)
+        with pytest.raises(KeyboardInterrupt):
+            first.allocate_many(MIN_CAPACITY)
+        monkeypatch.setattr(macregistry.os, "replace", replace)
+        later = second.allocate_many(10)
+    with MacRegistry(path) as registry:
+        assert len(registry) == 20
+        assert all(registry.contains_many([*before, *later]))
+
+
+@pytest.mark.parametrize("replacement", [None, b"", b"MACREG01"])
+def test_readers_never_create_or_resize(path, replacement):
+    """Test that lookups find a missing or short file empty and leave it as it is, for writers to fix."""
+    with MacRegistry(path) as registry:
+        registry.allocate()
+        if replacement is None:
+            Path(path).unlink()
+        else:
+            Path(path + ".new").write_bytes(replacement)
+            Path(path + ".new").replace(path)
+        assert list(registry) == [] and len(registry) == 0
+        assert Mac("02:00:00:00:00:01") not in registry
+        if replacement is None:
+            assert not Path(path).exists()
+        else:
+            assert Path(path).read_bytes() == replacement
+        if replacement != b"MACREG01":
+            registry.reserve(["02:00:00:00:00:01"])
+            assert "02:00:00:00:00:01" in registry and len(registry) == 1
+
+
+def test_processes_never_share_an_address(path):
+    """Test that processes allocating at the same time never get the same address."""
+    code = (f"import sys\nfrom {PACKAGE}.macregistry import MacRegistry\n"
+            f"with MacRegistry(sys.argv[1]) as registry:\n"
+            f"    for _ in range(50):\n"
+            f"        print(*registry.allocate_many(40))\n")
+    children = [subprocess.Popen([sys.executable, "-c", code, path], cwd=PACKAGE_PARENT, stdout=subprocess.PIPE,
+                                 text=True) for _ in range(4)]
+    macs = [mac for child in children for mac in child.communicate()[0].split()]
+    assert all(child.returncode == 0 for child in children)
+    assert len(macs) == len(set(macs)) == 4 * 50 * 40
+    with MacRegistry(path) as registry:
+        assert len(registry) == len(macs)
+        assert all(registry.contains_many(macs))
@@ -0,0 +1,150 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from .. import reconcile, spoof_mac
+from ..ifparse import Interface
+from ..interfaces import InterfaceTable
+from ..main import _parse_plan, main
+from .test_spoof_mac import FakeIfconfig
+
+"""
+Unit tests for the command-line interface (main.py) and its start-up cost.
+
+Start-up is measured in a fresh interpreter, the only way to see what an import really loads.
+"""
+
+PACKAGE = __package__.rpartition(".")[0]
+PACKAGE_PARENT = str(Path(__file__).resolve().parent.parent.parent)
+# Modules `mac` commands must not load.
+HEAVY_MODULES = ("requests", "urllib3", "fake_useragent", "asyncio", "ssl")
+# Cold-start budget of `mac get`: importing the CLI and spoof_mac, interpreter start excluded.
+IMPORT_BUDGET = 0.1
+
+
+@pytest.fixture(autouse=True)
+def _subprocess_backend(monkeypatch):
+    """Run every MAC command through the (mocked) system commands, as in test_spoof_mac.py."""
+    monkeypatch.setattr(spoof_mac, "DEFAULT_BACKEND", "subprocess")
+
+
+def _python(*args, **kwargs):
+    return subprocess.run([sys.executable, *args], cwd=PACKAGE_PARENT, capture_output=True, text=True, check=True,
+                          **kwargs)
+
+
+def _cold_import(modules):
+    """Import modules in a new interpreter, returns (seconds, heavy modules it loaded)."""
+    code = (f"import sys, time\nstart = time.perf_counter()\nimport {', '.join(modules)}\n"
+            f"print(time.perf_counter() - start)\n"
+            f"print(*sorted(set(sys.modules) & set({HEAVY_MODULES!r})))")
+    seconds, loaded = _python("-c", code).stdout.split("\n", 1)
+    return float(seconds), loaded.split()
+
+
+# ----------------------
+# Tests for start-up
+# ----------------------
+
+def test_mac_get_import_budget():
+    """Test that what `mac get` imports stays light and within the budget (best of 3 runs)."""
+    runs = [_cold_import([f"{PACKAGE}.main", f"{PACKAGE}.spoof_mac"]) for _ in range(3)]
+    assert all(loaded == [] for _, loaded in runs)
+    assert min(seconds for seconds, _ in runs) < IMPORT_BUDGET
+
+
+def test_spoof_useragent_does_not_import_requests():
+    """Test that picking User-Agents does not load the HTTP stack."""
+    _, loaded = _cold_import([f"{PACKAGE}.spoof_useragent"])
+    assert loaded == []
+
+
+def test_python_m_entry_point(tmp_path):
+    """Test `python -m <package>` end to end, with a User-Agent file."""
+    agents = tmp_path / "agents.txt"
+    agents.write_text("Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:126.0) Gecko/20100101 Firefox/126.0\n"
+                      "Mozilla/5.0 (Android 14; Mobile; rv:126.0) Gecko/126.0 Firefox/126.0\n")
+    result = _python("-m", PACKAGE, "ua", "pick", "--file", str(agents), "--device", "mobile", "-n", "2",
+                     env={**os.environ, "HOME": str(tmp_path)})
+    assert result.stdout.splitlines() == ["Mozilla/5.0 (Android 14; Mobile; rv:126.0) Gecko/126.0 Firefox/126.0"] * 2
+
+
+# ----------------------
+# Tests for the mac commands
+# ----------------------
+
+def test_parse_plan():
+    """Test that interfaces without an address get a random one."""
+    assert _parse_plan(["eth0", "wlan0=aa:bb:cc:dd:ee:ff"]) == {"eth0": "random", "wlan0": "aa:bb:cc:dd:ee:ff"}
+
+
+def test_mac_get(capsys):
+    """Test printing the address of one interface, and an unknown interface."""
+    fake = FakeIfconfig({"veth0": "aa:bb:cc:dd:ee:00"})
+    with patch('subprocess.check_output', side_effect=fake):
+        assert main(["mac", "get", "veth0", "--os", "unix"]) == 0
+        assert capsys.readouterr().out == "aa:bb:cc:dd:ee:00\n"
+        assert main(["mac", "get", "veth9", "--os", "unix"]) == 1
+
+
+def test_mac_set(capsys):
+    """Test changing one interface to a given address."""
+    fake = FakeIfconfig({"veth0": "aa:bb:cc:dd:ee:00"})
+    with patch('subprocess.check_output', side_effect=fake):
+        assert main(["mac", "set", "veth0", "02:00:00:00:00:01", "--os", "unix"]) == 0
+    assert fake.macs["veth0"] == "02:00:00:00:00:01"
+    assert capsys.readouterr().out.startswith("veth0: aa:bb:cc:dd:ee:00 -> 02:00:00:00:00:01 changed")
+
+
+def test_mac_batch_reports_failures(capsys):
+    """Test that a failed interface is reported and sets the exit status."""
+    fake = FakeIfconfig({"veth0": "aa:bb:cc:dd:ee:00", "veth1": "aa:bb:cc:dd:ee:01"}, broken={"veth1"})
+    with patch('subprocess.check_output', side_effect=fake):
+        assert main(["mac", "batch", "veth0", "veth1=02:00:00:00:00:02", "--os", "unix"]) == 1
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith("veth0: aa:bb:cc:dd:ee:00 -> ") and " changed " in lines[0]
+    assert lines[1].startswith("veth1: ") and " failed " in lines[1]
+
+
+def test_mac_reconcile_and_restore(tmp_path, capsys):
+    """Test applying a policy file, re-applying it, then restoring the journaled interfaces."""
+    fake = FakeIfconfig({"veth0": "aa:bb:cc:dd:ee:00", "veth1": "aa:bb:cc:dd:ee:01"})
+    policy = tmp_path / "policy.json"
+    policy.write_text('{"veth0": "02:00:00:00:00:10", "veth1": "aa:bb:cc:dd:ee:01"}')
+    journal = str(tmp_path / "journal.json")
+    snapshot = lambda *args: InterfaceTable([Interface(name, mac) for name, mac in fake.macs.items()])
+    with patch.object(reconcile, "get_all_macs", side_effect=snapshot), \
+            patch('subprocess.check_output', side_effect=fake):
+        assert main(["mac", "reconcile", str(policy), "--journal", journal, "--os", "unix"]) == 0
+        assert capsys.readouterr().out.endswith("1 to change, 1 unchanged, 0 missing\n")
+        assert main(["mac", "reconcile", str(policy), "--journal", journal, "--os", "unix"]) == 0
+        assert capsys.readouterr().out == "0 to change, 2 unchanged, 0 missing\n"
+        assert main(["mac", "restore", "--journal", journal, "--os", "unix"]) == 0
+    assert fake.macs["veth0"] == "aa:bb:cc:dd:ee:00"
+
+
+# ----------------------
+# Tests for the ua commands
+# ----------------------
+
+def test_ua_pick(capsys):
+    """Test drawing several User-Agents of one class, and a class the pool lacks."""
+    assert main(["ua", "pick", "-n", "3", "--device", "mobile"]) == 0
+    agents = capsys.readouterr().out.splitlines()
+    assert len(agents) == 3 and all("Mobile" in agent for agent in agents)
+    assert main(["ua", "pick", "--browser", "lynx"]) == 1
+
+
+def test_ua_fetch(http_server, tmp_path, capsys):
+    """Test downloading to a file with a given User-Agent."""
+    output = tmp_path / "body"
+    assert main(["ua", "fetch", http_server.url + "/bytes/5000", "-o", str(output), "--user-agent", "cli-test"]) == 0
+    out = capsys.readouterr().out
+    assert "User-Agent: cli-test" in out and "200 5000 bytes sha256:" in out
+    assert output.stat().st_size == 5000
+    path, headers = http_server.requests[-1]
+    assert (path, headers["User-Agent"]) == ("/bytes/5000", "cli-test")
@@ -0,0 +1,167 @@
+import errno
+import struct
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from .. import netlink
+from .. import spoof_mac
+
+"""
+Unit tests for the `netlink` module.
+
+The encoding helpers are tested everywhere. The socket tests need root on Linux, they run
+in the throwaway network namespace of the `netns` fixture (see conftest.py).
+"""
+
+
+def _ip_link_address(interface):
+    output = subprocess.check_output(["ip", "-o", "link", "show", interface]).decode()
+    return output.split("link/ether ")[1].split()[0]
+
+
+# ----------------------
+# Tests for the encoding helpers
+# ----------------------
+
+def _fake_newlink(index, name, address, flags, mtu):
+    attrs = (netlink.pack_attr(netlink.IFLA_IFNAME, name.encode() + b"\0")
+             + netlink.pack_attr(netlink.IFLA_ADDRESS, address)
+             + netlink.pack_attr(netlink.IFLA_MTU, struct.pack("=I", mtu)))
+    return struct.pack("=BxHiII", 0, 1, index, flags, 0) + attrs
+
+
+def test_mac_bytes_round_trip():
+    """Test converting between MAC strings and raw bytes."""
+    assert netlink.mac_to_bytes("02:ab:cd:ef:00:11") == b"\x02\xab\xcd\xef\x00\x11"
+    assert netlink.mac_to_bytes("02-AB-CD-EF-00-11") == b"\x02\xab\xcd\xef\x00\x11"
+    assert netlink.bytes_to_mac(b"\x02\xab\xcd\xef\x00\x11") == "02:ab:cd:ef:00:11"
+    assert netlink.bytes_to_mac(None) is None
+
+
+def test_pack_attr_is_padded():
+    """Test that attributes are padded to 4 bytes while the header keeps the real length."""
+    attr = netlink.pack_attr(netlink.IFLA_IFNAME, b"eth0\0")
+    assert len(attr) == 12
+    assert struct.unpack_from("=HH", attr) == (9, netlink.IFLA_IFNAME)
+
+
+def test_parse_link():
+    """Test decoding an RTM_NEWLINK payload."""
+    payload = _fake_newlink(7, "veth3", b"\x02\x00\x00\x00\x00\x01", netlink.IFF_UP, 1500)
+    link = netlink.parse_link(payload)
+    assert link == netlink.Link(7, "veth3", b"\x02\x00\x00\x00\x00\x01", netlink.IFF_UP, 1500)
+
+
+def test_iter_messages_splits_datagram():
+    """Test that several messages in one datagram are all returned with their sequence number."""
+    first = netlink.pack_message(netlink.RTM_NEWLINK, 2, 5, _fake_newlink(1, "lo", b"\0" * 6, 0, 65536))
+    second = netlink.pack_message(netlink.NLMSG_DONE, 2, 5, b"\0\0\0\0")
+    messages = list(netlink.iter_messages(first + second))
+    assert [(m[0], m[2]) for m in messages] == [(netlink.RTM_NEWLINK, 5), (netlink.NLMSG_DONE, 5)]
+    assert netlink.parse_link(messages[0][3]).name == "lo"
+
+
+# ----------------------
+# Tests against the kernel, inside the throwaway namespace
+# ----------------------
+
+def test_get_link(netns):
+    """Test reading one link by name and by index."""
+    with netlink.NetlinkSocket() as nl:
+        link = nl.get_link(netns)
+        assert link.name == netns
+        assert netlink.bytes_to_mac(link.address) == "02:00:00:00:00:aa"
+        assert link.mtu > 0
+        assert nl.get_link(link.index).name == netns
+
+
+def test_get_link_missing_interface(netns):
+    """Test that an unknown interface raises ENODEV."""
+    with netlink.NetlinkSocket() as nl:
+        with pytest.raises(OSError) as excinfo:
+            nl.get_link("doesnotexist0")
+    assert excinfo.value.errno == errno.ENODEV
+
+
+def test_dump_links(netns):
+    """Test that a dump returns every link of the namespace."""
+    with netlink.NetlinkSocket() as nl:
+        names = [link.name for link in nl.dump_links()]
+    assert "lo" in names
+    assert netns in names
+
+
+def test_set_link_flags(netns):
+    """Test bringing the link up and down."""
+    with netlink.NetlinkSocket() as nl:
+        nl.set_link(netns, up=True)
+        assert nl.get_link(netns).flags & netlink.IFF_UP
+        nl.set_link(netns, up=False)
+        assert not nl.get_link(netns).flags & netlink.IFF_UP
+
+
+def test_set_mac(netns):
+    """Test changing the address, checked with iproute2."""
+    netlink.set_mac(netns, "02:12:34:56:78:9a")
+    assert _ip_link_address(netns) == "02:12:34:56:78:9a"
+    assert netlink.get_mac(netns) == "02:12:34:56:78:9a"
+
+
+def test_spoof_mac_get_current_mac_netlink(netns):
+    """Test that get_current_mac reads through netlink without spawning ifconfig."""
+    netlink.set_mac(netns, "02:00:00:00:00:bb")
+    with patch("subprocess.check_output") as mock_check_output:
+        assert spoof_mac.get_current_mac("unix", netns, backend="netlink") == "02:00:00:00:00:bb"
+    mock_check_output.assert_not_called()
+
+
+def test_spoof_mac_change_mac_netlink(netns, capsys):
+    """Test that change_mac applies the generated address through netlink without any subprocess."""
+    with patch.object(spoof_mac, "generate_random_mac", return_value="02:00:00:00:00:cc"), \
+            patch("subprocess.check_output") as mock_check_output:
+        spoof_mac.change_mac("unix", netns, backend="netlink")
+    mock_check_output.assert_not_called()
+    assert "Success" in capsys.readouterr().out
+    assert _ip_link_address(netns) == "02:00:00:00:00:cc"
+
+
+def test_spoof_mac_netlink_error(netns, capsys):
+    """Test that netlink errors are reported like the subprocess ones."""
+    assert spoof_mac.get_current_mac("unix", "doesnotexist0", backend="netlink") is None
+    assert "something occurred, please check" in capsys.readouterr().out
+
+
+def test_spoof_mac_get_all_macs_netlink(netns):
+    """Test that the snapshot comes from one netlink dump and serves later lookups."""
+    netlink.set_mac(netns, "02:00:00:00:00:dd")
+    with patch("subprocess.check_output") as mock_check_output:
+        table = spoof_mac.get_all_macs("unix", backend="netlink")
+        assert spoof_mac.get_current_mac("unix", netns, table=table) == "02:00:00:00:00:dd"
+    mock_check_output.assert_not_called()
+    assert table[netns].index > 0
+    assert table[netns].mtu > 0
+    assert table["lo"].flags & netlink.IFF_UP == 0  # loopback starts down in a new namespace
+
+
+def test_spoof_mac_change_macs_netlink(netns):
+    """Test that a batch change goes through netlink and is verified."""
+    with patch("subprocess.check_output") as mock_check_output:
+        results = spoof_mac.change_macs({netns: "02:00:00:00:00:ee"}, "unix", backend="netlink")
+    mock_check_output.assert_not_called()
+    assert results[netns].status == "changed"
+    assert _ip_link_address(netns) == "02:00:00:00:00:ee"
+
+
+def test_spoof_mac_change_macs_netlink_live(netns):
+    """Test that a live netlink change keeps the link up."""
+    with netlink.NetlinkSocket() as nl:
+        nl.set_link(netns, up=True)
+    results = spoof_mac.change_macs({netns: "02:00:00:00:00:ef"}, "unix", backend="netlink", live=True)
+    assert results[netns].status == "changed"
+    assert results[netns].method == "live"
+    assert results[netns].downtime == 0.0
+    with netlink.NetlinkSocket() as nl:
+        assert nl.get_link(netns).flags & netlink.IFF_UP
+    assert _ip_link_address(netns) == "02:00:00:00:00:ef"
@@ -0,0 +1,161 @@
+import errno
+import io
+import json
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from .. import spoof_mac
+from ..macaddr import Mac
+from ..privhelper import HelperClient, HelperError, IoctlHost, MemoryHost, serve
+from ..spoof_mac import change_mac, change_macs, get_current_mac
+
+"""
+Unit tests for the `privhelper` module and the "helper" backend of spoof_mac.
+
+The client tests start the stand-in helper (`HelperClient.simulated`) in a child process,
+so requests and replies really go through the pipe.
+"""
+
+
+@pytest.fixture
+def helper():
+    client = HelperClient.simulated({"veth0": "aa:bb:cc:dd:ee:00", "veth1": "aa:bb:cc:dd:ee:01",
+                                     "eth0": "aa:bb:cc:dd:ee:02"}, broken=["veth1"], refuse_live=["eth0"])
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def helper_backend(helper, monkeypatch):
+    """Route spoof_mac through the stand-in helper, and fail on any forked command."""
+    monkeypatch.setattr(spoof_mac, "DEFAULT_BACKEND", "helper")
+    monkeypatch.setattr(spoof_mac, "_HELPER", helper)
+    with patch("subprocess.check_output", side_effect=AssertionError("forked a command")):
+        yield helper
+
+
+def _serve(host, *requests):
+    replies = io.StringIO()
+    serve(host, io.StringIO("".join(json.dumps(request) + "\n" for request in requests)), replies)
+    return [json.loads(line) for line in replies.getvalue().splitlines()]
+
+
+# ----------------------
+# Tests for the helper side
+# ----------------------
+
+def test_serve_change_cycle_and_live():
+    """Test a cycled change, a live change and a refused live change in one batch."""
+    host = MemoryHost({"veth0": "aa:bb:cc:dd:ee:00", "eth0": "aa:bb:cc:dd:ee:01"}, refuse_live=["eth0"])
+    reply, = _serve(host, {"ops": [{"op": "change", "interface": "veth0", "mac": "02:00:00:00:00:01"},
+                                   {"op": "change", "interface": "eth0", "mac": "02-00-00-00-00-02", "live": True},
+                                   {"op": "change", "interface": "veth0", "mac": "02:00:00:00:00:03", "live": True}]})
+    cycled, refused, live = reply["results"]
+    assert cycled["status"] == "ok" and cycled["value"]["old"] == "aa:bb:cc:dd:ee:00"
+    assert cycled["value"]["method"] == "cycle" and set(cycled["timings"]) == {"read", "down", "set", "up", "verify"}
+    assert refused["value"]["method"] == "cycle" and "live" in refused["timings"]
+    assert live["value"] == {"old": "02:00:00:00:00:01", "method": "live", "downtime": 0.0}
+    assert host.links == {"veth0": ["02:00:00:00:00:03", True], "eth0": ["02:00:00:00:00:02", True]}
+
+
+def test_serve_errors_and_stop_on_error():
+    """Test failed operations, skipped ones, and a malformed request."""
+    host = MemoryHost({"veth0": "aa:bb:cc:dd:ee:00"}, broken=["veth0"])
+    ops = [{"op": "read", "interface": "veth9"}, {"op": "set", "interface": "veth0", "mac": "02:00:00:00:00:01"},
+           {"op": "read", "interface": "veth0"}]
+    first, second, bad = _serve(host, {"ops": ops}, {"ops": ops, "stop_on_error": True}, {"nothing": []})
+    assert [r["status"] for r in first["results"]] == ["failed", "failed", "ok"]
+    assert [r["errno"] for r in first["results"]] == [errno.ENODEV, errno.EIO, None]
+    assert [r["status"] for r in second["results"]] == ["failed", "skipped", "skipped"]
+    assert "error" in bad
+
+
+def test_failed_change_brings_the_link_back_up():
+    """Test that an interface whose new address is refused is not left down."""
+    host = MemoryHost({"eth0": "aa:bb:cc:dd:ee:00"}, broken={"eth0"})
+    reply, = _serve(host, {"ops": [{"op": "change", "interface": "eth0", "mac": "02:00:00:00:00:01"}]})
+    result, = reply["results"]
+    assert result["status"] == "failed" and result["errno"] == errno.EIO
+    assert set(result["timings"]) == {"read", "down", "set", "up"}
+    assert host.links == {"eth0": ["aa:bb:cc:dd:ee:00", True]}
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="ioctl layout tested on Linux")
+def test_ioctl_host_reads_loopback():
+    """Test reading an address through the ioctl host, which needs no privilege."""
+    host = IoctlHost("unix")
+    assert host.read("lo") == "00:00:00:00:00:00"
+    with pytest.raises(OSError):
+        host.read("nosuchif0")
+
+
+# ----------------------
+# Tests for HelperClient
+# ----------------------
+
+def test_client_batch_and_call(helper):
+    """Test several operations in one round trip, and a failed call raising its errno."""
+    results = helper.batch([{"op": "down", "interface": "veth0"},
+                            {"op": "set", "interface": "veth0", "mac": "02:00:00:00:00:01"},
+                            {"op": "up", "interface": "veth0"}])
+    assert [result.status for result in results] == ["ok"] * 3
+    assert helper.call("read", "veth0") == "02:00:00:00:00:01"
+    with pytest.raises(HelperError) as error:
+        helper.call("read", "veth9")
+    assert error.value.errno == errno.ENODEV
+
+
+def test_client_after_helper_exit(helper):
+    """Test that a client whose helper is gone raises instead of hanging."""
+    helper._process.kill()
+    helper._process.wait()
+    with pytest.raises(HelperError):
+        helper.call("read", "veth0")
+
+
+def test_client_kills_a_helper_that_does_not_reply():
+    """Test that a batch waits at most the timeout, then kills the helper and raises."""
+    client = HelperClient([sys.executable, "-c", "import time; time.sleep(60)"], timeout=0.5)
+    try:
+        with pytest.raises(HelperError) as error:
+            client.call("read", "veth0")
+        assert error.value.errno == errno.ETIMEDOUT
+        assert client._process.poll() is not None
+        with pytest.raises(HelperError):
+            client.call("read", "veth0")
+    finally:
+        client.close()
+
+
+# ----------------------
+# Tests for the helper backend of spoof_mac
+# ----------------------
+
+def test_change_macs_through_helper(helper_backend):
+    """Test a batch changed by the helper: results, timings, no forked command."""
+    results = change_macs({"veth0": "02:00:00:00:00:10", "veth1": "random", "eth0": Mac("02:00:00:00:00:12")},
+                          "unix", live=True)
+    assert [result.status for result in results.values()] == ["changed", "failed", "changed"]
+    assert results["veth0"].method == "live" and results["veth0"].downtime == 0.0
+    assert results["eth0"].method == "cycle" and results["eth0"].old_mac == Mac("aa:bb:cc:dd:ee:02")
+    assert results["veth1"].error.errno == errno.EIO
+    assert {"read", "set", "verify"} <= set(results["eth0"].timings)
+    assert get_current_mac("macos", "eth0") == "02:00:00:00:00:12"
+
+
+def test_change_macs_through_helper_fail_fast(helper_backend):
+    """Test that fail_fast skips the interfaces after a failure."""
+    results = change_macs({"veth1": "random", "veth0": "random"}, "unix", fail_fast=True)
+    assert [result.status for result in results.values()] == ["failed", "skipped"]
+    assert get_current_mac("unix", "veth0") == "aa:bb:cc:dd:ee:00"
+
+
+def test_change_mac_through_helper(helper_backend, capsys):
+    """Test the printed single-interface change, and a failing one."""
+    change_mac("macos", "veth0", new_mac="02:00:00:00:00:20")
+    out = capsys.readouterr().out
+    assert "current MAC Address: aa:bb:cc:dd:ee:00" in out and "new MAC Address: 02:00:00:00:00:20" in out
+    change_mac("unix", "veth1")
+    assert "something occurred, please check" in capsys.readouterr().out
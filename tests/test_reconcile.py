@@ -0,0 +1,162 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from .. import reconcile, spoof_mac
+from ..ifparse import Interface
+from ..interfaces import InterfaceTable
+from ..macaddr import Mac
+from ..macregistry import MacRegistry
+from ..reconcile import Journal, load_policy, plan_changes, restore_all
+from .test_spoof_mac import FakeIfconfig
+
+"""
+Unit tests for the `reconcile` module.
+
+Snapshots are InterfaceTables built from a FakeIfconfig (see test_spoof_mac.py), which also
+plays the ifconfig / macchanger commands of the changes.
+"""
+
+
+@pytest.fixture(autouse=True)
+def _subprocess_backend(monkeypatch):
+    """Run the changes through the (mocked) system commands, as in test_spoof_mac.py."""
+    monkeypatch.setattr(spoof_mac, "DEFAULT_BACKEND", "subprocess")
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "journal.json")
+
+
+def _table(fake):
+    return InterfaceTable([Interface(name, mac) for name, mac in fake.macs.items()])
+
+
+def _reconcile(fake, policy, journal_path, **kwargs):
+    """reconcile() against the fake host: snapshot and changes both come from fake."""
+    with patch.object(reconcile, "get_all_macs", side_effect=lambda *args: _table(fake)) as snapshot, \
+            patch('subprocess.check_output', side_effect=fake) as commands:
+        report = reconcile.reconcile(policy, journal_path, "unix", **kwargs)
+    assert snapshot.call_count == 1
+    return report, commands.call_count
+
+
+# ----------------------
+# Tests for policies and the journal
+# ----------------------
+
+def test_load_policy(tmp_path):
+    """Test the accepted values, and that a bad address is rejected when the file is read."""
+    path = tmp_path / "policy.json"
+    path.write_text('{"eth0": "02-00-00-00-00-01", "veth*": "random-once", "wlan0": "restore-original"}')
+    assert load_policy(path) == {"eth0": Mac("02:00:00:00:00:01"), "veth*": "random-once",
+                                 "wlan0": "restore-original"}
+    path.write_text('{"eth0": "random"}')
+    with pytest.raises(ValueError):
+        load_policy(path)
+
+
+def test_journal_keeps_the_first_original(journal_path):
+    """Test that a second change of an interface does not overwrite its original."""
+    journal = Journal(journal_path)
+    journal.record("eth0", "aa:bb:cc:dd:ee:00")
+    journal.record("eth0", "02:00:00:00:00:01", assigned="02:00:00:00:00:02")
+    journal.save()
+    journal = Journal(journal_path)
+    assert journal.original("eth0") == Mac("aa:bb:cc:dd:ee:00")
+    assert journal.assigned("eth0") == Mac("02:00:00:00:00:02")
+    assert journal.original("eth1") is None
+
+
+def test_plan_patterns_and_missing():
+    """Test that exact names win over patterns and that absent interfaces are reported."""
+    table = InterfaceTable([Interface("veth0", "aa:bb:cc:dd:ee:00"), Interface("veth1", "02:00:00:00:00:01")])
+    policy = {"veth*": Mac("02:00:00:00:00:01"), "veth0": Mac("aa:bb:cc:dd:ee:00"), "eth9": "random-once"}
+    actions, unchanged, missing = plan_changes(policy, table, Journal("unused.json"))
+    assert (actions, sorted(unchanged), missing) == ([], ["veth0", "veth1"], ["eth9"])
+
+
+# ----------------------
+# Tests for reconcile
+# ----------------------
+
+def test_reconcile_applies_only_differences(journal_path):
+    """Test a first run: fixed and random-once interfaces change, the others are left alone."""
+    fake = FakeIfconfig({"veth0": "aa:bb:cc:dd:ee:00", "veth1": "aa:bb:cc:dd:ee:01", "veth2": "02:00:00:00:00:02"})
+    policy = {"veth0": "02:00:00:00:00:10", "veth1": "random-once", "veth2": "02:00:00:00:00:02"}
+    report, _ = _reconcile(fake, policy, journal_path)
+    assert [action.interface for action in report.actions] == ["veth0", "veth1"]
+    assert report.unchanged == ["veth2"]
+    assert all(result.status == "changed" for result in report.results.values())
+    assert fake.macs["veth0"] == "02:00:00:00:00:10"
+    journal = Journal(journal_path)
+    assert journal.original("veth1") == Mac("aa:bb:cc:dd:ee:01")
+    assert journal.assigned("veth1") == Mac(fake.macs["veth1"])
+    assert "veth2" not in journal
+
+
+def test_rerun_does_no_link_operation(journal_path):
+    """Test that an unchanged policy re-run on a large host issues no command at all."""
+    fake = FakeIfconfig({f"veth{i}": str(Mac(0x020000000000 + i)) for i in range(10_000)})
+    journal = Journal(journal_path)
+    for i in range(5_000):
+        journal.record(f"veth{i}", "aa:bb:cc:00:00:00", assigned=fake.macs[f"veth{i}"])
+    journal.save()
+    policy = {f"veth{i}": "random-once" for i in range(5_000)}
+    policy.update({f"veth{i}": fake.macs[f"veth{i}"] for i in range(5_000, 9_000)})
+    policy["veth9*"] = "restore-original"
+    report, commands = _reconcile(fake, policy, journal_path)
+    assert commands == 0
+    assert report.actions == [] and report.results == {}
+    assert len(report.unchanged) == 10_000
+
+
+def test_random_once_is_stable(journal_path):
+    """Test that random-once re-applies the address drawn the first time after a reset."""
+    fake = FakeIfconfig({"veth0": "aa:bb:cc:dd:ee:00"})
+    _reconcile(fake, {"veth0": "random-once"}, journal_path)
+    assigned = fake.macs["veth0"]
+    fake.macs["veth0"] = "aa:bb:cc:dd:ee:00"
+    report, _ = _reconcile(fake, {"veth0": "random-once"}, journal_path)
+    assert report.actions[0].target == Mac(assigned)
+    assert fake.macs["veth0"] == assigned
+
+
+def test_random_once_from_registry(journal_path, tmp_path):
+    """Test that random-once draws from the registry and that a restore gives the address back."""
+    fake = FakeIfconfig({"veth0": "aa:bb:cc:dd:ee:00", "veth1": "aa:bb:cc:dd:ee:01"})
+    with MacRegistry(str(tmp_path / "macs.reg")) as registry:
+        _reconcile(fake, {"veth0": "random-once"}, journal_path, dry_run=True, registry=registry)
+        assert len(registry) == 0
+        _reconcile(fake, {"veth*": "random-once"}, journal_path, registry=registry)
+        assert sorted(registry) == sorted(Mac(fake.macs[f"veth{i}"]) for i in range(2))
+        _reconcile(fake, {"veth0": "restore-original"}, journal_path, registry=registry)
+        assert fake.macs["veth0"] == "aa:bb:cc:dd:ee:00"
+        assert list(registry) == [Mac(fake.macs["veth1"])]
+
+
+def test_dry_run_changes_nothing(journal_path):
+    """Test that a dry run plans but neither changes an interface nor writes the journal."""
+    fake = FakeIfconfig({"veth0": "aa:bb:cc:dd:ee:00"})
+    report, commands = _reconcile(fake, {"veth0": "random-once"}, journal_path, dry_run=True)
+    assert len(report.actions) == 1 and report.results == {}
+    assert commands == 0
+    assert len(Journal(journal_path)) == 0
+
+
+def test_restore_all(journal_path):
+    """Test restoring a fleet in one batch; a failed interface stays in the journal."""
+    fake = FakeIfconfig({f"veth{i}": "aa:bb:cc:dd:ee:0%d" % i for i in range(4)})
+    _reconcile(fake, {"veth*": "random-once"}, journal_path)
+    assert len(Journal(journal_path)) == 4
+    fake.broken = {"veth3"}
+    with patch.object(reconcile, "get_all_macs", side_effect=lambda *args: _table(fake)), \
+            patch('subprocess.check_output', side_effect=fake):
+        report = restore_all(journal_path, "unix")
+    assert [result.status for result in report.results.values()] == ["changed"] * 3 + ["failed"]
+    assert [fake.macs[f"veth{i}"] for i in range(3)] == ["aa:bb:cc:dd:ee:0%d" % i for i in range(3)]
+    assert list(Journal(journal_path)) == ["veth3"]
+    with open(journal_path) as file:
+        assert json.load(file)["interfaces"]["veth3"]["original"] == "aa:bb:cc:dd:ee:03"
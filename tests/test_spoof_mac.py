@@ -1,8 +1,15 @@
-from unittest.mock import patch, MagicMock
-from ..spoof_mac import get_current_mac, generate_random_mac, change_mac
+from unittest.mock import patch, MagicMock, call
+from ..spoof_mac import get_current_mac, get_all_macs, generate_random_mac, generate_random_macs, change_mac, change_macs
+from .. import spoof_mac as spoof_mac_module
+from ..macaddr import Mac
+from ..macregistry import MacRegistry
+from ..winregistry import ADAPTER_CLASS_KEY, MemoryRegistry
+import re
 import sys
 import pytest
 import subprocess
+import threading
+import time
 
 """
 Unit tests for the `spoof_mac` module.
@@ -21,9 +28,16 @@ The tests cover:
 
 Mocking is used to simulate system command outputs and random choices.
 Pytest allow us to skip the test for windows if it's tested on a device other than windows
+The netlink backend is pinned off here so the mocked commands are the ones exercised, it is covered in test_netlink.py
 """
 
 
+@pytest.fixture(autouse=True)
+def subprocess_backend(monkeypatch):
+    """Force the subprocess backend, otherwise Linux hosts would go through rtnetlink."""
+    monkeypatch.setattr(spoof_mac_module, "DEFAULT_BACKEND", "subprocess")
+
+
 # ----------------------
 # Tests for get_current_mac
 # ----------------------
@@ -194,6 +208,7 @@ def test_change_mac_macos_success(mock_subprocess, mock_gen_mac, mock_get_mac, c
 @pytest.mark.skipif(sys.platform != "win32", reason="winreg only available on Windows")
 @patch('spoof_mac.get_current_mac', return_value="AA-BB-CC-DD-EE-FF")
 @patch('spoof_mac.generate_random_mac', return_value="A2-BC-DE-F1-23-45")
+@patch('spoof_mac._ADAPTER_INDEX', None)
 @patch('spoof_mac.winreg')
 @patch('spoof_mac.subprocess.check_call')
 def test_change_mac_windows_success(mock_subprocess, mock_winreg, mock_gen_mac, mock_get_mac, capsys):
@@ -203,9 +218,11 @@ def test_change_mac_windows_success(mock_subprocess, mock_winreg, mock_gen_mac,
     mock_subkey = MagicMock()
 
     mock_winreg.ConnectRegistry.return_value.__enter__.return_value = mock_reg
-    mock_winreg.OpenKey.side_effect = [mock_key, mock_subkey]
+    mock_winreg.OpenKey.side_effect = [mock_key, mock_subkey, mock_key, mock_subkey]
+    mock_winreg.QueryInfoKey.return_value = (1, 0, 0)
+    mock_winreg.EnumKey.return_value = "0000"
     mock_winreg.QueryValueEx.side_effect = [
-        ("some-instance-id",), ("Ethernet",)
+        ("Ethernet",), ("some-instance-id",)
     ]
 
     change_mac('windows', 'Ethernet')
@@ -246,8 +263,286 @@ def test_change_mac_windows_error(mock_subprocess, mock_winreg, mock_gen_mac, mo
     change_mac('windows', 'Ethernet')
     output = capsys.readouterr().out
     assert "something occurred, please check" in output
+
+def test_change_mac_windows_registry_index(capsys):
+    """Test that the Windows change writes the matching adapter through the registry index."""
+    registry = MemoryRegistry()
+    registry.add_key(ADAPTER_CLASS_KEY + r"\0000", DriverDesc="Realtek Wireless", NetCfgInstanceId="{A}")
+    registry.add_key(ADAPTER_CLASS_KEY + r"\0001", DriverDesc="Intel(R) Ethernet Connection", NetCfgInstanceId="{B}")
+    with patch.object(spoof_mac_module, "winreg", registry), \
+            patch.object(spoof_mac_module, "_ADAPTER_INDEX", None), \
+            patch.object(spoof_mac_module, "get_current_mac", return_value="AA-BB-CC-DD-EE-FF"), \
+            patch("subprocess.check_call") as mock_check_call:
+        change_mac('windows', 'Intel', new_mac="02-BC-DE-F1-23-45")
+    assert "Success macchange" in capsys.readouterr().out
+    assert registry.value(ADAPTER_CLASS_KEY + r"\0001", "NetworkAddress") == "02BCDEF12345"
+    assert mock_check_call.call_count == 2
+
 def test_change_mac_invalid_args(capfd):
     """Test behavior when an unsupported OS is provided: checks printed message and return value."""
     change_mac("beos", "eth0")
     output, err = capfd.readouterr()
-    assert "Enter a carried OS" in output
\ No newline at end of file
+    assert "Enter a carried OS" in output
+
+# ----------------------
+# Tests for get_all_macs
+# ----------------------
+
+@patch("subprocess.check_output")
+def test_get_all_macs_macos_success(mock_check_output):
+    """Test reading every interface with a single command, then looking one up without any."""
+    fake_output = "lo0: flags=8049<UP,LOOPBACK,RUNNING,MULTICAST> mtu 16384\nen0: flags=8863<UP,BROADCAST> mtu 1500\n\tether ab:cd:ef:12:34:56\n"
+    mock_check_output.return_value = fake_output.encode()
+    table = get_all_macs("macos")
+    assert table.macs() == {"lo0": None, "en0": "ab:cd:ef:12:34:56"}
+    assert get_current_mac("macos", "en0", table=table) == "ab:cd:ef:12:34:56"
+    assert mock_check_output.call_count == 1
+
+@patch("subprocess.check_output")
+def test_get_all_macs_error(mock_check_output, capsys):
+    """Test error handling when the snapshot command fails."""
+    mock_check_output.side_effect = Exception("Boom")
+    assert get_all_macs("windows") is None
+    assert "something occurred, please check" in capsys.readouterr().out
+
+def test_get_all_macs_invalid_os(capsys):
+    """Test behavior when an unsupported OS is provided."""
+    assert get_all_macs("beos") is None
+    assert "Enter a carried OS" in capsys.readouterr().out
+
+
+# ----------------------
+# Tests for change_macs
+# ----------------------
+
+class FakeIfconfig:
+    """Stand-in for ifconfig/macchanger that keeps one address per interface."""
+
+    def __init__(self, macs, broken=(), refuse_live=()):
+        self.macs = dict(macs)
+        self.broken = set(broken)
+        self.refuse_live = set(refuse_live)
+        self.down = set()
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def __call__(self, cmd, **kwargs):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(0.01)
+            interface = cmd[-1] if cmd[0] == 'macchanger' else cmd[1]
+            if interface in self.broken:
+                raise subprocess.CalledProcessError(returncode=1, cmd=cmd[0])
+            if cmd[0] == 'macchanger':
+                if interface in self.refuse_live and interface not in self.down:
+                    raise subprocess.CalledProcessError(returncode=1, cmd=cmd[0])
+                self.macs[interface] = cmd[2]
+            elif len(cmd) == 3:
+                (self.down.add if cmd[2] == 'down' else self.down.discard)(interface)
+            elif len(cmd) == 2:
+                return f"{interface}: flags=4163<UP>  mtu 1500\n        ether {self.macs[interface]}\n".encode()
+            return b""
+        finally:
+            with self.lock:
+                self.running -= 1
+
+def test_change_macs_unix_success():
+    """Test a batch where every interface is changed and verified."""
+    fake = FakeIfconfig({f"veth{i}": "aa:bb:cc:dd:ee:0%d" % i for i in range(4)})
+    plan = {"veth0": "02:00:00:00:00:01", "veth1": "02:00:00:00:00:02", "veth2": "random", "veth3": "random"}
+    with patch('subprocess.check_output', side_effect=fake):
+        results = change_macs(plan, 'unix', max_workers=4)
+    assert list(results) == list(plan)
+    assert all(result.status == "changed" for result in results.values())
+    assert results["veth0"].old_mac == "aa:bb:cc:dd:ee:00"
+    assert results["veth0"].new_mac == "02:00:00:00:00:01"
+    assert results["veth2"].new_mac == fake.macs["veth2"]
+    assert set(results["veth1"].timings) == {"read", "down", "set", "up", "verify"}
+    assert results["veth1"].elapsed >= sum(results["veth1"].timings.values())
+    assert results["veth1"].downtime >= results["veth1"].timings["up"]
+    assert fake.max_running > 1
+
+def test_change_macs_live_keeps_link_up():
+    """Test that a live batch changes the address without bringing the link down."""
+    fake = FakeIfconfig({"veth0": "aa:bb:cc:dd:ee:00"})
+    with patch('subprocess.check_output', side_effect=fake) as mock_check_output:
+        results = change_macs({"veth0": "02:00:00:00:00:01"}, 'unix', live=True)
+    assert results["veth0"].status == "changed"
+    assert results["veth0"].method == "live"
+    assert results["veth0"].downtime == 0.0
+    assert set(results["veth0"].timings) == {"read", "live", "verify"}
+    assert call(['ifconfig', 'veth0', 'down']) not in mock_check_output.call_args_list
+
+def test_change_macs_live_refused_falls_back_to_cycle():
+    """Test that a refused live change cycles the link instead."""
+    fake = FakeIfconfig({"veth0": "aa:bb:cc:dd:ee:00"}, refuse_live={"veth0"})
+    with patch('subprocess.check_output', side_effect=fake):
+        results = change_macs({"veth0": "02:00:00:00:00:01"}, 'unix', live=True)
+    assert results["veth0"].status == "changed"
+    assert results["veth0"].method == "cycle"
+    assert results["veth0"].downtime > 0
+    assert fake.macs["veth0"] == "02:00:00:00:00:01"
+
+def test_change_mac_live_unix(capsys):
+    """Test that change_mac reports a live change."""
+    fake = FakeIfconfig({"veth0": "aa:bb:cc:dd:ee:00"})
+    with patch('subprocess.check_output', side_effect=fake):
+        change_mac('unix', 'veth0', new_mac="02:00:00:00:00:01", live=True)
+    assert "veth0 kept up" in capsys.readouterr().out
+    assert not fake.down
+
+def test_change_macs_best_effort_reports_failures():
+    """Test that a failing interface is reported while the others are still changed."""
+    fake = FakeIfconfig({"veth0": "aa:bb:cc:dd:ee:00", "veth1": "aa:bb:cc:dd:ee:01"}, broken={"veth1"})
+    with patch('subprocess.check_output', side_effect=fake):
+        results = change_macs({"veth0": "random", "veth1": "random"}, 'unix')
+    assert results["veth0"].status == "changed"
+    assert results["veth1"].status == "failed"
+    assert isinstance(results["veth1"].error, subprocess.CalledProcessError)
+
+def test_change_macs_fail_fast_skips_the_rest():
+    """Test that fail_fast stops starting new interfaces after the first failure."""
+    fake = FakeIfconfig({f"veth{i}": "aa:bb:cc:dd:ee:00" for i in range(4)}, broken={"veth0"})
+    with patch('subprocess.check_output', side_effect=fake):
+        results = change_macs({f"veth{i}": "random" for i in range(4)}, 'unix', max_workers=1, fail_fast=True)
+    assert results["veth0"].status == "failed"
+    assert [results[f"veth{i}"].status for i in range(1, 4)] == ["skipped"] * 3
+
+def test_change_macs_failed_set_brings_the_link_back_up():
+    """Test that an interface whose new address is refused is not left down."""
+    fake = FakeIfconfig({"veth0": "aa:bb:cc:dd:ee:00"})
+
+    def refuse_address(cmd):
+        if cmd[0] == 'macchanger':
+            raise subprocess.CalledProcessError(returncode=1, cmd=cmd[0])
+        return fake(cmd)
+    with patch('subprocess.check_output', side_effect=refuse_address):
+        results = change_macs({"veth0": "02:00:00:00:00:01"}, 'unix')
+    assert results["veth0"].status == "failed"
+    assert set(results["veth0"].timings) == {"read", "down", "set", "up"}
+    assert not fake.down and fake.macs["veth0"] == "aa:bb:cc:dd:ee:00"
+
+def test_change_macs_verify_mismatch():
+    """Test that an address that did not stick is reported as a failure."""
+    fake = FakeIfconfig({"veth0": "aa:bb:cc:dd:ee:00"})
+    with patch('subprocess.check_output', side_effect=lambda cmd: b"" if cmd[0] == 'macchanger' else fake(cmd)):
+        results = change_macs({"veth0": "02:00:00:00:00:01"}, 'unix')
+    assert results["veth0"].status == "failed"
+    assert "expected 02:00:00:00:00:01" in str(results["veth0"].error)
+
+def test_change_macs_from_registry(tmp_path):
+    """Test that random addresses come from the registry and that those not applied are released."""
+    fake = FakeIfconfig({"veth0": "aa:bb:cc:dd:ee:00", "veth1": "aa:bb:cc:dd:ee:01", "veth2": "aa:bb:cc:dd:ee:02"},
+                        broken={"veth1"})
+    with MacRegistry(str(tmp_path / "macs.reg")) as registry, patch('subprocess.check_output', side_effect=fake):
+        results = change_macs({"veth0": "random", "veth1": "random", "veth2": "02:00:00:00:00:01"}, 'unix',
+                              registry=registry)
+        assert [result.status for result in results.values()] == ["changed", "failed", "changed"]
+        assert list(registry) == [Mac(fake.macs["veth0"])]
+
+def test_change_macs_invalid_os(capsys):
+    """Test behavior when an unsupported OS is provided."""
+    assert change_macs({"eth0": "random"}, "beos") is None
+    assert "Enter a carried OS" in capsys.readouterr().out
+
+
+# ----------------------
+# Tests for generate_random_macs
+# ----------------------
+
+def test_generate_random_macs_unix_success():
+    """Test a batch in Unix format: count, format and unicast/locally administered bits."""
+    macs = generate_random_macs(1000)
+    assert len(macs) == 1000
+    assert len(set(macs)) == 1000
+    for mac in macs:
+        assert re.fullmatch(r"[0-9a-f]{2}(:[0-9a-f]{2}){5}", mac)
+        first_octet = int(mac[:2], 16)
+        assert first_octet & 0x01 == 0
+        assert first_octet & 0x02 == 0x02
+
+def test_generate_random_macs_windows_success():
+    """Test a batch in Windows format."""
+    macs = generate_random_macs(10, fmt="windows")
+    assert all(re.fullmatch(r"[0-9A-F]{2}(-[0-9A-F]{2}){5}", mac) for mac in macs)
+
+def test_generate_random_macs_oui():
+    """Test that a fixed OUI is kept as-is in every address."""
+    macs = generate_random_macs(500, oui="00:1A:2B")
+    assert all(mac.startswith("00:1a:2b:") for mac in macs)
+    assert len(set(macs)) == 500
+
+def test_generate_random_macs_replaces_duplicates(monkeypatch):
+    """Test that duplicates drawn by the random source are replaced until the batch is unique."""
+    draws = iter([bytes(18), bytes(5) + b"\x01" + bytes(6), bytes(5) + b"\x02"])
+    sizes = []
+    monkeypatch.setattr(spoof_mac_module, "urandom", lambda size: sizes.append(size) or next(draws))
+    macs = generate_random_macs(3)
+    assert macs == ["02:00:00:00:00:00", "02:00:00:00:00:01", "02:00:00:00:00:02"]
+    assert sizes == [18, 12, 6]
+
+def test_generate_random_macs_not_unique(monkeypatch):
+    """Test that unique=False keeps whatever the random source produced."""
+    monkeypatch.setattr(spoof_mac_module, "urandom", lambda size: bytes(size))
+    assert generate_random_macs(2, unique=False) == ["02:00:00:00:00:00"] * 2
+
+def test_generate_random_macs_invalid_oui():
+    """Test that malformed or exhausted OUIs are rejected."""
+    with pytest.raises(ValueError):
+        generate_random_macs(1, oui="00:1a")
+    with pytest.raises(ValueError):
+        generate_random_macs((1 << 24) + 1, oui="00:1a:2b")
+
+def test_generate_random_macs_from_registry(tmp_path):
+    """Test that a batch drawn from a registry is recorded there and never drawn again."""
+    with MacRegistry(str(tmp_path / "macs.reg")) as registry:
+        first = generate_random_macs(100, fmt="windows", oui="00:1A:2B", registry=registry)
+        second = generate_random_macs(100, registry=registry)
+        assert all(re.fullmatch(r"00-1A-2B(-[0-9A-F]{2}){3}", mac) for mac in first)
+        assert len(registry) == len({Mac(mac) for mac in first + second}) == 200
+
+def test_generate_random_macs_invalid_os(capsys):
+    """Test behavior when an unsupported format is provided."""
+    assert generate_random_macs(1, fmt="beos") is None
+    assert "Enter a carried OS" in capsys.readouterr().out
+
+
+# ----------------------
+# Tests for Mac support
+# ----------------------
+
+@patch("subprocess.check_output")
+def test_get_current_mac_as_mac(mock_check_output):
+    """Test that get_current_mac can return a Mac."""
+    mock_check_output.return_value = b"wlan0: flags=... \n    ether ab:cd:ef:12:34:56"
+    assert get_current_mac("unix", "wlan0", as_mac=True) == Mac("ab:cd:ef:12:34:56")
+
+def test_generate_random_mac_as_mac():
+    """Test that generate_random_mac can return a Mac."""
+    mac = generate_random_mac("windows", as_mac=True)
+    assert isinstance(mac, Mac)
+    assert not mac.is_multicast
+
+@patch('spoof_mac.get_current_mac', return_value="aa:bb:cc:dd:ee:ff")
+@patch('subprocess.check_output', return_value=b"")
+def test_change_mac_accepts_mac(mock_subprocess, mock_get_mac, capsys):
+    """Test that change_mac applies a given Mac in the notation of the OS tools."""
+    change_mac('macos', 'en0', new_mac=Mac("02-00-00-00-00-01"))
+    assert call(['ifconfig', 'en0', 'ether', '02:00:00:00:00:01']) in mock_subprocess.call_args_list
+
+def test_change_mac_rejects_invalid_mac(capsys):
+    """Test that an invalid new_mac is reported instead of raised."""
+    change_mac('unix', 'eth0', new_mac="not-a-mac")
+    assert "something occurred, please check" in capsys.readouterr().out
+
+def test_change_macs_with_mac():
+    """Test that interfaces planned with a Mac report Macs."""
+    fake = FakeIfconfig({"veth0": "aa:bb:cc:dd:ee:00"})
+    with patch('subprocess.check_output', side_effect=fake):
+        results = change_macs({"veth0": Mac("0200.0000.0001")}, 'unix')
+    assert results["veth0"].status == "changed"
+    assert results["veth0"].old_mac == Mac("aa:bb:cc:dd:ee:00")
+    assert results["veth0"].new_mac == Mac("02:00:00:00:00:01")
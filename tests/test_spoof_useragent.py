@@ -1,6 +1,13 @@
+import hashlib
+import os
 import re
+import tracemalloc
+import pytest
 import requests
+from unittest.mock import patch
+from .. import spoof_useragent
 from ..spoof_useragent import get_random_useragent, make_request_with_useragent
+from .conftest import PATTERN
 
 def test_get_random_useragent_returns_string_success():
     """
@@ -20,6 +27,35 @@ def test_useragent_format_success():
     ua = get_random_useragent()
     assert re.match(r"Mozilla\/5\.0 \(.+\)", ua)
 
+def test_useragent_pool_is_loaded_once():
+    """
+    Test that the User-Agent source is loaded on the first call only,
+    and that reload() loads it again.
+    """
+    spoof_useragent.reload()
+    with patch.object(spoof_useragent, "_load_pool", wraps=spoof_useragent._load_pool) as mock_load:
+        with patch.object(spoof_useragent, "_pool", None):
+            for _ in range(100):
+                get_random_useragent()
+            assert mock_load.call_count == 1
+            spoof_useragent.reload()
+            assert mock_load.call_count == 2
+
+def test_load_useragents_from_file(tmp_path):
+    """
+    Test that a user file replaces the pool and that reload() re-reads it.
+    """
+    path = tmp_path / "agents.txt"
+    path.write_text("Mozilla/5.0 (Custom 1)\n")
+    try:
+        spoof_useragent.load_useragents(str(path))
+        assert get_random_useragent() == "Mozilla/5.0 (Custom 1)"
+        path.write_text("Mozilla/5.0 (Custom 2)\n")
+        spoof_useragent.reload()
+        assert get_random_useragent() == "Mozilla/5.0 (Custom 2)"
+    finally:
+        spoof_useragent._set_pool(None, None)
+
 def test_make_request_with_useragent_success():
     """
     Test that make_request_with_useragent() sends a successful request
@@ -50,4 +86,141 @@ def test_make_request_with_invalid_url():
     """
     invalid_url = "http://nonexistent.localhost"
     response = make_request_with_useragent(invalid_url)
-    assert response is None
\ No newline at end of file
+    assert response is None
+# ----------------------
+# Tests for UserAgentClient, against the local server of conftest.py
+# ----------------------
+
+def test_make_request_reuses_connection(http_server):
+    """
+    Test that successive requests to one host go over a single keep-alive connection.
+    """
+    spoof_useragent.get_client().close()
+    for _ in range(5):
+        response = make_request_with_useragent(http_server.url + "/headers", user_agent="MyCustomUserAgent/1.0")
+        assert response.json()["headers"]["User-Agent"] == "MyCustomUserAgent/1.0"
+    assert http_server.connections == 1
+
+def test_client_without_keep_alive(http_server):
+    """
+    Test that keep_alive=False opens one connection per request.
+    """
+    with spoof_useragent.UserAgentClient(keep_alive=False) as client:
+        for _ in range(3):
+            assert client.get(http_server.url + "/", "MyCustomUserAgent/1.0").status_code == 200
+    assert http_server.connections == 3
+
+def test_client_retries_unavailable(http_server):
+    """
+    Test that a 503 is retried with backoff until it succeeds.
+    """
+    http_server.flaky = 2
+    with spoof_useragent.UserAgentClient(max_retries=3, backoff_factor=0) as client:
+        response = client.get(http_server.url + "/flaky")
+    assert response.status_code == 200
+    assert len(http_server.requests) == 3
+
+def test_client_default_timeout(http_server):
+    """
+    Test that the default timeout of the client applies and can be overridden per call.
+    """
+    with spoof_useragent.UserAgentClient(timeout=0.1, max_retries=0) as client:
+        with pytest.raises(requests.Timeout):
+            client.get(http_server.url + "/delay/0.5")
+        assert client.get(http_server.url + "/delay/0.2", timeout=2).status_code == 200
+
+# ----------------------
+# Tests for the streaming mode
+# ----------------------
+
+def _expected_sha256(size):
+    digest = hashlib.sha256()
+    for offset in range(0, size, len(PATTERN)):
+        digest.update(PATTERN[:size - offset])
+    return digest.hexdigest()
+
+def test_download_hashes_without_keeping_body(http_server):
+    """
+    Test that a large body is hashed and counted with flat memory use.
+    """
+    size = 32 * 1024 * 1024
+    with spoof_useragent.UserAgentClient() as client:
+        tracemalloc.start()
+        try:
+            result = client.download(http_server.url + f"/bytes/{size}", user_agent="MyCustomUserAgent/1.0")
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    assert result.status == 200
+    assert result.length == size
+    assert result.digest == _expected_sha256(size)
+    assert not result.truncated
+    assert peak < 4 * 1024 * 1024
+
+def test_download_max_bytes_cutoff(http_server, tmp_path):
+    """
+    Test that max_bytes stops the download and that the file holds exactly what was hashed.
+    """
+    path = tmp_path / "body.bin"
+    with open(path, "wb") as file:
+        result = spoof_useragent.download_with_useragent(http_server.url + "/bytes/1000000", sink=file,
+                                                         max_bytes=100_000, chunk_size=4096)
+    assert result.truncated
+    assert result.length == 100_000
+    assert path.read_bytes() == (PATTERN * 2)[:100_000]
+    assert result.digest == _expected_sha256(100_000)
+
+def test_download_to_file_descriptor(http_server, tmp_path):
+    """
+    Test writing the body to a raw file descriptor, with a body exactly max_bytes long.
+    """
+    path = tmp_path / "body.bin"
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT)
+    try:
+        with spoof_useragent.UserAgentClient() as client:
+            result = client.download(http_server.url + "/bytes/5000", sink=fd, max_bytes=5000)
+    finally:
+        os.close(fd)
+    assert not result.truncated
+    assert path.read_bytes() == PATTERN[:5000]
+
+def test_failed_download_keeps_existing_file(http_server, tmp_path, capsys):
+    """
+    Test that a failed request leaves the file in place, and that an unwritable sink is reported.
+    """
+    path = tmp_path / "body.bin"
+    path.write_bytes(b"previous body")
+    with patch.object(spoof_useragent.UserAgentClient, "get", side_effect=requests.ConnectionError("refused")):
+        assert spoof_useragent.download_with_useragent(http_server.url + "/bytes/5000", sink=str(path)) is None
+    assert path.read_bytes() == b"previous body"
+    assert os.listdir(tmp_path) == ["body.bin"]
+    assert spoof_useragent.download_with_useragent(http_server.url + "/bytes/5000",
+                                                   sink=str(tmp_path / "missing" / "body.bin")) is None
+    assert "something occurred, please check" in capsys.readouterr().out
+    result = spoof_useragent.download_with_useragent(http_server.url + "/bytes/5000", sink=str(path))
+    assert result.length == 5000 and path.read_bytes() == PATTERN[:5000]
+    assert os.listdir(tmp_path) == ["body.bin"]
+
+def test_error_page_or_partial_body_keeps_existing_file(http_server, tmp_path):
+    """
+    Test that neither a 404 page nor a body cut by max_bytes replaces a file, or creates one.
+    """
+    path = tmp_path / "body.bin"
+    path.write_bytes(b"previous body")
+    result = spoof_useragent.download_with_useragent(http_server.url + "/status/404", sink=str(path))
+    assert result.status == 404
+    result = spoof_useragent.download_with_useragent(http_server.url + "/bytes/5000", sink=str(path), max_bytes=100)
+    assert result.truncated and result.length == 100
+    assert path.read_bytes() == b"previous body"
+    result = spoof_useragent.download_with_useragent(http_server.url + "/bytes/5000", sink=str(tmp_path / "new.bin"),
+                                                     max_bytes=100)
+    assert result.truncated and os.listdir(tmp_path) == ["body.bin"]
+
+def test_iter_body_chunks(http_server):
+    """
+    Test that iter_body yields chunks of the requested size, cut at max_bytes.
+    """
+    with spoof_useragent.UserAgentClient() as client:
+        response = client.get(http_server.url + "/bytes/10000", stream=True)
+        chunks = list(spoof_useragent.iter_body(response, chunk_size=1024, max_bytes=3000))
+    assert [len(chunk) for chunk in chunks] == [1024, 1024, 952]
@@ -0,0 +1,144 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from .. import spoof_useragent, uaparse
+from ..uaparse import PARSER_VERSION, ClassificationCache, UAIndex, UAInfo, classify_all, parse_useragent
+from ..uapool import UserAgentPool
+
+"""
+Unit tests for the `uaparse` module and the classified selection of `spoof_useragent`.
+"""
+
+CHROME_WINDOWS = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.6312.105 Safari/537.36"
+EDGE_MAC = "Mozilla/5.0 (Macintosh; Intel Mac OS X 13_4_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.6312.105 Safari/537.36 Edg/123.0.2420.81"
+FIREFOX_LINUX = "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:126.0) Gecko/20100101 Firefox/126.0"
+SAFARI_MAC = "Mozilla/5.0 (Macintosh; Intel Mac OS X 13_4_1) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Safari/605.1.15"
+SAFARI_IPHONE = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Mobile/15E148 Safari/604.1"
+CHROME_IPHONE = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) CriOS/124.0.6367.88 Mobile/15E148 Safari/604.1"
+SAFARI_IPAD = "Mozilla/5.0 (iPad; CPU OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Mobile/15E148 Safari/604.1"
+CHROME_ANDROID = "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.6312.105 Mobile Safari/537.36"
+SAMSUNG_TABLET = "Mozilla/5.0 (Linux; Android 13; SM-X700) AppleWebKit/537.36 (KHTML, like Gecko) SamsungBrowser/24.0 Chrome/117.0.0.0 Safari/537.36"
+GOOGLEBOT = "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)"
+
+
+# ----------------------
+# Tests for parse_useragent
+# ----------------------
+
+@pytest.mark.parametrize("user_agent, expected", [
+    (CHROME_WINDOWS, UAInfo("chrome", "blink", "windows", "desktop", 123)),
+    (EDGE_MAC, UAInfo("edge", "blink", "macos", "desktop", 123)),
+    (FIREFOX_LINUX, UAInfo("firefox", "gecko", "linux", "desktop", 126)),
+    (SAFARI_MAC, UAInfo("safari", "webkit", "macos", "desktop", 17)),
+    (SAFARI_IPHONE, UAInfo("safari", "webkit", "ios", "mobile", 17)),
+    (CHROME_IPHONE, UAInfo("chrome", "webkit", "ios", "mobile", 124)),
+    (SAFARI_IPAD, UAInfo("safari", "webkit", "ios", "tablet", 17)),
+    (CHROME_ANDROID, UAInfo("chrome", "blink", "android", "mobile", 123)),
+    (SAMSUNG_TABLET, UAInfo("samsung", "blink", "android", "tablet", 24)),
+    (GOOGLEBOT, UAInfo("bot", "other", "other", "bot", None)),
+    ("", UAInfo("other", "other", "other", "desktop", None)),
+])
+def test_parse_useragent(user_agent, expected):
+    """Test the classification of common desktop, mobile, tablet and bot User-Agents."""
+    assert parse_useragent(user_agent) == expected
+
+
+def test_static_pool_covers_mobile_safari():
+    """Test that the fallback list classifies into both desktop and mobile agents."""
+    devices = {parse_useragent(agent).device for agent in spoof_useragent.STATIC_USER_AGENTS}
+    assert devices == {"desktop", "mobile", "tablet"}
+
+
+# ----------------------
+# Tests for ClassificationCache
+# ----------------------
+
+def test_classification_cache_persists(tmp_path):
+    """Test that a second load of the same pool parses nothing."""
+    path = str(tmp_path / "sub" / "uaclass.json")
+    agents = [CHROME_WINDOWS, SAFARI_IPHONE, GOOGLEBOT]
+    first = classify_all(agents, path)
+    with patch.object(uaparse, "parse_useragent", wraps=parse_useragent) as mock_parse:
+        assert classify_all(agents, path) == first
+        assert mock_parse.call_count == 0
+        classify_all(agents + [FIREFOX_LINUX], path)
+        assert mock_parse.call_count == 1
+    assert len(ClassificationCache(path)) == 4
+
+
+def test_classification_cache_ignores_other_versions(tmp_path):
+    """Test that classifications written by other rules are discarded."""
+    path = tmp_path / "uaclass.json"
+    path.write_text(json.dumps({"version": PARSER_VERSION + 1, "agents": {CHROME_WINDOWS: ["x"] * 5}}))
+    assert len(ClassificationCache(str(path))) == 0
+    path.write_text("not json")
+    assert ClassificationCache(str(path)).classify(CHROME_WINDOWS).browser == "chrome"
+
+
+# ----------------------
+# Tests for UAIndex and the classified pools
+# ----------------------
+
+def test_index_matches_every_field_combination():
+    """Test lookups on one field, several fields and no match."""
+    agents = [CHROME_WINDOWS, SAFARI_IPHONE, CHROME_ANDROID, SAFARI_MAC, SAFARI_IPAD]
+    index = UAIndex([parse_useragent(agent) for agent in agents])
+    assert index.matches(device="mobile") == [1, 2]
+    assert index.matches(browser="Safari", device="mobile") == [1]
+    assert index.matches(browser="safari", os="ios") == [1, 4]
+    assert index.matches(browser="chrome", major="123") == [0, 2]
+    assert index.matches() == [0, 1, 2, 3, 4]
+    assert index.matches(browser="firefox") == []
+    with pytest.raises(TypeError):
+        index.matches(vendor="apple")
+
+
+def test_index_stores_each_group_once():
+    """Test that duplicate classifications share one position list, gathered per query on first use."""
+    agents = [CHROME_WINDOWS, SAFARI_IPHONE] * 50 + [CHROME_ANDROID]
+    index = UAIndex([parse_useragent(agent) for agent in agents])
+    assert sum(len(positions) for positions in index._groups) == len(agents)
+    assert not index._postings
+    assert index.matches(browser="safari") is index.matches(device="mobile", os="ios")
+    assert index.matches(browser="chrome") == list(range(0, 100, 2)) + [100]
+    assert len(index._postings) == 3
+
+
+def test_pool_pick_respects_weights():
+    """Test that weighted picks stay within the matches and follow their weights."""
+    pool = UserAgentPool([CHROME_WINDOWS, SAFARI_IPHONE, CHROME_ANDROID, SAFARI_MAC], [1, 1, 3, 0])
+    pool.classify()
+    draws = [pool.pick(lambda value=value: value, device="mobile") for value in (0.05, 0.3, 0.55, 0.8, 0.95)]
+    assert set(draws) == {SAFARI_IPHONE, CHROME_ANDROID}
+    assert draws.count(CHROME_ANDROID) > draws.count(SAFARI_IPHONE)
+    assert pool.pick(browser="safari", device="desktop") is None
+    assert pool.info(SAFARI_IPHONE).os == "ios"
+
+
+def test_get_useragent_from_shared_pool():
+    """Test selections by device and browser on the default pool."""
+    spoof_useragent.reload()
+    ua = spoof_useragent.get_useragent(device="mobile", browser="safari")
+    assert parse_useragent(ua)[::3] == ("safari", "mobile")
+    assert parse_useragent(spoof_useragent.get_useragent(device="desktop")).device == "desktop"
+    assert spoof_useragent.get_useragent(browser="netscape") is None
+
+
+def test_shared_pool_classified_only_by_criteria(tmp_path, monkeypatch):
+    """Test that plain random picks never classify, and the cache is written only when configured."""
+    monkeypatch.setattr(spoof_useragent, "CLASSIFICATION_CACHE", None)
+    spoof_useragent.reload()
+    assert spoof_useragent.get_random_useragent()
+    assert spoof_useragent.get_useragent_pool().index is None
+    assert spoof_useragent.get_useragent(device="mobile")
+    assert spoof_useragent.get_useragent_pool().index is not None
+
+    cache = tmp_path / "uaclass.json"
+    monkeypatch.setattr(spoof_useragent, "CLASSIFICATION_CACHE", str(cache))
+    spoof_useragent.reload()
+    spoof_useragent.get_random_useragent()
+    assert not cache.exists()
+    spoof_useragent.get_useragent(browser="firefox")
+    assert cache.exists()
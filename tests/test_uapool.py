@@ -0,0 +1,89 @@
+from collections import Counter
+
+import pytest
+
+from ..uapool import AliasTable, UserAgentPool
+
+"""
+Unit tests for the `uapool` module.
+
+Sampling is checked deterministically by feeding evenly spaced values instead of random ones.
+"""
+
+
+def _evenly(count):
+    values = iter([(i + 0.5) / count for i in range(count)])
+    return lambda: next(values)
+
+
+# ----------------------
+# Tests for AliasTable
+# ----------------------
+
+def test_alias_table_matches_weights():
+    """Test that evenly spread draws hit every index in proportion to its weight."""
+    weights = [1, 2, 3, 10]
+    table = AliasTable(weights)
+    rand = _evenly(16_000)
+    counts = Counter(table.sample(rand) for _ in range(16_000))
+    assert [counts[i] for i in range(4)] == [1000, 2000, 3000, 10_000]
+
+
+def test_alias_table_zero_weight_never_drawn():
+    """Test that an index with a zero weight is never returned."""
+    table = AliasTable([0, 1, 0, 1])
+    rand = _evenly(1000)
+    assert {table.sample(rand) for _ in range(1000)} == {1, 3}
+
+
+@pytest.mark.parametrize("weights", [[], [0, 0], [1, -1]])
+def test_alias_table_invalid_weights(weights):
+    """Test that empty, all-zero and negative weights are rejected."""
+    with pytest.raises(ValueError):
+        AliasTable(weights)
+
+
+# ----------------------
+# Tests for UserAgentPool
+# ----------------------
+
+def test_pool_uniform_and_weighted():
+    """Test that a pool without weights is uniform and one with weights follows them."""
+    uniform = UserAgentPool(["a", "b"])
+    rand = _evenly(10)
+    assert Counter(uniform.random(rand) for _ in range(10)) == {"a": 5, "b": 5}
+    weighted = UserAgentPool(["a", "b"], [3, 1])
+    rand = _evenly(8)
+    assert Counter(weighted.random(rand) for _ in range(8)) == {"a": 6, "b": 2}
+
+
+def test_pool_rejects_empty_or_mismatched():
+    """Test the pool construction errors."""
+    with pytest.raises(ValueError):
+        UserAgentPool([])
+    with pytest.raises(ValueError):
+        UserAgentPool(["a", "b"], [1])
+
+
+def test_pool_from_lines_weights_and_comments():
+    """Test the file format: comments, blank lines and optional tab-separated weights."""
+    pool = UserAgentPool.from_lines(["# my agents\n", "\n", "2.5\tMozilla/5.0 (X11)\n", "Mozilla/5.0 (Mac)\n"])
+    assert pool.agents == ("Mozilla/5.0 (X11)", "Mozilla/5.0 (Mac)")
+    assert pool.weights == (2.5, 1.0)
+
+
+@pytest.mark.parametrize("use_mmap", [True, False])
+def test_pool_from_file(tmp_path, use_mmap):
+    """Test loading a file through mmap and as a stream."""
+    path = tmp_path / "agents.txt"
+    path.write_text("Mozilla/5.0 (Windows NT 10.0)\nMozilla/5.0 (X11; Linux x86_64)\n", encoding="utf-8")
+    pool = UserAgentPool.from_file(str(path), use_mmap=use_mmap)
+    assert list(pool) == ["Mozilla/5.0 (Windows NT 10.0)", "Mozilla/5.0 (X11; Linux x86_64)"]
+
+
+def test_pool_from_empty_file(tmp_path):
+    """Test that an empty file is rejected rather than giving an empty pool."""
+    path = tmp_path / "agents.txt"
+    path.write_text("")
+    with pytest.raises(ValueError):
+        UserAgentPool.from_file(str(path))
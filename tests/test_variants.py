@@ -0,0 +1,132 @@
+import asyncio
+import tracemalloc
+
+import pytest
+
+from .. import fetch
+from ..variants import MAX_TOKEN, BodySketch, compare_all, compare_variants, relation, similarity
+
+"""
+Unit tests for the `variants` module.
+
+The comparisons run against the /page route of the local server (see conftest.py), which
+serves a slightly different page to mobile User-Agents and another page to bots.
+"""
+
+DESKTOP = "Mozilla/5.0 (X11; Linux x86_64; rv:126.0) Gecko/20100101 Firefox/126.0"
+DESKTOP_2 = "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:126.0) Gecko/20100101 Firefox/126.0"
+MOBILE = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148 Safari/604.1"
+BOT = "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)"
+CLASSES = {"desktop": DESKTOP, "desktop-2": DESKTOP_2, "mobile": MOBILE, "bot": BOT}
+
+TEXT = b" ".join(b"word%d" % (i % 700) for i in range(5000))
+
+
+def _sketch(data, chunk_size=None, **kwargs):
+    sketch = BodySketch(**kwargs)
+    for offset in range(0, len(data), chunk_size or len(data) or 1):
+        sketch.update(data[offset:offset + (chunk_size or len(data))])
+    return sketch.finish(200)
+
+
+# ----------------------
+# Tests for BodySketch
+# ----------------------
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_sketch_ignores_chunk_boundaries(chunk_size):
+    """Test that the sketch of a body does not depend on how it was split."""
+    assert _sketch(TEXT, chunk_size) == _sketch(TEXT)
+
+
+@pytest.mark.parametrize("chunk_size", [1000, MAX_TOKEN, MAX_TOKEN + 1, 3 * MAX_TOKEN])
+def test_sketch_long_tokens_ignore_chunk_boundaries(chunk_size):
+    """Test that tokens longer than MAX_TOKEN hash the same however the body is split."""
+    body = b"<p>" + b"x" * (3 * MAX_TOKEN) + b" " + b"y" * (2 * MAX_TOKEN) + b"</p> end " + b"z" * (5 * MAX_TOKEN)
+    whole = _sketch(body, shingle=2)
+    assert _sketch(body, chunk_size, shingle=2) == whole
+    assert len(whole.minhash) == 5
+
+
+def test_sketch_keeps_k_hashes():
+    """Test the signature size, length and digest of a sketch."""
+    sketch = _sketch(TEXT, k=64)
+    assert len(sketch.minhash) == 64
+    assert list(sketch.minhash) == sorted(sketch.minhash)
+    assert sketch.length == len(TEXT)
+
+
+def test_similarity_estimates():
+    """Test the estimate on identical, slightly edited, unrelated and tiny bodies."""
+    edited = TEXT.replace(b"word350 word351", b"changed words", 1)
+    other = b" ".join(b"other%d" % i for i in range(5000))
+    assert similarity(_sketch(TEXT), _sketch(TEXT)) == 1.0
+    assert similarity(_sketch(TEXT), _sketch(edited)) > 0.9
+    assert similarity(_sketch(TEXT), _sketch(other)) < 0.1
+    assert similarity(_sketch(b"a b"), _sketch(b"a b")) == 1.0
+    assert similarity(_sketch(b""), _sketch(b"")) == 1.0
+
+
+def test_relation_of_statuses():
+    """Test that the status is part of the comparison."""
+    first = _sketch(TEXT)
+    assert relation(first, first._replace(status=404)) == ("different", 1.0)
+    assert relation(first, first._replace(digest="x")) == ("near-identical", 1.0)
+    assert relation(first, first._replace(error=OSError()))[0] == "error"
+
+
+# ----------------------
+# Tests for compare_variants
+# ----------------------
+
+def test_compare_variants_by_class(http_server):
+    """Test identical, near-identical and different variants of one page."""
+    [report] = compare_all([f"{http_server.url}/page/200"], classes=CLASSES)
+    assert report.pairs["desktop", "desktop-2"][0] == "identical"
+    assert report.pairs["desktop", "mobile"][0] == "near-identical"
+    assert report.pairs["desktop", "bot"][0] == "different"
+    assert report.verdict == "different"
+    assert list(report.sketches) == list(CLASSES)
+    assert {headers["User-Agent"] for _path, headers in http_server.requests} == set(CLASSES.values())
+
+
+def test_compare_variants_default_classes(http_server):
+    """Test the desktop / mobile classes drawn from the User-Agent pool, and failures."""
+    reports = {report.url: report for report in compare_all([f"{http_server.url}/page/50", "ftp://x/"])}
+    assert reports[f"{http_server.url}/page/50"].verdict == "near-identical"
+    assert reports["ftp://x/"].verdict == "error"
+    assert isinstance(reports["ftp://x/"].sketches["mobile"].error, ValueError)
+
+
+def test_compare_variants_bounded_memory(http_server):
+    """Test that many URLs and large bodies are compared without keeping the bodies."""
+    urls = [f"{http_server.url}/page/5000?n={i}" for i in range(4)] + [f"{http_server.url}/page/10"] * 3
+    tracemalloc.start()
+    try:
+        reports = compare_all(urls, classes={"desktop": DESKTOP, "mobile": MOBILE}, concurrency=4, timeout=60)
+        _size, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(reports) == len(urls)
+    # The menu is a small part of a large page, but a large part of a 10-line one.
+    assert [report.verdict for report in reports].count("near-identical") == 4
+    assert [report.verdict for report in reports].count("different") == 3
+    total = sum(sketch.length for report in reports for sketch in report.sketches.values())
+    assert total > 2_500_000
+    assert peak < 2 * 1024 * 1024
+
+
+
+def test_compare_variants_stalled_consumer_bounds_requests(http_server, monkeypatch):
+    """Test that a consumer that stops pulling reports also stops the requests after the read-ahead."""
+    monkeypatch.setattr(fetch, "READ_AHEAD", 2)
+    urls = (f"{http_server.url}/page/10?n={i}" for i in range(500))
+
+    async def stall():
+        stream = compare_variants(urls, classes={"desktop": DESKTOP, "mobile": MOBILE}, concurrency=2, per_host=2)
+        async for _report in stream:
+            await asyncio.sleep(0.5)
+            await stream.aclose()
+    asyncio.run(stall())
+    # 2 * 2 results waiting unyielded, plus the few taken before the first report was complete.
+    assert len(http_server.requests) <= 12
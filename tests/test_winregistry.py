@@ -0,0 +1,99 @@
+import pytest
+
+from ..winregistry import ADAPTER_CLASS_KEY, Adapter, AdapterIndex, MemoryRegistry
+
+"""
+Unit tests for the `winregistry` module.
+
+Every test runs against the in-memory `MemoryRegistry`, so they pass on any platform.
+"""
+
+
+def _registry(count=3):
+    registry = MemoryRegistry()
+    for i in range(count):
+        registry.add_key(rf"{ADAPTER_CLASS_KEY}\{i:04}", DriverDesc=f"Virtual Adapter #{i}",
+                         NetCfgInstanceId=f"{{0000000{i}-0000-0000-0000-000000000000}}")
+    registry.add_key(rf"{ADAPTER_CLASS_KEY}\Properties")
+    return registry
+
+
+# ----------------------
+# Tests for AdapterIndex lookups
+# ----------------------
+
+def test_adapters_skip_keys_without_driver_desc():
+    """Test that the index lists the adapter subkeys in order and skips "Properties"."""
+    index = AdapterIndex(_registry())
+    assert [adapter.subkey for adapter in index.adapters()] == ["0000", "0001", "0002"]
+
+
+def test_find_by_description_instance_id_and_substring():
+    """Test the three ways of naming an adapter."""
+    index = AdapterIndex(_registry())
+    assert index.find("Virtual Adapter #1") == Adapter("0001", "Virtual Adapter #1",
+                                                       "{00000001-0000-0000-0000-000000000000}")
+    assert index.find("{00000002-0000-0000-0000-000000000000}").subkey == "0002"
+    assert index.find("adapter #0").subkey == "0000"
+    assert index.find("Bluetooth") is None
+
+
+def test_index_is_built_once():
+    """Test that later lookups only open the class key to check its subkey count."""
+    registry = _registry(100)
+    index = AdapterIndex(registry)
+    index.find("Virtual Adapter #5")
+    registry.opened.clear()
+    index.find("Virtual Adapter #99")
+    assert len(registry.opened) == 1
+
+
+def test_index_rebuilt_when_subkey_count_changes():
+    """Test that a new adapter is found without an explicit invalidate()."""
+    registry = _registry()
+    index = AdapterIndex(registry)
+    assert index.find("USB Ethernet") is None
+    registry.add_key(rf"{ADAPTER_CLASS_KEY}\0003", DriverDesc="USB Ethernet", NetCfgInstanceId="{X}")
+    assert index.find("USB Ethernet").subkey == "0003"
+
+
+# ----------------------
+# Tests for set_network_address
+# ----------------------
+
+def test_set_network_address_opens_one_key_for_writing():
+    """Test that only the modified subkey is opened with KEY_SET_VALUE."""
+    registry = _registry(50)
+    index = AdapterIndex(registry)
+    assert index.set_network_address("Virtual Adapter #7", "02:bc:de:f1:23:45") is True
+    assert registry.value(rf"{ADAPTER_CLASS_KEY}\0007", "NetworkAddress") == "02bcdef12345"
+    writable = [path for path, access in registry.opened if access != registry.KEY_READ]
+    assert writable == [rf"HKEY_LOCAL_MACHINE\{ADAPTER_CLASS_KEY}\0007"]
+    assert all(access in (registry.KEY_READ, registry.KEY_SET_VALUE) for _path, access in registry.opened)
+
+
+def test_set_network_address_unknown_adapter():
+    """Test that an unknown adapter is reported and nothing is written."""
+    registry = _registry()
+    assert AdapterIndex(registry).set_network_address("Bluetooth", "02-BC-DE-F1-23-45") is False
+    assert all(access == registry.KEY_READ for _path, access in registry.opened)
+
+
+def test_set_network_address_retries_after_stale_index():
+    """Test that a subkey replaced behind the index (same count) is found again."""
+    registry = _registry()
+    index = AdapterIndex(registry)
+    index.find("Virtual Adapter #2")
+    registry.delete_key(rf"{ADAPTER_CLASS_KEY}\0002")
+    registry.add_key(rf"{ADAPTER_CLASS_KEY}\0003", DriverDesc="Virtual Adapter #2", NetCfgInstanceId="{Y}")
+    assert index.set_network_address("Virtual Adapter #2", "02-BC-DE-F1-23-45") is True
+    assert registry.value(rf"{ADAPTER_CLASS_KEY}\0003", "NetworkAddress") == "02BCDEF12345"
+
+
+def test_memory_registry_denies_writes_on_read_only_keys():
+    """Test that the fake enforces the access mode like the real registry."""
+    registry = _registry(1)
+    with registry.ConnectRegistry(None, registry.HKEY_LOCAL_MACHINE) as hklm:
+        key = registry.OpenKey(hklm, rf"{ADAPTER_CLASS_KEY}\0000")
+        with pytest.raises(PermissionError):
+            registry.SetValueEx(key, "NetworkAddress", 0, registry.REG_SZ, "02BCDEF12345")
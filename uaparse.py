@@ -0,0 +1,247 @@
+"""
+uaparse.py
+
+This module classifies User-Agent strings:
+- `parse_useragent()` extracts the browser, rendering engine, OS, device type and
+  browser major version with a fixed list of precompiled rules
+- `ClassificationCache` keeps the classifications in a JSON file, so a pool is only
+  parsed once across runs
+- `UAIndex` maps every combination of those fields to the matching pool entries, so
+  "a mobile Safari" is a dictionary lookup followed by an O(1) pick
+
+Values are lowercase: browsers chrome, firefox, safari, edge, opera, samsung, ie, bot,
+other; engines blink, gecko, webkit, trident, other; os windows, macos, ios, android,
+linux, chromeos, other; devices desktop, mobile, tablet, bot.
+"""
+
+import json
+import os
+import re
+from collections import namedtuple
+from functools import lru_cache
+from itertools import product
+try:
+    from .uapool import AliasTable
+except ImportError:
+    from uapool import AliasTable
+
+UAInfo = namedtuple("UAInfo", ["browser", "engine", "os", "device", "major"])
+UAInfo.__doc__ = """Classification of one User-Agent, major is the browser major version (int) or None."""
+
+FIELDS = UAInfo._fields
+# Bump when the rules change, so cached classifications are recomputed.
+PARSER_VERSION = 1
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "spoof_tool", "uaclass.json")
+
+# Matched against the lowercased User-Agent.
+_BOT = re.compile(r'bot\b|crawl|spider|slurp|curl/|wget/|python-requests')
+# (browser, engine, pattern with the major version in group 1), the first match wins. The
+# patterns start with a literal so the regex engine can skip ahead to it.
+_BROWSERS = [
+    ("edge", "blink", re.compile(r'Edg(?:e|A|iOS)?/(\d+)')),
+    ("opera", "blink", re.compile(r'(?:OPR|Opera)/(\d+)')),
+    ("samsung", "blink", re.compile(r'SamsungBrowser/(\d+)')),
+    ("firefox", "gecko", re.compile(r'(?:Firefox|FxiOS)/(\d+)')),
+    ("chrome", "blink", re.compile(r'(?:Chrome|Chromium|CriOS)/(\d+)')),
+    ("safari", "webkit", re.compile(r'Version/(\d+)[.\d]* (?:Mobile/\S+ )?Safari/')),
+    ("ie", "trident", re.compile(r'(?:MSIE |Trident/.*rv:)(\d+)')),
+]
+# Plain substring tests, cheaper than regex alternations.
+_OS = [
+    ("ios", ("iPhone", "iPad", "iPod", "CPU OS ")),
+    ("android", ("Android",)),
+    ("chromeos", ("CrOS",)),
+    ("windows", ("Windows",)),
+    ("macos", ("Mac OS X", "Macintosh")),
+    ("linux", ("Linux", "X11")),
+]
+_TABLET = ("iPad", "Tablet", "Kindle", "Silk/")
+_MOBILE = ("Mobi", "iPhone", "iPod", "Windows Phone")
+
+
+@lru_cache(maxsize=4096)
+def parse_useragent(user_agent):
+    """
+    Classify one User-Agent string.
+
+    Args:
+        user_agent (str): e.g. "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) ...".
+
+    Returns:
+        UAInfo: browser, engine, os, device and major version.
+    """
+    user_agent = user_agent or ""
+    os_name = next((name for name, tokens in _OS if any(token in user_agent for token in tokens)), "other")
+    if _BOT.search(user_agent.lower()):
+        return UAInfo("bot", "other", os_name, "bot", None)
+    browser, engine, major = "other", "other", None
+    for name, browser_engine, pattern in _BROWSERS:
+        match = pattern.search(user_agent)
+        if match:
+            browser, engine, major = name, browser_engine, int(match.group(1))
+            break
+    if os_name == "ios":
+        # Every iOS browser runs on WebKit.
+        engine = "webkit"
+    elif engine == "other" and "AppleWebKit/" in user_agent:
+        engine = "webkit"
+    elif engine == "other" and "Gecko/" in user_agent:
+        engine = "gecko"
+    if any(token in user_agent for token in _TABLET) or (os_name == "android" and "Mobile" not in user_agent):
+        device = "tablet"
+    elif any(token in user_agent for token in _MOBILE):
+        device = "mobile"
+    else:
+        device = "desktop"
+    return UAInfo(browser, engine, os_name, device, major)
+
+
+class ClassificationCache:
+    """
+    User-Agent -> UAInfo classifications persisted in a JSON file.
+
+    Args:
+        path (str): the JSON file, created on `save()`; its content is ignored when it was
+                    written by another PARSER_VERSION.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self._infos = {}
+        self._dirty = False
+        try:
+            with open(path, encoding="utf-8") as file:
+                data = json.load(file)
+            if data.get("version") == PARSER_VERSION:
+                self._infos = {agent: UAInfo(*info) for agent, info in data["agents"].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def __len__(self):
+        return len(self._infos)
+
+    def classify(self, user_agent):
+        """Return the cached UAInfo of user_agent, parsing and recording it on a miss."""
+        info = self._infos.get(user_agent)
+        if info is None:
+            info = self._infos[user_agent] = parse_useragent(user_agent)
+            self._dirty = True
+        return info
+
+    def save(self):
+        """Write the file if new User-Agents were classified (best effort, errors are ignored)."""
+        if not self._dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path + ".tmp", "w", encoding="utf-8") as file:
+                json.dump({"version": PARSER_VERSION, "agents": self._infos}, file)
+            os.replace(self.path + ".tmp", self.path)
+            self._dirty = False
+        except OSError:
+            pass
+
+
+def classify_all(agents, cache_path=DEFAULT_CACHE_PATH):
+    """
+    Classify every User-Agent, through the persistent cache unless cache_path is None.
+
+    Returns:
+        list[UAInfo]: one classification per agent, in order.
+    """
+    if cache_path is None:
+        return [parse_useragent(agent) for agent in agents]
+    cache = ClassificationCache(cache_path)
+    infos = [cache.classify(agent) for agent in agents]
+    cache.save()
+    return infos
+
+
+class UAIndex:
+    """
+    Inverted index of classified pool entries.
+
+    Entries with the same classification form a group, stored once; every group is filed
+    under each of the 32 combinations of its fields with wildcards, so any query on browser /
+    engine / os / device / major finds its matching groups with a single dictionary lookup.
+    The positions and weighted sampler of a query are gathered on its first use.
+
+    Args:
+        infos (list[UAInfo]): the classification of each pool entry.
+        weights (list[float] | None): the pool weights, None for uniform picks.
+    """
+
+    def __init__(self, infos, weights=None):
+        self.infos = list(infos)
+        self._weights = weights
+        self._postings = {}
+        self._tables = {}
+        # Pools hold many agents but few distinct classifications: group them first.
+        groups = {}
+        for position, info in enumerate(self.infos):
+            groups.setdefault(info, []).append(position)
+        self._groups = list(groups.values())
+        self._group_ids = {}
+        masks = list(product((False, True), repeat=len(FIELDS)))
+        for group_id, info in enumerate(groups):
+            for mask in masks:
+                key = tuple(value if keep else None for value, keep in zip(info, mask))
+                self._group_ids.setdefault(key, []).append(group_id)
+
+    @staticmethod
+    def _key(criteria):
+        unknown = set(criteria) - set(FIELDS)
+        if unknown:
+            raise TypeError(f"unknown User-Agent field(s): {', '.join(sorted(unknown))}")
+        key = []
+        for field in FIELDS:
+            value = criteria.get(field)
+            if value is not None and field == "major":
+                value = int(value)
+            elif isinstance(value, str):
+                value = value.lower()
+            key.append(value)
+        return tuple(key)
+
+    def _positions(self, key):
+        positions = self._postings.get(key)
+        if positions is None:
+            group_ids = self._group_ids.get(key)
+            if group_ids is None:
+                return []
+            if len(group_ids) == 1:
+                positions = self._groups[group_ids[0]]
+            else:
+                positions = [position for group_id in group_ids for position in self._groups[group_id]]
+            self._postings[key] = positions
+        return positions
+
+    def matches(self, **criteria):
+        """
+        Returns:
+            list[int]: positions of the pool entries matching every given field (not a copy).
+        """
+        return self._positions(self._key(criteria))
+
+    def pick(self, rand, **criteria):
+        """
+        Args:
+            rand (callable): returns a float in [0, 1).
+            **criteria: browser, engine, os, device and/or major.
+
+        Returns:
+            int: the position of a matching entry, drawn by weight, or None if nothing matches.
+        """
+        key = self._key(criteria)
+        positions = self._positions(key)
+        if not positions:
+            return None
+        if self._weights is None:
+            return positions[int(rand() * len(positions))]
+        table = self._tables.get(key)
+        if table is None:
+            weights = [self._weights[position] for position in positions]
+            if not sum(weights) > 0:
+                return None
+            table = self._tables[key] = AliasTable(weights)
+        return positions[table.sample(rand)]
@@ -0,0 +1,221 @@
+"""
+uapool.py
+
+This module holds User-Agent strings ready to be sampled:
+- `AliasTable`, Vose's alias method: weighted sampling in O(1) after an O(n) build
+- `UserAgentPool`, a list of User-Agents with their optional weights, loaded once
+  from a list, a user file (read through mmap or streamed line by line) or the
+  `fake_useragent` dataset, and optionally classified for `pick(device=..., browser=...)`
+
+`spoof_useragent` keeps one pool per process instead of rebuilding its source on
+every call.
+"""
+
+import mmap
+import random
+
+
+class AliasTable:
+    """
+    Weighted sampling of indexes in constant time.
+
+    Args:
+        weights (list[float]): one non-negative weight per index, not all zero.
+
+    Raises:
+        ValueError: if weights is empty, has a negative weight or sums to zero.
+    """
+
+    __slots__ = ("_prob", "_alias", "_size")
+
+    def __init__(self, weights):
+        size = len(weights)
+        total = float(sum(weights))
+        if not size or total <= 0 or min(weights) < 0:
+            raise ValueError("weights must be non-negative and not all zero")
+        scaled = [weight * size / total for weight in weights]
+        prob = [1.0] * size
+        alias = list(range(size))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            prob[less] = scaled[less]
+            alias[less] = more
+            scaled[more] += scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left is 1.0 up to rounding errors.
+        self._prob = prob
+        self._alias = alias
+        self._size = size
+
+    def __len__(self):
+        return self._size
+
+    def sample(self, rand=random.random):
+        """
+        Args:
+            rand (callable): returns a float in [0, 1), one call per sample.
+
+        Returns:
+            int: an index drawn with probability weight / sum(weights).
+        """
+        u = rand() * self._size
+        i = int(u)
+        return i if u - i < self._prob[i] else self._alias[i]
+
+
+def _parse_line(line):
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    weight, tab, agent = line.partition("\t")
+    if tab:
+        try:
+            return agent.strip(), float(weight)
+        except ValueError:
+            pass
+    return line, None
+
+
+class UserAgentPool:
+    """
+    A fixed set of User-Agents, sampled uniformly or by weight.
+
+    Args:
+        agents (iterable[str]): the User-Agent strings.
+        weights (iterable[float] | None): one weight per agent (e.g. its market share),
+                                          None for a uniform pick.
+
+    Raises:
+        ValueError: if there is no agent, or not one weight per agent.
+    """
+
+    def __init__(self, agents, weights=None):
+        self.agents = tuple(agents)
+        if not self.agents:
+            raise ValueError("a User-Agent pool needs at least one agent")
+        self.weights = None
+        self.index = None
+        self._table = None
+        if weights is not None:
+            self.weights = tuple(weights)
+            if len(self.weights) != len(self.agents):
+                raise ValueError("expected one weight per User-Agent")
+            if len(set(self.weights)) > 1:
+                self._table = AliasTable(self.weights)
+            elif self.weights[0] <= 0:
+                raise ValueError("weights must be non-negative and not all zero")
+
+    def __len__(self):
+        return len(self.agents)
+
+    def __iter__(self):
+        return iter(self.agents)
+
+    def classify(self, cache_path=None):
+        """
+        Classify every agent (see uaparse.py) and build the index `pick` uses.
+
+        Args:
+            cache_path (str | None): JSON file keeping the classifications across runs,
+                                     None to parse without a persistent cache.
+
+        Returns:
+            UserAgentPool: self.
+        """
+        try:
+            from .uaparse import UAIndex, classify_all
+        except ImportError:
+            from uaparse import UAIndex, classify_all
+        self.index = UAIndex(classify_all(self.agents, cache_path), self.weights)
+        return self
+
+    def pick(self, rand=random.random, **criteria):
+        """
+        Return one User-Agent matching the criteria, drawn by weight when the pool has weights.
+
+        Args:
+            rand (callable): returns a float in [0, 1).
+            **criteria: browser, engine, os, device and/or major, see uaparse.py.
+
+        Returns:
+            str: a matching User-Agent, or None if none matches.
+        """
+        if not criteria:
+            return self.random(rand)
+        if self.index is None:
+            self.classify()
+        position = self.index.pick(rand, **criteria)
+        return None if position is None else self.agents[position]
+
+    def info(self, agent):
+        """The uaparse.UAInfo of an agent of the pool, None if the pool is not classified."""
+        if self.index is None:
+            return None
+        return self.index.infos[self.agents.index(agent)]
+
+    # Defined after the other random.random defaults: the name shadows the module below.
+    def random(self, rand=random.random):
+        """Return one User-Agent, drawn by weight when the pool has weights."""
+        if self._table is None:
+            return self.agents[int(rand() * len(self.agents))]
+        return self.agents[self._table.sample(rand)]
+
+    @classmethod
+    def from_lines(cls, lines):
+        """
+        Build a pool from text lines, one User-Agent per line.
+
+        Blank lines and lines starting with "#" are skipped. A line may start with a
+        weight and a tab ("12.5<TAB>Mozilla/5.0 ..."), agents without one weigh 1.
+        """
+        agents = []
+        weights = []
+        weighted = False
+        for line in lines:
+            parsed = _parse_line(line)
+            if parsed is None:
+                continue
+            agent, weight = parsed
+            agents.append(agent)
+            weights.append(1.0 if weight is None else weight)
+            weighted = weighted or weight is not None
+        return cls(agents, weights if weighted else None)
+
+    @classmethod
+    def from_file(cls, path, use_mmap=True):
+        """
+        Build a pool from a UTF-8 file in the `from_lines` format.
+
+        Args:
+            path (str): the file.
+            use_mmap (bool): map the file instead of reading it through a buffered stream,
+                             which avoids copying large files into the heap first.
+        """
+        if use_mmap:
+            with open(path, "rb") as file:
+                try:
+                    mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    # An empty file cannot be mapped.
+                    return cls(())
+                with mapped:
+                    return cls.from_lines(line.decode("utf-8", "ignore") for line in iter(mapped.readline, b""))
+        with open(path, encoding="utf-8", errors="ignore") as file:
+            return cls.from_lines(file)
+
+    @classmethod
+    def from_fake_useragent(cls):
+        """
+        Build a pool from the dataset of the `fake_useragent` library, weighted by usage share.
+
+        Raises:
+            ImportError: if fake_useragent is not installed.
+            ValueError: if its dataset has an unexpected shape.
+        """
+        from fake_useragent import UserAgent
+        data = getattr(UserAgent(), "data_browsers", None)
+        if not isinstance(data, list) or not data or not isinstance(data[0], dict):
+            raise ValueError("unsupported fake_useragent dataset")
+        return cls([entry["useragent"] for entry in data], [float(entry.get("percent") or 1.0) for entry in data])
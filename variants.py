@@ -0,0 +1,268 @@
+"""
+variants.py
+
+This module compares the responses a URL serves to different classes of clients:
+- `BodySketch` streams a body through a SHA-256 digest and a bottom-k MinHash of its
+  token shingles, which are hashed with a rolling hash; only a few hundred integers
+  are kept, never the body
+- `compare_variants()` fetches each URL once per User-Agent class concurrently (through
+  `fetch.fetch_many`) and yields a `VariantReport` per URL telling which variants are
+  identical, near-identical or different
+- `compare_all()` runs it to completion from synchronous code
+
+Memory stays bounded over any number of URLs: URLs are consumed lazily, `fetch_many`
+starts no more requests than its read-ahead while results wait for the consumer, and a
+report is yielded, then forgotten, as soon as every class of its URL has been fetched.
+"""
+
+import asyncio
+import hashlib
+import heapq
+import re
+import zlib
+from collections import deque, namedtuple
+try:
+    from .fetch import fetch_many
+    from .spoof_useragent import get_useragent
+except ImportError:
+    from fetch import fetch_many
+    from spoof_useragent import get_useragent
+
+Sketch = namedtuple("Sketch", ["status", "length", "digest", "minhash", "error"])
+Sketch.__doc__ = """
+Summary of one fetched body: length in bytes, digest its hex SHA-256, minhash the sorted
+bottom-k shingle hashes. error is the exception of a failed fetch (the other fields are then None).
+"""
+
+VariantReport = namedtuple("VariantReport", ["url", "sketches", "pairs", "verdict"])
+VariantReport.__doc__ = """
+Comparison of the variants of one URL. sketches maps each class name to its Sketch, pairs
+maps each (class, class) pair to (relation, similarity), verdict is the least similar
+relation of all pairs: "identical", "near-identical", "different" or "error".
+"""
+
+RELATIONS = ("identical", "near-identical", "different", "error")
+DEFAULT_CLASSES = {"desktop": {"device": "desktop"}, "mobile": {"device": "mobile"}}
+
+# Tokens are runs of bytes between whitespace and markup brackets.
+_TOKEN = re.compile(rb"[^\s<>]+")
+_SEPARATORS = frozenset(b" \t\n\r\f\v<>")
+# A token longer than this is folded into a running CRC-32 instead of being kept, so a body
+# without separators stays bounded.
+MAX_TOKEN = 4096
+_MASK = (1 << 64) - 1
+_BASE = 0x100000001B3
+# Odd multiplier spreading the rolling hash over the high bits the minimum depends on.
+_MIX = 0x9E3779B97F4A7C15
+
+
+class BodySketch:
+    """
+    Incremental sketch of a body fed chunk by chunk through `update()`.
+
+    Consecutive tokens are grouped in shingles of `shingle` tokens whose hashes are computed
+    with a polynomial rolling hash over the token CRC-32s; the k smallest distinct shingle
+    hashes form the MinHash signature. Chunk boundaries do not change the result.
+
+    Args:
+        k (int): signature size, the similarity estimate error is about 1 / sqrt(k).
+        shingle (int): tokens per shingle.
+    """
+
+    def __init__(self, k=128, shingle=4):
+        self.k = k
+        self.shingle = shingle
+        self.length = 0
+        self._sha = hashlib.sha256()
+        self._tail = b""
+        # CRC-32 of the part of the unfinished token already folded out of _tail, None if none.
+        self._partial = None
+        self._window = deque()
+        self._rolling = 0
+        # Weight of the oldest token of a full window, removed when the window slides.
+        self._oldest = pow(_BASE, shingle - 1, 1 << 64)
+        self._heap = []
+        self._members = set()
+
+    def update(self, chunk):
+        """Feed the next piece of the body."""
+        self.length += len(chunk)
+        self._sha.update(chunk)
+        data = self._tail + chunk if self._tail else chunk
+        if not data:
+            return
+        partial = self._partial
+        if partial is not None and data[0] in _SEPARATORS:
+            # The long token ended with the previous chunk.
+            self._add([partial])
+            partial = None
+        tokens = _TOKEN.findall(data)
+        # The last token may go on in the next chunk.
+        tail = tokens.pop() if tokens and data[-1] not in _SEPARATORS else b""
+        values = list(map(zlib.crc32, tokens))
+        if partial is not None and values:
+            values[0] = zlib.crc32(tokens[0], partial)
+            partial = None
+        if len(tail) > MAX_TOKEN:
+            partial = zlib.crc32(tail, partial or 0)
+            tail = b""
+        self._tail, self._partial = tail, partial
+        self._add(values)
+
+    def _add(self, values):
+        # Hot loop: the attributes live in locals for the whole chunk.
+        window, shingle, oldest = self._window, self.shingle, self._oldest
+        rolling = self._rolling
+        heap, members, k = self._heap, self._members, self.k
+        # Shingle hashes at or above the k-th smallest kept cannot enter the signature.
+        bound = -heap[0] if len(heap) == k else _MASK + 1
+        for value in values:
+            if len(window) == shingle:
+                rolling -= window.popleft() * oldest
+            window.append(value)
+            rolling = (rolling * _BASE + value) & _MASK
+            if len(window) == shingle:
+                mixed = (rolling * _MIX) & _MASK
+                if mixed < bound and mixed not in members:
+                    self._offer(mixed)
+                    if len(heap) == k:
+                        bound = -heap[0]
+        self._rolling = rolling
+
+    def _offer(self, value):
+        # Max-heap (negated values) of the k smallest distinct hashes seen.
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, -value)
+        else:
+            self._members.discard(-heapq.heappushpop(self._heap, -value))
+        self._members.add(value)
+
+    def finish(self, status=None):
+        """
+        Flush the last token and return the Sketch; call it once, after the last `update()`.
+
+        A body shorter than one shingle is represented by the shingle of all its tokens.
+        """
+        if self._tail or self._partial is not None:
+            self._add([zlib.crc32(self._tail, self._partial or 0)])
+            self._tail, self._partial = b"", None
+        if 0 < len(self._window) < self.shingle:
+            mixed = (self._rolling * _MIX) & _MASK
+            if mixed not in self._members:
+                self._offer(mixed)
+        return Sketch(status, self.length, self._sha.hexdigest(), tuple(sorted(-value for value in self._heap)), None)
+
+
+def similarity(first, second):
+    """
+    Estimate the Jaccard similarity of the shingle sets of two sketched bodies.
+
+    The estimate is exact when both bodies have fewer distinct shingles than the signature size.
+
+    Returns:
+        float: between 0.0 (nothing in common) and 1.0.
+    """
+    if not first.minhash and not second.minhash:
+        return 1.0
+    k = max(len(first.minhash), len(second.minhash))
+    a, b = set(first.minhash), set(second.minhash)
+    union = heapq.nsmallest(k, a | b)
+    return sum(1 for value in union if value in a and value in b) / len(union)
+
+
+def relation(first, second, threshold=0.9):
+    """
+    Returns:
+        tuple: (relation, similarity), relation is one of RELATIONS; bodies served with
+               different statuses are always "different".
+    """
+    if first.error is not None or second.error is not None:
+        return "error", None
+    if first.status == second.status and first.digest == second.digest:
+        return "identical", 1.0
+    score = similarity(first, second)
+    if first.status == second.status and score >= threshold:
+        return "near-identical", score
+    return "different", score
+
+
+def _class_agents(classes):
+    agents = {}
+    for name, value in (classes or DEFAULT_CLASSES).items():
+        agent = get_useragent(**value) if isinstance(value, dict) else value
+        if not agent:
+            raise ValueError(f"no User-Agent for class {name!r}")
+        agents[name] = agent
+    if len(set(agents.values())) != len(agents):
+        raise ValueError("each class needs its own User-Agent")
+    return agents
+
+
+def _report(url, sketches, threshold):
+    names = list(sketches)
+    pairs = {}
+    for i, first in enumerate(names):
+        for second in names[i + 1:]:
+            pairs[first, second] = relation(sketches[first], sketches[second], threshold)
+    verdict = max((pair[0] for pair in pairs.values()), key=RELATIONS.index, default="identical")
+    return VariantReport(url, sketches, pairs, verdict)
+
+
+async def compare_variants(urls, classes=None, threshold=0.9, k=128, shingle=4, **fetch_kwargs):
+    """
+    Fetch every URL once per User-Agent class and yield how the variants compare.
+
+    Use it with `async for report in compare_variants(urls): ...`. The fetches of all URLs
+    and classes share the limits of `fetch.fetch_many`, the reports come out as each URL completes.
+
+    Args:
+        urls (iterable[str]): the URLs, consumed lazily.
+        classes (dict): class name -> User-Agent string, or -> criteria for
+                        `spoof_useragent.get_useragent` (e.g. {"device": "mobile"}).
+                        DEFAULT_CLASSES (desktop and mobile) by default.
+        threshold (float): estimated similarity from which two bodies are near-identical.
+        k (int): MinHash signature size, see `BodySketch`.
+        shingle (int): tokens per shingle, see `BodySketch`.
+        **fetch_kwargs: concurrency, per_host, timeout, ssl_context for `fetch.fetch_many`.
+
+    Yields:
+        VariantReport: one per URL.
+    """
+    agents = _class_agents(classes)
+    names = {agent: name for name, agent in agents.items()}
+    requests = ((url, agent) for url in urls for agent in agents.values())
+    # url -> dicts of the sketches received so far, one per occurrence of the URL in flight.
+    pending = {}
+
+    def sink(url, user_agent):
+        return BodySketch(k, shingle)
+
+    async for result in fetch_many(requests, body_sink=sink, **fetch_kwargs):
+        if result.error is not None:
+            sketch = Sketch(None, None, None, None, result.error)
+        else:
+            sketch = result.body.finish(result.status)
+        name = names[result.user_agent]
+        occurrences = pending.setdefault(result.url, [])
+        sketches = next((entry for entry in occurrences if name not in entry), None)
+        if sketches is None:
+            sketches = {}
+            occurrences.append(sketches)
+        sketches[name] = sketch
+        if len(sketches) == len(agents):
+            occurrences.remove(sketches)
+            if not occurrences:
+                del pending[result.url]
+            yield _report(result.url, {name: sketches[name] for name in agents}, threshold)
+
+
+def compare_all(urls, **kwargs):
+    """
+    Run `compare_variants` to completion from synchronous code.
+
+    Returns:
+        list[VariantReport]: in completion order.
+    """
+    async def collect():
+        return [report async for report in compare_variants(urls, **kwargs)]
+    return asyncio.run(collect())
@@ -0,0 +1,234 @@
+"""
+winregistry.py
+
+This module finds the registry key of a Windows network adapter without scanning
+the whole adapter class key on every call:
+- `AdapterIndex` reads every adapter subkey once and maps its DriverDesc and
+  NetCfgInstanceId to the subkey name; the index is rebuilt only when the number of
+  subkeys changes
+- `AdapterIndex.set_network_address()` opens the one matching subkey with write
+  access, every other key is opened read-only
+
+The registry is reached through a backend with the `winreg` API (`winreg` itself on
+Windows). `MemoryRegistry` is an in-memory backend, so the index can be tested and
+benchmarked on any platform.
+"""
+
+import threading
+from collections import namedtuple
+
+ADAPTER_CLASS_KEY = r'SYSTEM\CurrentControlSet\Control\Class\{4d36e972-e325-11ce-bfc1-08002be10318}'
+
+Adapter = namedtuple("Adapter", ["subkey", "description", "instance_id"])
+Adapter.__doc__ = """One adapter subkey of the class key, with its DriverDesc and NetCfgInstanceId."""
+
+
+class AdapterIndex:
+    """
+    DriverDesc / NetCfgInstanceId -> subkey index of the network adapter class key.
+
+    Args:
+        backend: a module or object with the `winreg` API (ConnectRegistry, OpenKey,
+                 QueryInfoKey, EnumKey, QueryValueEx, SetValueEx and the HKEY_/KEY_/REG_ constants).
+        path (str): the adapter class key, under HKEY_LOCAL_MACHINE.
+    """
+
+    def __init__(self, backend, path=ADAPTER_CLASS_KEY):
+        self._backend = backend
+        self._path = path
+        self._lock = threading.Lock()
+        self._count = None
+        self._adapters = []
+        self._by_description = {}
+        self._by_instance_id = {}
+
+    def _open_class_key(self, hklm):
+        return self._backend.OpenKey(hklm, self._path, 0, self._backend.KEY_READ)
+
+    def _build(self, class_key, count):
+        winreg = self._backend
+        adapters = []
+        for i in range(count):
+            try:
+                name = winreg.EnumKey(class_key, i)
+            except OSError:
+                break
+            try:
+                with winreg.OpenKey(class_key, name, 0, winreg.KEY_READ) as subkey:
+                    description = winreg.QueryValueEx(subkey, "DriverDesc")[0]
+                    instance_id = winreg.QueryValueEx(subkey, "NetCfgInstanceId")[0]
+            except OSError:
+                # "Properties" and half-installed adapters have no DriverDesc.
+                continue
+            adapters.append(Adapter(name, description, instance_id))
+        by_description = {}
+        by_instance_id = {}
+        for adapter in adapters:
+            by_description.setdefault(adapter.description.lower(), adapter)
+            by_instance_id.setdefault(adapter.instance_id.lower(), adapter)
+        self._adapters, self._by_description, self._by_instance_id = adapters, by_description, by_instance_id
+        self._count = count
+
+    def _refresh(self, hklm):
+        with self._open_class_key(hklm) as class_key:
+            count = self._backend.QueryInfoKey(class_key)[0]
+            with self._lock:
+                if count != self._count:
+                    self._build(class_key, count)
+
+    def invalidate(self):
+        """Forget the index, the next lookup rebuilds it."""
+        with self._lock:
+            self._count = None
+
+    def adapters(self):
+        """
+        Returns:
+            list[Adapter]: every adapter of the class key, in subkey order.
+        """
+        winreg = self._backend
+        with winreg.ConnectRegistry(None, winreg.HKEY_LOCAL_MACHINE) as hklm:
+            self._refresh(hklm)
+        return list(self._adapters)
+
+    def _lookup(self, interface):
+        text = interface.lower()
+        adapter = self._by_instance_id.get(text) or self._by_description.get(text)
+        if adapter is not None:
+            return adapter
+        for adapter in self._adapters:
+            if text in adapter.description.lower():
+                return adapter
+        return None
+
+    def find(self, interface):
+        """
+        Find an adapter by NetCfgInstanceId, by DriverDesc, or by a substring of its DriverDesc.
+
+        Args:
+            interface (str): e.g. "{4D36E972-...}", "Intel(R) Ethernet Connection" or "Intel".
+
+        Returns:
+            Adapter: the first match, or None.
+        """
+        winreg = self._backend
+        with winreg.ConnectRegistry(None, winreg.HKEY_LOCAL_MACHINE) as hklm:
+            self._refresh(hklm)
+        return self._lookup(interface)
+
+    def set_network_address(self, interface, new_mac):
+        """
+        Write new_mac as the NetworkAddress of the adapter matching interface (see `find`).
+
+        Only the matching subkey is opened with write access. If it disappeared since the
+        index was built, the index is rebuilt and the write is tried once more.
+
+        Returns:
+            bool: True if the adapter was found and written, False otherwise.
+        """
+        winreg = self._backend
+        value = new_mac.replace(":", "").replace("-", "")
+        with winreg.ConnectRegistry(None, winreg.HKEY_LOCAL_MACHINE) as hklm:
+            for _attempt in range(2):
+                self._refresh(hklm)
+                adapter = self._lookup(interface)
+                if adapter is None:
+                    return False
+                try:
+                    with self._open_class_key(hklm) as class_key, \
+                            winreg.OpenKey(class_key, adapter.subkey, 0, winreg.KEY_SET_VALUE) as subkey:
+                        winreg.SetValueEx(subkey, "NetworkAddress", 0, winreg.REG_SZ, value)
+                        return True
+                except FileNotFoundError:
+                    self.invalidate()
+        return False
+
+
+class _MemoryKey:
+
+    def __init__(self, path, access):
+        self.path = path
+        self.access = access
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.Close()
+
+    def Close(self):
+        pass
+
+
+class MemoryRegistry:
+    """
+    In-memory registry backend with the subset of the `winreg` API AdapterIndex uses.
+
+    Keys are created with `add_key()`. Every `OpenKey` is recorded in `opened` as
+    (path, access), and `SetValueEx` on a key opened without KEY_SET_VALUE raises
+    PermissionError like the real registry.
+    """
+
+    HKEY_LOCAL_MACHINE = "HKEY_LOCAL_MACHINE"
+    KEY_READ = 0x20019
+    KEY_SET_VALUE = 0x0002
+    KEY_ALL_ACCESS = 0xF003F
+    REG_SZ = 1
+
+    def __init__(self):
+        self._subkeys = {self.HKEY_LOCAL_MACHINE.lower(): []}
+        self._values = {self.HKEY_LOCAL_MACHINE.lower(): {}}
+        self.opened = []
+
+    def add_key(self, path, **values):
+        """Create path under HKEY_LOCAL_MACHINE (and its parents) and set the given string values."""
+        parent = self.HKEY_LOCAL_MACHINE
+        for part in path.split("\\"):
+            child = parent + "\\" + part
+            if child.lower() not in self._subkeys:
+                self._subkeys[child.lower()] = []
+                self._values[child.lower()] = {}
+                self._subkeys[parent.lower()].append(part)
+            parent = child
+        self._values[parent.lower()].update(values)
+
+    def delete_key(self, path):
+        """Remove a leaf key, relative to HKEY_LOCAL_MACHINE."""
+        parent, _, name = (self.HKEY_LOCAL_MACHINE + "\\" + path).rpartition("\\")
+        full = (parent + "\\" + name).lower()
+        del self._subkeys[full], self._values[full]
+        self._subkeys[parent.lower()].remove(name)
+
+    def value(self, path, name):
+        """Read a value without going through OpenKey (for assertions)."""
+        return self._values[(self.HKEY_LOCAL_MACHINE + "\\" + path).lower()][name]
+
+    def ConnectRegistry(self, computer_name, key):
+        return _MemoryKey(key, self.KEY_READ)
+
+    def OpenKey(self, key, sub_key, reserved=0, access=KEY_READ):
+        path = key.path + "\\" + sub_key
+        if path.lower() not in self._subkeys:
+            raise FileNotFoundError(2, "The system cannot find the file specified", path)
+        self.opened.append((path, access))
+        return _MemoryKey(path, access)
+
+    def QueryInfoKey(self, key):
+        return len(self._subkeys[key.path.lower()]), len(self._values[key.path.lower()]), 0
+
+    def EnumKey(self, key, index):
+        subkeys = self._subkeys[key.path.lower()]
+        if index >= len(subkeys):
+            raise OSError(259, "No more data is available")
+        return subkeys[index]
+
+    def QueryValueEx(self, key, value_name):
+        values = self._values[key.path.lower()]
+        if value_name not in values:
+            raise FileNotFoundError(2, "The system cannot find the file specified", value_name)
+        return values[value_name], self.REG_SZ
+
+    def SetValueEx(self, key, value_name, reserved, type, value):
+        if not key.access & self.KEY_SET_VALUE:
+            raise PermissionError(5, "Access is denied", key.path)
+        self._values[key.path.lower()][value_name] = value